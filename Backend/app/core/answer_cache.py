@@ -0,0 +1,175 @@
+# backend/app/core/answer_cache.py
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core import config
+
+LOG = logging.getLogger("intellidoc.answer_cache")
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Case-, whitespace- and trailing-punctuation-insensitive form of a question, so
+    "What is the interest rate?" and "what is the  interest rate" share an entry.
+    """
+    return _WS.sub(" ", question).strip().rstrip("?!. ").lower()
+
+
+class _Entry:
+    __slots__ = ("answer", "sources", "usage", "embedding", "created", "latency_ms")
+
+    def __init__(self, answer, sources, usage, embedding, latency_ms):
+        self.answer = answer
+        self.sources = sources
+        self.usage = usage
+        self.embedding = embedding
+        self.created = time.monotonic()
+        self.latency_ms = latency_ms
+
+
+class AnswerCache:
+    """
+    In-memory cache of /query/ask answers keyed by (scope, normalized question).
+
+    A scope is whatever must match for an answer to be reusable: the source filter,
+    the corpus version from DocumentManifest.version() and the retrieval parameters.
+    Re-indexing or deleting a document changes its version, so stale answers are
+    never hit and age out of the LRU. Entries also expire after `ttl_seconds`.
+
+    With `similarity` > 0, a question that misses the exact key is compared (cosine
+    over normalized embeddings) with the other questions cached in the same scope, and
+    the closest answer is reused if it clears the threshold.
+    """
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None, similarity: float = None):
+        self.max_entries = config.ANSWER_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl_seconds = config.ANSWER_CACHE_TTL_S if ttl_seconds is None else ttl_seconds
+        self.similarity = config.ANSWER_CACHE_SIMILARITY if similarity is None else similarity
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Hashable, str], _Entry]" = OrderedDict()
+        self._scopes = {}  # scope -> set of normalized questions cached under it
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0,
+                       "expirations": 0, "saved_ms": 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @property
+    def semantic(self) -> bool:
+        return self.enabled and self.similarity > 0
+
+    # -----------------------------
+    # Lookup / insert
+    # -----------------------------
+    def get(self, question: str, scope: Hashable, embed: Optional[Callable[[], List[float]]] = None):
+        """
+        Returns (entry or None, "exact" | "semantic" | None, question embedding or None).
+        On an exact miss in semantic mode, `embed()` is called (outside the lock) for the
+        question vector; it is returned so the caller can reuse it for retrieval.
+        """
+        if not self.enabled:
+            return None, None, None
+        normalized = normalize_question(question)
+        with self._lock:
+            entry = self._live((scope, normalized), time.monotonic())
+            if entry is not None:
+                self._stats["exact_hits"] += 1
+                return entry, "exact", None
+        embedding = None
+        if embed is not None and self.semantic:
+            embedding = embed()
+            with self._lock:
+                entry = self._nearest(scope, _unit(embedding), time.monotonic())
+                if entry is not None:
+                    self._stats["semantic_hits"] += 1
+                    return entry, "semantic", embedding
+        with self._lock:
+            self._stats["misses"] += 1
+        return None, None, embedding
+
+    def put(self, question: str, scope: Hashable, answer: str, sources: list, latency_ms: float,
+            embedding: Optional[List[float]] = None, usage: Optional[dict] = None):
+        if not self.enabled:
+            return
+        normalized = normalize_question(question)
+        vector = _unit(embedding) if embedding is not None else None
+        with self._lock:
+            key = (scope, normalized)
+            self._entries[key] = _Entry(answer, sources, usage, vector, latency_ms)
+            self._entries.move_to_end(key)
+            self._scopes.setdefault(scope, set()).add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def record_saved(self, entry: _Entry, lookup_ms: float):
+        """
+        Count the latency a hit saved: what the cached answer took to compute, less the lookup.
+        """
+        with self._lock:
+            self._stats["saved_ms"] += max(entry.latency_ms - lookup_ms, 0.0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+
+    def _live(self, key, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl_seconds and now - entry.created > self.ttl_seconds:
+            self._drop(key)
+            self._stats["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, scope: Hashable, vector: np.ndarray, now: float) -> Optional[_Entry]:
+        keys = [(scope, q) for q in self._scopes.get(scope, ())]
+        keys = [k for k in keys if self._entries[k].embedding is not None]
+        if not keys:
+            return None
+        matrix = np.vstack([self._entries[k].embedding for k in keys])
+        sims = matrix @ vector
+        best = int(np.argmax(sims))
+        if sims[best] < self.similarity:
+            return None
+        return self._live(keys[best], now)
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+        scope, normalized = key
+        questions = self._scopes.get(scope)
+        if questions is not None:
+            questions.discard(normalized)
+            if not questions:
+                del self._scopes[scope]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        lookups = hits + stats["misses"]
+        stats["saved_ms"] = round(stats["saved_ms"], 1)
+        return {**stats, "entries": entries, "max_entries": self.max_entries, "ttl_seconds": self.ttl_seconds,
+                "similarity": self.similarity, "hit_rate": round(hits / lookups, 3) if lookups else 0.0}
+
+
+def _unit(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+answer_cache = AnswerCache()
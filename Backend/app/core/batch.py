@@ -0,0 +1,173 @@
+# backend/app/core/batch.py
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List
+
+from app.core import config
+from app.core.legal_check import load_rules, run_rule_check, run_rule_check_all
+from app.core.parser import join_pages, load_pdf_bytes
+from app.core.risk import assess_rule_check
+from app.core.spool import SpooledUpload
+
+LOG = logging.getLogger("intellidoc.batch")
+
+
+def check_document(path: str, source: str, document_type: str = "auto", keep_pages: bool = False) -> dict:
+    """
+    Parse one PDF and run the rule check and risk scoring on it. Runs in a worker
+    process, so OCR stays single-process here: a batch parallelises across documents.
+    Failures are returned as {"status": "error"} rather than raised.
+    """
+    start = time.perf_counter()
+    try:
+        docs = load_pdf_bytes(path, ocr_if_needed=True, workers=1)
+        text = join_pages(docs)
+        pages = [(d.metadata["page_offset"], d.metadata["page"]) for d in docs]
+        detected = None
+        if document_type == "auto":
+            detection = run_rule_check_all(text, pages=pages)
+            document_type, detected = detection["document_type"], detection["detected"]
+            rule_check = detection["checks"].get(document_type)
+        else:
+            rule_check = run_rule_check(text, document_type, pages=pages)
+        risk = assess_rule_check(rule_check, load_rules(document_type)) if rule_check else None
+        result = {
+            "type": "document",
+            "source": source,
+            "status": "ok",
+            "document_type": document_type,
+            "detected": detected,
+            "legal_check": rule_check,
+            "risk": risk,
+            "num_pages": len(docs),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        if keep_pages:
+            result["_pages"] = docs
+        return result
+    except Exception as e:
+        LOG.exception("Batch check failed for %s", source)
+        return {"type": "document", "source": source, "status": "error", "detail": str(e),
+                "seconds": round(time.perf_counter() - start, 3)}
+
+
+class PortfolioSummary:
+    """
+    Running aggregate over batch results: document types, risk distribution, the
+    clauses missing most often and the riskiest documents.
+    """
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.started = time.perf_counter()
+        self.documents = 0
+        self.failed = 0
+        self.document_types = Counter()
+        self.levels = Counter()
+        self.missing = Counter()
+        self.score_total = 0
+        self.score_max = 0
+        self._riskiest = []  # min-heap of (score, seq, entry)
+
+    def add(self, result: dict):
+        self.documents += 1
+        if result["status"] != "ok":
+            self.failed += 1
+            return
+        self.document_types[result["document_type"] or "unknown"] += 1
+        risk = result.get("risk")
+        if not risk:
+            return
+        self.levels[risk["level"]] += 1
+        self.missing.update(risk["missing"])
+        self.score_total += risk["score"]
+        self.score_max = max(self.score_max, risk["score"])
+        entry = {"source": result["source"], "document_type": result["document_type"], "score": risk["score"]}
+        item = (risk["score"], self.documents, entry)
+        if len(self._riskiest) < self.top_n:
+            heapq.heappush(self._riskiest, item)
+        else:
+            heapq.heappushpop(self._riskiest, item)
+
+    def to_dict(self) -> dict:
+        scored = sum(self.levels.values())
+        return {
+            "type": "summary",
+            "documents": self.documents,
+            "ok": self.documents - self.failed,
+            "failed": self.failed,
+            "document_types": dict(self.document_types.most_common()),
+            "risk": {
+                "mean": round(self.score_total / scored, 2) if scored else None,
+                "max": self.score_max if scored else None,
+                "levels": {level: self.levels.get(level, 0) for level in ("low", "medium", "high")},
+            },
+            "most_missing": [{"clause": c, "documents": n} for c, n in self.missing.most_common(self.top_n)],
+            "highest_risk": [entry for _, _, entry in sorted(self._riskiest, key=lambda x: (-x[0], x[1]))],
+            "seconds": round(time.perf_counter() - self.started, 3),
+        }
+
+
+class BatchChecker:
+    """
+    Runs check_document over many spooled PDFs on a process pool (created on first use,
+    INTELLIDOC_BATCH_PROCESSES workers; 0 runs them in the event loop's thread pool)
+    and yields results in completion order.
+    """
+
+    def __init__(self, processes: int = None):
+        self.processes = config.BATCH_PROCESSES if processes is None else processes
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self.processes <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes)
+                LOG.info("Batch process pool started (%d processes)", self.processes)
+            return self._pool
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    async def run(self, uploads: List[SpooledUpload], document_type: str = "auto",
+                  keep_pages: bool = False) -> AsyncIterator[dict]:
+        """
+        Yield one result per upload as it completes, tagged with the upload's id under
+        "_upload_id" (filenames can repeat). Spool files are removed as their document
+        finishes; if the consumer stops early (client disconnect), pending
+        documents are cancelled and the remaining spool files removed.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._executor()
+        pending = {
+            loop.run_in_executor(executor, check_document, u.path, u.filename, document_type, keep_pages): u
+            for u in uploads
+        }
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    upload = pending.pop(fut)
+                    upload.cleanup()
+                    yield {**fut.result(), "_upload_id": upload.id}
+        finally:
+            for fut, upload in pending.items():
+                fut.cancel()
+                upload.cleanup()
+
+    def stats(self) -> dict:
+        return {"processes": self.processes, "started": self._pool is not None}
+
+
+batch_checker = BatchChecker()
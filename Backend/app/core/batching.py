@@ -0,0 +1,119 @@
+# backend/app/core/batching.py
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+LOG = logging.getLogger("intellidoc.batching")
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Gathers requests submitted from many threads into dynamically sized batches.
+
+    Each request is a list of items. The worker thread waits for the first request,
+    then keeps collecting until `max_batch` items are queued or `max_wait_ms` has
+    passed, calls `fn` once on the concatenated items and hands each caller its
+    slice of the results through a Future. `fn` must return one result per item.
+    """
+
+    def __init__(self, fn: Callable, max_batch: int = 64, max_wait_ms: float = 5.0, name: str = "batcher"):
+        self.fn = fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {"batches": 0, "items": 0, "requests": 0, "busy_seconds": 0.0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return self
+
+    def close(self, timeout: float = 5.0):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, items: List) -> Future:
+        """
+        Queue a request; the Future resolves to the results for `items`, in order.
+        """
+        fut = Future()
+        if not items:
+            fut.set_result([])
+            return fut
+        if self._thread is None:
+            self.start()
+        self._queue.put((list(items), fut))
+        return fut
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_batch_size"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["queued_requests"] = self._queue.qsize()
+        return stats
+
+    # -----------------------------
+    # Worker loop
+    # -----------------------------
+    def _collect(self, first):
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                req = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if req is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(req)
+            size += len(req[0])
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = self._collect(first)
+            batch = [(items, fut) for items, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            flat = [item for items, _ in batch for item in items]
+            start = time.perf_counter()
+            try:
+                results = self.fn(flat)
+            except Exception as e:
+                LOG.exception("%s: batch of %d failed", self.name, len(flat))
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            offset = 0
+            for items, fut in batch:
+                fut.set_result(results[offset:offset + len(items)])
+                offset += len(items)
+
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["items"] += len(flat)
+                self._stats["requests"] += len(batch)
+                self._stats["busy_seconds"] += time.perf_counter() - start
@@ -1,30 +1,16 @@
-from app.core.vectorstore import load_existing_chroma
-from app.core.embeddings import get_embedding_model
+from app.core.registry import registry
 
 
 def list_sources(persist_dir: str = "chroma_db"):
     """
-    List all unique document sources indexed in the Chroma vectorstore.
+    List all document sources indexed in the vectorstore, from the document catalog.
     """
-    embedding_model = get_embedding_model()
-    db = load_existing_chroma(persist_dir, embedding_model)
-
-    # ✅ Safely access Chroma collection
-    try:
-        collection = db._collection.get(include=["metadatas"])
-    except AttributeError:
-        # Fallback for future API versions
-        collection = db.get(include=["metadatas"])
-
-    sources = set()
-    for meta in collection.get("metadatas", []):
-        if meta and "source" in meta:
-            sources.add(meta["source"])
+    sources = registry.get_manifest(persist_dir).sources()
 
     if sources:
-        print("📄 Indexed sources:\n" + "\n".join(sorted(sources)))
+        print("📄 Indexed sources:\n" + "\n".join(sources))
     else:
-        print("⚠️ No sources found in the Chroma database.")
+        print("⚠️ No sources found in the vector database.")
 
 
 if __name__ == "__main__":
@@ -1,10 +1,269 @@
+# backend/app/core/chunker.py
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-def chunk_documents(docs, chunk_size=1000, chunk_overlap=200):
-    # Convert strings to Documents if necessary
-    if docs and isinstance(docs[0], str):
-        docs = [Document(page_content=d) for d in docs]
+from app.core import config
+from app.core.context import TokenCounter, token_counter
+from app.core.parser import PAGE_SEPARATOR
+from app.core.segmenter import HEADING_RE
+
+# Unit boundaries, each anchored on the newline before it: a heading (the segmenter's
+# rules, plus sub-clause numbers without a trailing dot: "4.2 The Borrower ..."), a
+# defined-term line ('"Borrower" means ...') or a blank line.
+# The paragraph alternative only consumes the first newline, so a heading right after
+# a blank line is still recognised as one.
+# All alternatives share the leading "\n", so the scan can jump between newlines.
+_HEADING = HEADING_RE.pattern.removeprefix(r"\n")
+BOUNDARY_RE = re.compile(
+    r"\n(?:"
+    rf"(?P<heading>{_HEADING}|[ \t]*\d{{1,3}}(?:\.\d{{1,3}})+(?=\s))"
+    r"|(?P<definition>[ \t]*[\"“][A-Z][^\"”\n]{0,60}[\"”]\s+(?:shall\s+)?(?:means?|includes?|refers?\s+to)\b)"
+    r"|(?P<paragraph>(?=[ \t]*\n))"
+    r")",
+    re.MULTILINE,
+)
+# Sentence ends inside an over-long unit: punctuation, whitespace, then a capital,
+# digit, bracket or quote
+SENTENCE_RE = re.compile(r"(?<=[.;:!?])\s+(?=[A-Z0-9(\"“])")
+_WORD_RE = re.compile(r"\S+")
+SENTENCE_ENDS = frozenset(".;:!?)\"”")
+
+# At a heading, start a new chunk once the current one is at least this full
+MIN_FILL = 0.75
+# A heading unit of at most this many tokens is a bare title line, kept with what follows
+TITLE_TOKENS = 16
+MAX_TITLE_CHARS = 80  # longer first lines are clause text, not titles
+
+
+def _units(text: str, start: int, end: int) -> List[Tuple[int, int, bool]]:
+    """
+    (start, end, is_heading) structural units of text[start:end].
+    """
+    units, pos, heading = [], start, False
+    for m in BOUNDARY_RE.finditer(text, start, end):
+        cut = m.start() + 1
+        if cut > pos:
+            units.append((pos, cut, heading))
+        pos, heading = max(pos, cut), m.lastgroup == "heading"
+    if pos < end:
+        units.append((pos, end, heading))
+    return units
+
+
+def _pieces(text: str, start: int, end: int, target: int, overlap: int, counter: TokenCounter) -> List[Tuple[int, int]]:
+    """
+    Split one unit longer than `target` tokens at sentence ends (word ends for run-on
+    sentences). Consecutive pieces share up to `overlap` tokens of whole sentences.
+    """
+    sentences, pos = [], start
+    for m in SENTENCE_RE.finditer(text, start, end):
+        sentences.append((pos, m.start()))
+        pos = m.end()
+    sentences.append((pos, end))
+
+    spans = []
+    for s, e in sentences:
+        cost = counter.count_span(text, s, e)
+        if cost <= target:
+            spans.append((s, e, cost))
+            continue
+        # Run-on sentence: cut between words
+        piece_start, used = s, 0
+        for w in _WORD_RE.finditer(text, s, e):
+            cost = counter.count_span(text, w.start(), w.end())
+            if used and used + cost > target:
+                spans.append((piece_start, w.start(), used))
+                piece_start, used = w.start(), 0
+            used += cost
+        spans.append((piece_start, e, used))
+
+    pieces, current, used = [], [], 0
+    for s, e, cost in spans:
+        if current and used + cost > target:
+            pieces.append((current[0][0], current[-1][1]))
+            # Carry whole trailing sentences up to `overlap` tokens into the next piece
+            carried, carried_tokens = [], 0
+            for cs, ce, ct in reversed(current):
+                if carried_tokens + ct > overlap or carried_tokens + ct + cost > target:
+                    break
+                carried.insert(0, (cs, ce, ct))
+                carried_tokens += ct
+            current, used = carried, carried_tokens
+        current.append((s, e, cost))
+        used += cost
+    if current:
+        pieces.append((current[0][0], current[-1][1]))
+    return pieces
+
+
+def split_spans(text: str, target: int = None, overlap: int = None, counter: TokenCounter = None,
+                title: str = None, final: bool = True) -> Tuple[List[Tuple[int, int, str]], Optional[tuple]]:
+    """
+    Structure-aware split of text into (start, end, heading) chunk spans of about
+    `target` tokens. Units (clauses, definitions, paragraphs) are packed whole; a new
+    chunk starts at a heading once the current one is MIN_FILL full (a bare title line
+    moves along with the clause under it), and a unit over `target` is split at
+    sentence ends with `overlap` tokens of overlap.
+
+    `title` is the heading text starts under (for text continued from a previous page).
+    With final=False the last, still-open chunk is not returned; (start, heading) of
+    it is returned instead so the caller can continue it with the following text.
+    Returns (spans, open), open being None when nothing is left open.
+    """
+    target = target or config.CHUNK_TOKENS
+    overlap = config.CHUNK_OVERLAP_TOKENS if overlap is None else overlap
+    counter = counter or token_counter
+    spans = []
+    cur_start, cur_end, used, heading = None, None, 0, None
+    bare = None  # (start, tokens, title) of a title line ending the current chunk
+
+    for s, e, is_heading in _units(text, 0, len(text)):
+        if is_heading:
+            # Title lines ("7. TERMINATION") name the section; a clause's opening line does not
+            line_end = text.find("\n", s + 1, e)
+            line_end = e if line_end < 0 else line_end
+            if line_end - s <= MAX_TITLE_CHARS:
+                title = text[s:line_end].strip()
+        cost = counter.count_span(text, s, e)
+        if cur_start is not None and (cost > target or used + cost > target
+                                      or (is_heading and used >= target * MIN_FILL)):
+            if bare is not None and bare[0] > cur_start:
+                spans.append((cur_start, bare[0], heading))
+                cur_start, used, heading = bare
+            else:
+                spans.append((cur_start, cur_end, heading))
+                cur_start = None
+        if cost > target:
+            pieces = _pieces(text, s if cur_start is None else cur_start, e, target, overlap, counter)
+            spans.extend((ps, pe, title) for ps, pe in pieces[:-1])
+            cur_start, cur_end = pieces[-1]
+            used, heading, bare = counter.count_span(text, cur_start, cur_end), title, None
+            continue
+        if cur_start is None:
+            cur_start, used, heading = s, 0, title
+        cur_end = e
+        used += cost
+        bare = (s, cost, title) if is_heading and cost <= TITLE_TOKENS else None
+
+    if cur_start is not None and final:
+        spans.append((cur_start, cur_end, heading))
+    if final or cur_start is None:
+        return _trimmed(text, spans), None
+    return _trimmed(text, spans), (cur_start, heading)
+
+
+def _ends_sentence(text: str) -> bool:
+    i = len(text) - 1
+    while i >= 0 and text[i].isspace():
+        i -= 1
+    return i < 0 or text[i] in SENTENCE_ENDS
+
+
+def _trimmed(text: str, spans):
+    """
+    Move span edges off surrounding whitespace; drop empty spans.
+    """
+    out = []
+    for s, e, heading in spans:
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if e > s:
+            out.append((s, e, heading))
+    return out
+
+
+def _structure_chunks(docs: Iterable, target: int, overlap: int) -> Iterator[Document]:
+    """
+    Chunk pages in order. Chunks end at page breaks (so page citations stay exact),
+    except where a page ends mid-sentence: then the open chunk is carried over and
+    continued on the next page (joined with PAGE_SEPARATOR, as in the parser's page
+    offsets). Chunks take the metadata of the page they start on.
+    """
+    carry = None  # (text, global start, heading, [(global offset, page metadata)])
+    heading = None  # last heading seen; a new page continues under it
+
+    def emit(text, base, metas, spans):
+        for s, e, heading in spans:
+            meta = next(m for offset, m in reversed(metas) if offset <= base + s)
+            metadata = {**meta, "start_index": base + s}
+            if heading:
+                metadata["heading"] = heading
+            yield Document(page_content=text[s:e], metadata=metadata)
+
+    def finish(carry):
+        text, base, title, metas = carry
+        return emit(text, base, metas, split_spans(text, target, overlap, title=title)[0])
+
+    for doc in docs:
+        # Convert strings to Documents if necessary
+        if isinstance(doc, str):
+            doc = Document(page_content=doc)
+        offset = doc.metadata.get("page_offset")
+        if carry is not None and offset == carry[1] + len(carry[0]) + len(PAGE_SEPARATOR):
+            text = carry[0] + PAGE_SEPARATOR + doc.page_content
+            base, title, metas = carry[1], carry[2], carry[3] + [(offset, doc.metadata)]
+        else:
+            if carry is not None:
+                yield from finish(carry)
+            text, base, title = doc.page_content, offset or 0, heading if offset is not None else None
+            metas = [(base, doc.metadata)]
+        carry = None
+        # Free-standing text, or a page ending on a full sentence: nothing to continue
+        final = offset is None or _ends_sentence(text)
+        spans, open_chunk = split_spans(text, target, overlap, title=title, final=final)
+        yield from emit(text, base, metas, spans)
+        heading = spans[-1][2] if spans else title
+        if open_chunk is not None:
+            start, heading = open_chunk
+            metas = [(o, m) for o, m in metas if o <= base + start][-1:] + \
+                    [(o, m) for o, m in metas if o > base + start]
+            carry = (text[start:], base + start, heading, metas)
+    if carry is not None:
+        yield from finish(carry)
+
+
+def _recursive_chunks(docs: Iterable, chunk_size: int, chunk_overlap: int) -> Iterator[Document]:
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+    )
+    for doc in docs:
+        if isinstance(doc, str):
+            doc = Document(page_content=doc)
+        page_offset = doc.metadata.get("page_offset", 0)
+        for chunk in splitter.split_documents([doc]):
+            chunk.metadata["start_index"] += page_offset
+            yield chunk
+
+
+def iter_chunks(docs: Iterable, strategy: str = None, chunk_tokens: int = None, overlap_tokens: int = None,
+                chunk_size: int = None, chunk_overlap: int = None) -> Iterator[Document]:
+    """
+    Lazily split documents (e.g. pages from parser.iter_pdf_pages) in order, holding
+    only the current page and an unfinished clause in memory. Every ingestion path
+    uses this, so a file is chunked the same way whichever endpoint indexed it.
+    "start_index" is document-global (it adds the page's "page_offset").
+
+    strategy (default INTELLIDOC_CHUNK_STRATEGY):
+      "structure" - clause / heading / definition-aware chunks of about chunk_tokens
+                    tokens, overlapping only where a long clause had to be split;
+                    chunks carry the "heading" they start under.
+      "recursive" - the previous character splitter (chunk_size / chunk_overlap chars).
+    """
+    # start_index feeds the deterministic chunk ids in vectorstore.make_chunk_ids
+    strategy = strategy or config.CHUNK_STRATEGY
+    if strategy == "recursive":
+        return _recursive_chunks(docs, chunk_size or config.CHUNK_SIZE,
+                                 config.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap)
+    if strategy != "structure":
+        raise ValueError(f"Unknown chunking strategy: {strategy}")
+    return _structure_chunks(docs, chunk_tokens or config.CHUNK_TOKENS,
+                             config.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens)
+
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    return splitter.split_documents(docs)
+def chunk_documents(docs, **kwargs):
+    return list(iter_chunks(docs, **kwargs))
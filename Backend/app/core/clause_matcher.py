@@ -0,0 +1,65 @@
+# backend/app/core/clause_matcher.py
+from collections import defaultdict
+from typing import Dict, List
+
+
+class ClauseMatcher:
+    """
+    Compiled keyword table for one rule set.
+
+    Keywords are lowercased and de-duplicated once at build time, so a scan searches
+    each distinct keyword once over the already-lowercased document, no matter how many
+    clauses share it. Searching uses str.find (C-level, early exit on absent keywords),
+    which keeps the results identical to `keyword.lower() in text.lower()` per keyword.
+    """
+
+    def __init__(self, clause_rules: Dict[str, dict]):
+        self.clauses = list(clause_rules)
+        self._clauses_for = defaultdict(list)
+        for clause, info in clause_rules.items():
+            for kw in info["keywords"]:
+                kw = kw.lower()
+                if kw and clause not in self._clauses_for[kw]:
+                    self._clauses_for[kw].append(clause)
+        self.keywords = list(self._clauses_for)
+
+    def scan_keywords(self, text_lower: str, max_hits: int = 10) -> Dict[str, List[int]]:
+        """
+        Return {keyword: [offset, ...]} for every keyword present, capped at max_hits
+        offsets per keyword. `text_lower` must already be lowercased. Each distinct
+        keyword is searched for separately (one str.find pass per keyword), so
+        overlapping keywords ("interest", "interest rate") all report their offsets.
+        """
+        found = {}
+        for kw in self.keywords:
+            offset = text_lower.find(kw)
+            if offset < 0:
+                continue
+            offsets = []
+            while offset >= 0 and len(offsets) < max_hits:
+                offsets.append(offset)
+                offset = text_lower.find(kw, offset + 1)
+            found[kw] = offsets
+        return found
+
+    def clause_hits(self, keyword_hits: Dict[str, List[int]], max_hits: int = 10) -> Dict[str, List[dict]]:
+        """
+        Group scan_keywords() output by clause: {clause: [{"keyword": kw, "offset": i}, ...]}
+        sorted by offset and capped at max_hits per clause.
+        """
+        found = defaultdict(list)
+        for kw, offsets in keyword_hits.items():
+            for clause in self._clauses_for.get(kw, ()):
+                found[clause].extend((o, kw) for o in offsets)
+        return {
+            clause: [{"keyword": kw, "offset": o} for o, kw in sorted(pairs)[:max_hits]]
+            for clause, pairs in found.items()
+        }
+
+    def scan(self, text_lower: str, max_hits: int = 10) -> Dict[str, List[dict]]:
+        """
+        Return {clause: [{"keyword": kw, "offset": i}, ...]} for every clause with a hit,
+        sorted by offset and capped at max_hits per clause. `text_lower` must already
+        be lowercased.
+        """
+        return self.clause_hits(self.scan_keywords(text_lower, max_hits), max_hits)
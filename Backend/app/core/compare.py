@@ -0,0 +1,316 @@
+# backend/app/core/compare.py
+import asyncio
+import difflib
+import logging
+import re
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+import numpy as np
+
+from app.core import config
+from app.core.context import token_counter
+from app.core.legal_check import rules_registry
+from app.core.segmenter import segment_text
+
+LOG = logging.getLogger("intellidoc.compare")
+
+_WS = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\S+")
+# Leading clause number ("4.", "12.3)", "(b)"): renumbering alone is not a change
+_NUMBER_RE = re.compile(r"^\s*(?:\d{1,3}(?:\.\d{1,3})*[.)]|\(\w{1,4}\))\s+")
+
+# Keyword hits kept per keyword when labelling clauses (each keyword is searched once over the whole document)
+MAX_KEYWORD_HITS = 10_000
+# Similarity adjustment when both clauses carry rule labels: shared label / no label in common
+LABEL_BONUS = 0.1
+MAX_CHANGES_PER_PAIR = 20
+
+PAIR_PROMPT = """
+You are a contract analysis assistant. Two versions of the same contract clause are given.
+List each material difference (amounts, dates, periods, parties, obligations, conditions)
+as a short bullet, naming the value in each version. If the differences are only wording,
+answer "No material difference."
+
+Doc1 ({title1}):
+{text1}
+
+Doc2 ({title2}):
+{text2}
+"""
+
+
+@dataclass
+class Clause:
+    index: int
+    title: str
+    text: str
+    start: int
+    labels: List[str] = field(default_factory=list)
+
+    @property
+    def body(self) -> str:
+        return _NUMBER_RE.sub("", self.text, count=1)
+
+    @property
+    def normalized(self) -> str:
+        return _WS.sub(" ", self.body).strip().lower()
+
+    def to_dict(self) -> dict:
+        return {"clause": self.index, "title": self.title, "start": self.start, "labels": self.labels}
+
+
+@dataclass
+class ClausePair:
+    status: str  # identical | changed | removed | added
+    doc1: Optional[Clause] = None
+    doc2: Optional[Clause] = None
+    similarity: Optional[float] = None
+    changes: list = field(default_factory=list)
+    analysis: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def title(self) -> str:
+        return (self.doc1 or self.doc2).title
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "doc1": self.doc1.to_dict() if self.doc1 else None,
+            "doc2": self.doc2.to_dict() if self.doc2 else None,
+            "similarity": None if self.similarity is None else round(self.similarity, 3),
+            "changes": self.changes,
+            "analysis": self.analysis,
+            "error": self.error,
+        }
+
+
+@dataclass
+class Comparison:
+    clauses1: List[Clause]
+    clauses2: List[Clause]
+    pairs: List[ClausePair]
+    timings: dict = field(default_factory=dict)
+    llm_calls: int = 0
+    llm_skipped: int = 0
+
+    def merged(self) -> str:
+        """
+        One bullet list: per-clause LLM findings (or the local diff when the LLM was
+        skipped), then clauses present in only one document.
+        """
+        lines = []
+        for pair in self.pairs:
+            if pair.status == "changed":
+                if pair.analysis:
+                    lines.append(f"- {pair.title}:\n{_indent(pair.analysis.strip())}")
+                else:
+                    edits = "; ".join(f"'{c['doc1']}' -> '{c['doc2']}'" for c in pair.changes[:5])
+                    lines.append(f"- {pair.title}: changed ({edits})")
+            elif pair.status == "removed":
+                lines.append(f"- Only in doc1: {pair.title}")
+            elif pair.status == "added":
+                lines.append(f"- Only in doc2: {pair.title}")
+        return "\n".join(lines) or "No differences found."
+
+    def to_dict(self) -> dict:
+        counts = {status: 0 for status in ("identical", "changed", "removed", "added")}
+        for pair in self.pairs:
+            counts[pair.status] += 1
+        return {
+            "comparison": self.merged(),
+            "summary": {"clauses_doc1": len(self.clauses1), "clauses_doc2": len(self.clauses2), **counts,
+                        "llm_calls": self.llm_calls, "llm_skipped": self.llm_skipped},
+            "clauses": [p.to_dict() for p in self.pairs],
+            "timings": self.timings,
+        }
+
+
+def _indent(text: str) -> str:
+    return "\n".join(f"  {line}" for line in text.splitlines())
+
+
+# -----------------------------
+# Segmentation
+# -----------------------------
+def segment_clauses(text: str, max_chars: int = None) -> List[Clause]:
+    """
+    Split a contract into clauses at its headings (segmenter.segment_text); sections
+    longer than max_chars are split further at paragraph / sentence boundaries. Each
+    clause is labelled with the rule clauses (app/core/rules) whose keywords it contains.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    max_chars = max_chars or config.COMPARE_MAX_CLAUSE_CHARS
+    splitter = RecursiveCharacterTextSplitter(chunk_size=max_chars, chunk_overlap=0, add_start_index=True)
+    clauses = []
+    for section in segment_text(text).sections:
+        body = text[section.start:section.end]
+        if not body.strip():
+            continue
+        if len(body) <= max_chars:
+            pieces = [(section.title, body.strip(), section.start)]
+        else:
+            pieces = [
+                (f"{section.title} (part {n})", chunk.page_content, section.start + chunk.metadata["start_index"])
+                for n, chunk in enumerate(splitter.create_documents([body]), start=1)
+            ]
+        for title, piece, start in pieces:
+            clauses.append(Clause(len(clauses), title, piece, start))
+
+    # Label clauses from one keyword scan of the whole document
+    _, matcher, _ = rules_registry.combined()
+    starts = [c.start for c in clauses]
+    labels = [set() for _ in clauses]
+    hits = matcher.clause_hits(matcher.scan_keywords(text.lower(), MAX_KEYWORD_HITS), MAX_KEYWORD_HITS)
+    for (_, clause_name), found in hits.items():
+        for hit in found:
+            i = bisect_right(starts, hit["offset"]) - 1
+            if i >= 0:
+                labels[i].add(clause_name)
+    for clause, names in zip(clauses, labels):
+        clause.labels = sorted(names)
+    return clauses
+
+
+# -----------------------------
+# Alignment and local diff
+# -----------------------------
+def align_clauses(clauses1: Sequence[Clause], clauses2: Sequence[Clause],
+                  embed: Callable[[List[str]], np.ndarray], min_similarity: float = None) -> List[ClausePair]:
+    """
+    Pair clauses across the documents. Identical text (ignoring whitespace, case and
+    the clause number) is paired first without embedding; the rest are matched
+    greedily by cosine similarity of their embeddings, adjusted by rule-label
+    agreement, down to min_similarity.
+    Unpaired clauses come back as "removed" (doc1 only) / "added" (doc2 only).
+    Pairs are returned in doc1 order, with added clauses after their doc2 neighbour.
+    """
+    min_similarity = config.COMPARE_MIN_SIMILARITY if min_similarity is None else min_similarity
+    match = {}  # doc1 index -> (doc2 index, similarity)
+    by_text = {}
+    for c in clauses2:
+        by_text.setdefault(c.normalized, []).append(c.index)
+    for c in clauses1:
+        candidates = by_text.get(c.normalized)
+        if candidates:
+            match[c.index] = (candidates.pop(0), 1.0)
+
+    used2 = {j for j, _ in match.values()}
+    rest1 = [c for c in clauses1 if c.index not in match]
+    rest2 = [c for c in clauses2 if c.index not in used2]
+    if rest1 and rest2:
+        vectors = embed([f"{c.title}\n{c.text}" for c in rest1 + rest2])
+        sims = vectors[:len(rest1)] @ vectors[len(rest1):].T
+        for a, c1 in enumerate(rest1):
+            for b, c2 in enumerate(rest2):
+                if c1.labels and c2.labels:
+                    sims[a, b] += LABEL_BONUS if set(c1.labels) & set(c2.labels) else -LABEL_BONUS
+        taken1, taken2 = set(), set()
+        for flat in np.argsort(-sims, axis=None):
+            a, b = divmod(int(flat), len(rest2))
+            if sims[a, b] < min_similarity:
+                break
+            if a in taken1 or b in taken2:
+                continue
+            taken1.add(a)
+            taken2.add(b)
+            match[rest1[a].index] = (rest2[b].index, float(min(sims[a, b], 1.0)))
+
+    pairs, matched2 = [], {j for j, _ in match.values()}
+    added_after = {}  # doc1 position to insert each added clause after
+    last1 = -1
+    doc1_of = {j: i for i, (j, _) in match.items()}
+    for c in clauses2:
+        if c.index in doc1_of:
+            last1 = doc1_of[c.index]
+        else:
+            added_after.setdefault(last1, []).append(c)
+    for c in added_after.get(-1, []):
+        pairs.append(ClausePair("added", doc2=c))
+    for c in clauses1:
+        if c.index in match:
+            j, sim = match[c.index]
+            pairs.append(diff_pair(c, clauses2[j], sim))
+        else:
+            pairs.append(ClausePair("removed", doc1=c))
+        for added in added_after.get(c.index, []):
+            pairs.append(ClausePair("added", doc2=added))
+    return pairs
+
+
+def diff_pair(c1: Clause, c2: Clause, similarity: float) -> ClausePair:
+    """
+    Word-level diff of two aligned clauses; "identical" when the words are equal
+    (ignoring case and the leading clause number).
+    """
+    words1, words2 = _WORD_RE.findall(c1.body), _WORD_RE.findall(c2.body)
+    if [w.lower() for w in words1] == [w.lower() for w in words2]:
+        return ClausePair("identical", c1, c2, 1.0)
+    changes = []
+    matcher = difflib.SequenceMatcher(None, words1, words2, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op != "equal":
+            changes.append({"op": op, "doc1": " ".join(words1[i1:i2]), "doc2": " ".join(words2[j1:j2])})
+            if len(changes) >= MAX_CHANGES_PER_PAIR:
+                break
+    return ClausePair("changed", c1, c2, similarity, changes)
+
+
+# -----------------------------
+# Map-reduce over the LLM
+# -----------------------------
+def pair_prompt(pair: ClausePair, max_tokens: int = None) -> str:
+    max_tokens = max_tokens or config.COMPARE_CLAUSE_TOKENS
+    return PAIR_PROMPT.format(
+        title1=pair.doc1.title, text1=token_counter.truncate(pair.doc1.text, max_tokens),
+        title2=pair.doc2.title, text2=token_counter.truncate(pair.doc2.text, max_tokens),
+    )
+
+
+async def explain_changes(comparison: Comparison, llm: Callable[[str], Awaitable[str]],
+                          max_pairs: int = None, max_parallel: int = None):
+    """
+    Ask the LLM about each changed pair (least similar first, up to max_pairs), at most
+    max_parallel prompts in flight. A failed pair keeps its local diff and an error.
+    """
+    max_pairs = config.COMPARE_MAX_LLM_PAIRS if max_pairs is None else max_pairs
+    slots = asyncio.Semaphore(max_parallel or config.COMPARE_MAX_PARALLEL)
+    changed = sorted((p for p in comparison.pairs if p.status == "changed"), key=lambda p: p.similarity)
+    selected, comparison.llm_skipped = changed[:max_pairs], max(len(changed) - max_pairs, 0)
+
+    async def _explain(pair: ClausePair):
+        async with slots:
+            try:
+                pair.analysis = await llm(pair_prompt(pair))
+            except Exception as e:
+                LOG.warning("Clause comparison failed for %r: %s", pair.title, e)
+                pair.error = str(e)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_explain(p) for p in selected))
+    comparison.llm_calls = len(selected)
+    comparison.timings["llm_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def plan_comparison(text1: str, text2: str, embed: Callable[[List[str]], np.ndarray] = None) -> Comparison:
+    """
+    Segment, align and diff two documents locally (no LLM). `embed` maps texts to
+    L2-normalized vectors; defaults to the shared embedding model (with its cache).
+    """
+    if embed is None:
+        from app.core.registry import registry
+
+        model = registry.get_embedding_model()
+        embed = lambda texts: model.embed_array(texts, use_cache=True)  # noqa: E731
+    start = time.perf_counter()
+    clauses1, clauses2 = segment_clauses(text1), segment_clauses(text2)
+    segmented = time.perf_counter()
+    pairs = align_clauses(clauses1, clauses2, embed)
+    return Comparison(clauses1, clauses2, pairs, timings={
+        "segment_ms": round((segmented - start) * 1000, 1),
+        "align_ms": round((time.perf_counter() - segmented) * 1000, 1),
+    })
@@ -0,0 +1,122 @@
+# backend/app/core/config.py
+# Runtime settings, read once from INTELLIDOC_* environment variables.
+import os
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(f"INTELLIDOC_{name}", default))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(f"INTELLIDOC_{name}", default))
+
+
+def _str(name: str, default: str) -> str:
+    return os.getenv(f"INTELLIDOC_{name}", default)
+
+
+# Embedding micro-batching
+EMBED_MAX_BATCH = _int("EMBED_MAX_BATCH", 64)
+EMBED_MAX_WAIT_MS = _float("EMBED_MAX_WAIT_MS", 5.0)
+EMBED_DEVICE = _str("EMBED_DEVICE", "") or None
+
+# Persistent embedding cache ("" disables it)
+EMBED_CACHE_DIR = _str("EMBED_CACHE_DIR", "embedding_cache")
+EMBED_CACHE_MAX_ENTRIES = _int("EMBED_CACHE_MAX_ENTRIES", 200_000)
+
+# Background ingestion (upload / legal-check indexing)
+INGEST_WORKERS = _int("INGEST_WORKERS", 2)
+INGEST_MAX_QUEUED = _int("INGEST_MAX_QUEUED", 16)
+INGEST_PARSE_PROCESSES = _int("INGEST_PARSE_PROCESSES", 0)  # 0 = parse in the worker threads
+
+# Page-level OCR
+OCR_DPI = _int("OCR_DPI", 200)
+OCR_WORKERS = _int("OCR_WORKERS", os.cpu_count() or 1)
+OCR_MIN_CHARS = _int("OCR_MIN_CHARS", 10)  # pages with less extractable text are OCR'd
+
+# Chunking: "structure" (clauses / headings / defined terms, about CHUNK_TOKENS tokens,
+# CHUNK_OVERLAP_TOKENS only where a long clause is split) or "recursive" (the character
+# splitter, CHUNK_SIZE / CHUNK_OVERLAP chars). Changing it changes chunk ids: re-index.
+CHUNK_STRATEGY = _str("CHUNK_STRATEGY", "structure")
+CHUNK_TOKENS = _int("CHUNK_TOKENS", 200)  # the default embedding model reads 256 word pieces
+CHUNK_OVERLAP_TOKENS = _int("CHUNK_OVERLAP_TOKENS", 20)
+CHUNK_SIZE = _int("CHUNK_SIZE", 1000)
+CHUNK_OVERLAP = _int("CHUNK_OVERLAP", 200)
+
+# Vector index backend: "chroma" (SQLite + HNSW) or "local" (memory-mapped float32 matrix
+# searched in NumPy; LOCAL_INDEX_SEARCH "exact" or "ivf", the latter used from
+# LOCAL_IVF_MIN_ROWS chunks). Switching backends needs a re-index.
+VECTOR_BACKEND = _str("VECTOR_BACKEND", "chroma")
+LOCAL_INDEX_SEARCH = _str("LOCAL_INDEX_SEARCH", "exact")
+LOCAL_IVF_MIN_ROWS = _int("LOCAL_IVF_MIN_ROWS", 50_000)
+LOCAL_IVF_NPROBE = _int("LOCAL_IVF_NPROBE", 16)  # inverted lists scanned per query
+# What the local index scans: "float32" (the vectors), "int8" (scalar-quantized codes,
+# 1 byte/dim) or "binary" (sign bits, 1 bit/dim). Coded scans keep the best
+# k * LOCAL_RESCORE_FACTOR rows and rescore them with their float32 vectors.
+LOCAL_INDEX_CODES = _str("LOCAL_INDEX_CODES", "float32")
+LOCAL_RESCORE_FACTOR = _int("LOCAL_RESCORE_FACTOR", 40)
+
+# Tenants: requests name a tenant in the X-Tenant header; each tenant gets its own
+# collection (vector index, manifest, BM25 index) under TENANTS_DIR/<tenant>, the default
+# tenant keeps the original chroma_db. A collection is created by POST /admin/tenants/<tenant>;
+# every route answers 404 for a tenant without one.
+DEFAULT_TENANT = _str("DEFAULT_TENANT", "default")
+TENANTS_DIR = _str("TENANTS_DIR", "tenants")
+# Per-document sub-indexes: vectors of recently queried documents kept in memory so
+# source-filtered questions scan only that document. One budget for every tenant in the
+# process (0 disables).
+DOC_INDEX_CACHE_MB = _int("DOC_INDEX_CACHE_MB", 256)
+
+# Chunks embedded and written to the vectorstore per batch during ingestion
+INDEX_BATCH_SIZE = _int("INDEX_BATCH_SIZE", 256)
+
+# Upload spooling
+UPLOAD_MAX_MB = _int("UPLOAD_MAX_MB", 300)
+UPLOAD_CHUNK_KB = _int("UPLOAD_CHUNK_KB", 1024)
+SPOOL_DIR = _str("SPOOL_DIR", "") or None  # default: system temp dir
+
+# Batch legal check (/legal/batch)
+BATCH_PROCESSES = _int("BATCH_PROCESSES", os.cpu_count() or 1)  # 0 = thread pool, no processes
+BATCH_MAX_FILES = _int("BATCH_MAX_FILES", 500)
+BATCH_MAX_TOTAL_MB = _int("BATCH_MAX_TOTAL_MB", 2048)  # all files of a batch, zip members decompressed
+
+# Hybrid retrieval: candidates taken from each of the dense and BM25 rankings before fusion
+RETRIEVAL_FETCH_K = _int("RETRIEVAL_FETCH_K", 20)
+RRF_K = _int("RRF_K", 60)
+
+# Cross-encoder reranking
+RERANK_K = _int("RERANK_K", 10)  # fused candidates cross-encoded per question
+RERANK_MAX_BATCH = _int("RERANK_MAX_BATCH", 32)
+RERANK_MAX_WAIT_MS = _float("RERANK_MAX_WAIT_MS", 5.0)
+RERANK_CACHE_SIZE = _int("RERANK_CACHE_SIZE", 50_000)  # (question, chunk) scores kept
+RERANK_MAX_CHARS = _int("RERANK_MAX_CHARS", 2000)
+
+# Answer cache for /query/ask (0 entries disables it). Similarity 0 reuses answers to the
+# same (normalized) question only; a cosine threshold such as 0.95 also reuses them for
+# near-identical wordings, but questions differing only in a clause number, party or date
+# can embed above it, so semantic reuse is opt-in.
+ANSWER_CACHE_SIZE = _int("ANSWER_CACHE_SIZE", 1000)
+ANSWER_CACHE_TTL_S = _float("ANSWER_CACHE_TTL_S", 3600.0)
+ANSWER_CACHE_SIMILARITY = _float("ANSWER_CACHE_SIMILARITY", 0.0)  # cosine between question embeddings
+
+# LLM (Ollama /api/generate)
+LLM_BASE_URL = _str("LLM_BASE_URL", "http://localhost:11434")
+LLM_MODEL = _str("LLM_MODEL", "llama3:8b")
+LLM_TEMPERATURE = _float("LLM_TEMPERATURE", 0.0)
+LLM_MAX_CONCURRENCY = _int("LLM_MAX_CONCURRENCY", 2)  # generations in flight against the server
+LLM_MAX_QUEUED = _int("LLM_MAX_QUEUED", 32)  # further callers are rejected (429)
+LLM_TIMEOUT_S = _float("LLM_TIMEOUT_S", 120.0)
+LLM_CONNECT_TIMEOUT_S = _float("LLM_CONNECT_TIMEOUT_S", 5.0)
+LLM_RETRIES = _int("LLM_RETRIES", 2)  # on connection errors and 5xx
+
+# QA prompt context: token budget for retrieved chunks, counted with LLM_TOKENIZER
+# (a tokenizer.json path or Hugging Face repo id; "" = fast estimate)
+QA_CONTEXT_TOKENS = _int("QA_CONTEXT_TOKENS", 1536)
+LLM_TOKENIZER = _str("LLM_TOKENIZER", "")
+
+# Clause-aligned document comparison (/compare)
+COMPARE_MAX_CLAUSE_CHARS = _int("COMPARE_MAX_CLAUSE_CHARS", 3000)  # longer sections are split
+COMPARE_MIN_SIMILARITY = _float("COMPARE_MIN_SIMILARITY", 0.6)  # below this clauses stay unpaired
+COMPARE_MAX_LLM_PAIRS = _int("COMPARE_MAX_LLM_PAIRS", 50)  # changed pairs sent to the LLM
+COMPARE_MAX_PARALLEL = _int("COMPARE_MAX_PARALLEL", 4)
+COMPARE_CLAUSE_TOKENS = _int("COMPARE_CLAUSE_TOKENS", 700)  # per clause in a pair prompt
@@ -0,0 +1,215 @@
+# backend/app/core/context.py
+import hashlib
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from app.core import config
+
+# Optional dependency (exact token counts for the configured LLM tokenizer)
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+LOG = logging.getLogger("intellidoc.context")
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+# One match per estimated token: each punctuation mark and each 5-char run of a word
+_TOKEN_RE = re.compile(r"\w{1,5}|[^\w\s]")
+_WS = re.compile(r"\s+")
+
+# Overlap left after trimming a chunk against already-packed text must be at least this
+# long (chars) to be kept; shorter leftovers are dropped as duplicates.
+MIN_NEW_CHARS = 80
+
+
+class TokenCounter:
+    """
+    Token counts for prompt budgeting. With INTELLIDOC_LLM_TOKENIZER set (a
+    tokenizer.json path or a Hugging Face repo id) the fast `tokenizers` library gives
+    exact counts for the model; otherwise an estimate is used: one token per
+    punctuation mark and per ~5 characters of each word, which runs slightly over
+    Llama-style BPE counts on English contract text, so the budget is not overrun.
+    """
+
+    def __init__(self, tokenizer: str = None):
+        self.tokenizer_name = config.LLM_TOKENIZER if tokenizer is None else tokenizer
+        self._tokenizer = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._loaded:
+            return self._tokenizer
+        with self._lock:
+            if not self._loaded and self.tokenizer_name and Tokenizer is not None:
+                try:
+                    if os.path.exists(self.tokenizer_name):
+                        self._tokenizer = Tokenizer.from_file(self.tokenizer_name)
+                    else:
+                        self._tokenizer = Tokenizer.from_pretrained(self.tokenizer_name)
+                except Exception:
+                    LOG.warning("Could not load tokenizer %s; estimating token counts", self.tokenizer_name)
+            self._loaded = True
+        return self._tokenizer
+
+    @property
+    def kind(self) -> str:
+        return self.tokenizer_name if self._get() is not None else "estimate"
+
+    def count(self, text: str) -> int:
+        tokenizer = self._get()
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False).ids)
+        return self.count_span(text, 0, len(text))
+
+    def count_span(self, text: str, start: int, end: int) -> int:
+        """
+        count(text[start:end]); the estimate scans the span in place without slicing.
+        """
+        tokenizer = self._get()
+        if tokenizer is not None:
+            return len(tokenizer.encode(text[start:end], add_special_tokens=False).ids)
+        return len(_TOKEN_RE.findall(text, start, end))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        The longest prefix of `text` within max_tokens (cut at a token boundary).
+        """
+        if max_tokens <= 0:
+            return ""
+        tokenizer = self._get()
+        if tokenizer is not None:
+            offsets = tokenizer.encode(text, add_special_tokens=False).offsets
+            return text if len(offsets) <= max_tokens else text[:offsets[max_tokens - 1][1]]
+        used = 0
+        for m in _PIECE_RE.finditer(text):
+            used += max(1, (len(m.group()) + 4) // 5)
+            if used > max_tokens:
+                return text[:m.start()].rstrip()
+        return text
+
+
+token_counter = TokenCounter()
+
+
+@dataclass
+class ContextPack:
+    """
+    Chunks chosen for a prompt: `docs` in the order given, `texts` their labelled (and
+    de-overlapped) context strings, `tokens` what those strings cost.
+    """
+
+    docs: List[Document] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    tokens: int = 0
+    budget: int = 0
+    duplicates: int = 0
+    over_budget: int = 0
+    truncated: bool = False
+
+    def sources(self) -> List[dict]:
+        """
+        Metadata per packed chunk, with the chunk id and the number the prompt cites it by.
+        """
+        return [{**d.metadata, "chunk_id": d.id, "chunk": i} for i, d in enumerate(self.docs, start=1)]
+
+    def usage(self, prompt_tokens: Optional[int] = None) -> dict:
+        usage = {"context_tokens": self.tokens, "context_budget": self.budget, "chunks": len(self.docs),
+                 "dropped_duplicate": self.duplicates, "dropped_over_budget": self.over_budget,
+                 "truncated": self.truncated, "tokenizer": token_counter.kind}
+        if prompt_tokens is not None:
+            usage["prompt_tokens"] = prompt_tokens
+        return usage
+
+
+def _label(doc: Document, n: int) -> str:
+    meta = doc.metadata
+    if "page" in meta:
+        return f"[{meta.get('source', 'document')}, page {meta['page']}, chunk {n}]"
+    return f"[{meta.get('source', 'document')}, chunk {n}]"
+
+
+def _new_spans(start: int, end: int, covered: List[tuple]) -> List[tuple]:
+    """
+    Parts of [start, end) not inside any (sorted, non-overlapping) covered interval.
+    """
+    spans, pos = [], start
+    for a, b in covered:
+        if b <= pos or a >= end:
+            continue
+        if a > pos:
+            spans.append((pos, a))
+        pos = max(pos, b)
+    if pos < end:
+        spans.append((pos, end))
+    return spans
+
+
+def _cover(covered: List[tuple], start: int, end: int) -> List[tuple]:
+    merged = []
+    for a, b in sorted(covered + [(start, end)]):
+        if merged and a <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+
+def build_context(docs: Sequence[Document], max_tokens: int = None, counter: TokenCounter = None) -> ContextPack:
+    """
+    Pack chunks, best first, into a token budget for the prompt context.
+
+    Chunks of the same source overlap (the splitter repeats up to chunk_overlap chars),
+    so each chunk is trimmed to the character ranges (by "start_index") not already
+    packed from that source; what is left under MIN_NEW_CHARS, and chunks whose text
+    was already packed verbatim, are dropped as duplicates. A chunk that does not fit
+    is skipped in favour of later, shorter ones; if not even the best chunk fits, it
+    is truncated to the budget so the prompt never goes out empty.
+    """
+    counter = counter or token_counter
+    budget = config.QA_CONTEXT_TOKENS if max_tokens is None else max_tokens
+    pack = ContextPack(budget=budget)
+    covered = {}  # source -> merged [start, end) ranges already packed
+    seen = set()
+
+    for doc in docs:
+        text = doc.page_content
+        digest = hashlib.sha1(_WS.sub(" ", text).strip().encode("utf-8")).digest()
+        if digest in seen:
+            pack.duplicates += 1
+            continue
+
+        source, start = doc.metadata.get("source"), doc.metadata.get("start_index")
+        if source is not None and isinstance(start, int):
+            spans = _new_spans(start, start + len(text), covered.get(source, []))
+            new_chars = sum(b - a for a, b in spans)
+            if new_chars < min(MIN_NEW_CHARS, len(text)):
+                pack.duplicates += 1
+                continue
+            if new_chars < len(text):
+                text = " … ".join(text[a - start:b - start].strip() for a, b in spans)
+
+        body = f"{_label(doc, len(pack.docs) + 1)}\n{text}"
+        tokens = counter.count(body)
+        if pack.tokens + tokens > budget:
+            if pack.docs:
+                pack.over_budget += 1
+                continue
+            body = counter.truncate(body, budget)
+            tokens = counter.count(body)
+            pack.truncated = True
+
+        seen.add(digest)
+        if source is not None and isinstance(start, int):
+            covered[source] = _cover(covered.get(source, []), start, start + len(doc.page_content))
+        pack.docs.append(doc)
+        pack.texts.append(body)
+        pack.tokens += tokens
+    return pack
@@ -1,27 +1,44 @@
 # app/core/delete.py
-from app.core.vectorstore import load_existing_chroma, create_or_load_chroma
-from langchain_core.documents import Document
-import shutil, os
+import argparse
+import logging
+
+from app.core.registry import registry
+from app.core.vectorstore import delete_source_vectors, source_lock
+
+LOG = logging.getLogger("intellidoc.delete")
 
 VECTORSTORE_DIR = "chroma_db"
-FILE_TO_DELETE = "Signed Offer letter_Ola Electric.pdf"
 
-# Load existing Chroma
-vectorstore = load_existing_chroma(persist_dir=VECTORSTORE_DIR)
 
-# Get all documents except the one to delete
-all_docs = []
-collection_data = vectorstore._collection.get()
-for metadata in collection_data["metadatas"]:
-    if metadata.get("source") != FILE_TO_DELETE:
-        # Recreate Document object (keep metadata; content can be empty)
-        all_docs.append(Document(page_content="", metadata=metadata))
+def delete_document(source: str, persist_dir: str = VECTORSTORE_DIR):
+    """
+    Remove one document's vectors and manifest entry, leaving every other document untouched.
+    Returns None if the source is not indexed.
+    """
+    manifest = registry.get_manifest(persist_dir)
+    with source_lock(source, persist_dir):
+        entry = manifest.get(source)
+        deleted = delete_source_vectors(source, persist_dir, entry["chunk_ids"] if entry else None)
+        if entry is None and deleted == 0:
+            return None
+        manifest.remove(source)
+    LOG.info("Deleted %d chunks of %s", deleted, source)
+    return {"source": source, "deleted_chunks": deleted}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete one document's embeddings from the Chroma vectorstore.")
+    parser.add_argument("source", help="document name as indexed, e.g. 'contract_1.pdf'")
+    parser.add_argument("--persist-dir", default=VECTORSTORE_DIR)
+    args = parser.parse_args()
 
-# Delete the entire Chroma folder
-shutil.rmtree(VECTORSTORE_DIR, ignore_errors=True)
-os.makedirs(VECTORSTORE_DIR, exist_ok=True)
+    result = delete_document(args.source, persist_dir=args.persist_dir)
+    registry.close()
+    if result is None:
+        print(f"'{args.source}' is not indexed in {args.persist_dir}.")
+        raise SystemExit(1)
+    print(f"Deleted {result['deleted_chunks']} embeddings for '{args.source}' from Chroma vectorstore.")
 
-# Recreate Chroma without the deleted file
-create_or_load_chroma(all_docs, persist_dir=VECTORSTORE_DIR)
 
-print(f"Deleted embeddings for '{FILE_TO_DELETE}' from Chroma vectorstore.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# backend/app/core/doc_index.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.core import config
+
+LOG = logging.getLogger("intellidoc.doc_index")
+
+# Oversized documents remembered (so they are not rebuilt per query), per process
+MAX_OVERSIZED = 10_000
+
+
+class DocumentIndexes:
+    """
+    Per-document sub-indexes: for a (persist_dir, source), its chunks and their float32
+    vectors held in memory, so a single-document question is an exact scan of that
+    document's rows instead of a filtered search of the whole collection (whose cost
+    grows with the corpus in Chroma).
+
+    A sub-index is built on first use from the manifest's chunk ids, two lookups by id
+    that do not grow with the corpus either. Entries are keyed on the manifest (object
+    and version) of their source, so a re-indexed or deleted document, or a reopened
+    collection, is never served from a stale copy.
+
+    One least-recently-used budget of max_mb covers every collection (tenant) in the
+    process. A document whose sub-index alone exceeds it is remembered as oversized and
+    left to the filtered search of its collection until it changes.
+    """
+
+    def __init__(self, max_mb: int = None):
+        self.max_bytes = (config.DOC_INDEX_CACHE_MB if max_mb is None else max_mb) * 1024 * 1024
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (persist_dir, source) -> (manifest, version, chunks, matrix, bytes)
+        self._oversized = OrderedDict()  # (persist_dir, source) -> (manifest, version)
+        self._bytes = 0
+        self._stats = {"hits": 0, "builds": 0, "build_seconds": 0.0, "evictions": 0, "oversized": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def search(self, persist_dir: str, store, manifest, source: str, embedding, k: int) -> Optional[List[Document]]:
+        """
+        Top-k chunks of `source` in persist_dir's `store` by inner product with
+        `embedding`, or None when the source has no sub-index (caching disabled, not in
+        the manifest, or too large for the budget): the caller then falls back to a
+        filtered search of the collection.
+        """
+        if not self.enabled:
+            return None
+        entry = self._entry(persist_dir, store, manifest, source)
+        if entry is None:
+            return None
+        docs, matrix = entry
+        if not docs:
+            return []
+        scores = matrix @ np.asarray(embedding, dtype=np.float32)
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best], kind="stable")]
+        else:
+            best = np.argsort(-scores, kind="stable")
+        return [docs[i] for i in best.tolist()]
+
+    def _entry(self, persist_dir: str, store, manifest, source: str):
+        key = (persist_dir, source)
+        # Version first: vectors read while the source is being replaced end up under
+        # the old version and are rebuilt on the next lookup
+        version = manifest.version(source)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] is manifest and cached[1] == version:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return cached[2:4]
+            if self._oversized.get(key) == (manifest, version):
+                return None
+
+        record = manifest.get(source)
+        if record is None:
+            return None
+        start = time.perf_counter()
+        ids, matrix = store.get_vectors(record["chunk_ids"])
+        found = {d.id: d for d in store.get(ids)}
+        keep = [i for i, cid in enumerate(ids) if cid in found]
+        docs, matrix = [found[ids[i]] for i in keep], matrix[keep]
+        size = matrix.nbytes + sum(len(d.page_content) for d in docs)
+        with self._lock:
+            self._stats["builds"] += 1
+            self._stats["build_seconds"] += time.perf_counter() - start
+            LOG.debug("Built the sub-index of %s in %s (%d chunks)", source, persist_dir, len(docs))
+            self._drop(key)
+            if size <= self.max_bytes:
+                self._oversized.pop(key, None)
+                self._entries[key] = (manifest, version, docs, matrix, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+                    self._stats["evictions"] += 1
+            else:
+                LOG.info("Sub-index of %s in %s exceeds the cache (%.1f MB); using filtered search",
+                         source, persist_dir, size / (1024 * 1024))
+                self._stats["oversized"] += 1
+                self._oversized[key] = (manifest, version)
+                self._oversized.move_to_end(key)
+                if len(self._oversized) > MAX_OVERSIZED:
+                    self._oversized.popitem(last=False)
+        return docs, matrix
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[4]
+
+    def clear(self, persist_dir: str = None):
+        """
+        Drop the sub-indexes of persist_dir's collection, or of every collection.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if persist_dir is None or key[0] == persist_dir]:
+                self._drop(key)
+            for key in [key for key in self._oversized if persist_dir is None or key[0] == persist_dir]:
+                del self._oversized[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"documents": len(self._entries), "mb": round(self._bytes / (1024 * 1024), 1),
+                    "max_mb": round(self.max_bytes / (1024 * 1024), 1),
+                    **self._stats, "build_seconds": round(self._stats["build_seconds"], 3)}
+
+
+# Shared by every collection in the process
+doc_indexes = DocumentIndexes()
@@ -0,0 +1,193 @@
+# backend/app/core/embedding_cache.py
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+import numpy as np
+
+LOG = logging.getLogger("intellidoc.embedding_cache")
+
+_WS = re.compile(r"\s+")
+KEY_BYTES = 16
+_EMPTY_KEY = bytes(KEY_BYTES)
+# Slots the files start with; they double on demand up to max_entries
+INITIAL_SLOTS = 1024
+
+
+def normalize_text(text: str) -> str:
+    """
+    Whitespace-normalize chunk text so re-extracted copies of a clause hash the same.
+    """
+    return _WS.sub(" ", text).strip()
+
+
+def text_key(model_name: str, text: str) -> bytes:
+    h = hashlib.blake2b(digest_size=KEY_BYTES)
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_text(text).encode("utf-8"))
+    digest = h.digest()
+    # All-zero marks an empty slot; remap the (practically impossible) zero digest
+    return digest if digest != _EMPTY_KEY else b"\x01" + digest[1:]
+
+
+class EmbeddingCache:
+    """
+    Persistent, size-bounded cache of embeddings keyed by (model name, normalized text hash).
+
+    Layout in `cache_dir`:
+      vectors.f32  - memory-mapped float32 matrix, one row per slot
+      keys.bin     - memory-mapped 16-byte hash per slot (all-zero = empty)
+      meta.json    - model name, dimension and capacity (max_entries)
+
+    Both files start with INITIAL_SLOTS slots and double as entries are added, up to
+    the capacity. A reused slot's key is cleared and flushed before its vector is
+    rewritten, and keys are set only after the new vectors are flushed, so a crash never
+    leaves a key pointing at another text's vector. Eviction is least-recently-used;
+    after a restart the recency order starts out in slot order.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, dim: int, max_entries: int = 200_000):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.dim = dim
+        self.capacity = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._open()
+
+    def _open(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path = os.path.join(self.cache_dir, "meta.json")
+        vec_path = os.path.join(self.cache_dir, "vectors.f32")
+        key_path = os.path.join(self.cache_dir, "keys.bin")
+        meta = {"model_name": self.model_name, "dim": self.dim, "capacity": self.capacity}
+
+        reuse = False
+        if os.path.exists(meta_path) and os.path.exists(vec_path) and os.path.exists(key_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                reuse = json.load(f) == meta
+            if not reuse:
+                LOG.info("Embedding cache layout changed, recreating %s", self.cache_dir)
+
+        self._vec_path, self._key_path = vec_path, key_path
+        if not reuse:
+            for path in (vec_path, key_path):
+                open(path, "wb").close()
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        slots = os.path.getsize(key_path) // KEY_BYTES
+        self._map(min(max(slots, INITIAL_SLOTS), self.capacity))
+
+        # In-memory index: key -> slot, ordered from least to most recently used
+        self._index = OrderedDict()
+        self._free = []
+        for slot, key in enumerate(self._keys.tolist()):
+            if key == _EMPTY_KEY:
+                self._free.append(slot)
+            else:
+                self._index[key] = slot
+        self._free.reverse()
+
+    def _map(self, slots: int):
+        """
+        (Re)map both files with `slots` slots, extending them (sparsely) if needed.
+        """
+        for path, width in ((self._vec_path, self.dim * 4), (self._key_path, KEY_BYTES)):
+            if os.path.getsize(path) < slots * width:
+                with open(path, "ab") as f:
+                    f.truncate(slots * width)
+        self._vectors = np.memmap(self._vec_path, dtype=np.float32, mode="r+", shape=(slots, self.dim))
+        self._keys = np.memmap(self._key_path, dtype=f"V{KEY_BYTES}", mode="r+", shape=(slots,))
+        self._slots = slots
+
+    def _grow(self):
+        old = self._slots
+        self._vectors.flush()
+        self._keys.flush()
+        self._map(min(self.capacity, old * 2))
+        self._free.extend(range(self._slots - 1, old - 1, -1))
+
+    # -----------------------------
+    # Lookup / insert
+    # -----------------------------
+    def get_many(self, texts: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        Return (vectors, missing): rows for cached texts are filled in, and `missing`
+        lists the positions whose rows still need to be computed.
+        """
+        keys = [text_key(self.model_name, t) for t in texts]
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                slot = self._index.get(key)
+                if slot is None:
+                    missing.append(i)
+                    continue
+                self._index.move_to_end(key)
+                out[i] = self._vectors[slot]
+            self._stats["hits"] += len(texts) - len(missing)
+            self._stats["misses"] += len(missing)
+        return out, missing
+
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        with self._lock:
+            written, reused = [], False
+            for text, vec in zip(texts, vectors):
+                key = text_key(self.model_name, text)
+                if key in self._index:
+                    self._index.move_to_end(key)
+                    continue
+                if not self._free and self._slots < self.capacity:
+                    self._grow()
+                if self._free:
+                    slot = self._free.pop()
+                else:
+                    _, slot = self._index.popitem(last=False)
+                    self._stats["evictions"] += 1
+                    self._keys[slot] = _EMPTY_KEY
+                    reused = True
+                self._index[key] = slot
+                written.append((slot, key, vec))
+            if not written:
+                return
+            if reused:
+                self._keys.flush()  # evicted keys are gone before their vectors change
+            for slot, _, vec in written:
+                self._vectors[slot] = vec
+            self._vectors.flush()
+            for slot, key, _ in written:
+                self._keys[slot] = key
+
+    def flush(self):
+        with self._lock:
+            self._vectors.flush()
+            self._keys.flush()
+
+    def clear(self):
+        with self._lock:
+            self._keys[:] = _EMPTY_KEY
+            self._index.clear()
+            self._free = list(range(self._slots - 1, -1, -1))
+            self._keys.flush()
+
+    def close(self):
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._index),
+                "capacity": self.capacity,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "slots": self._slots,
+                "disk_mb": round(self._slots * (self.dim * 4 + KEY_BYTES) / (1024 * 1024), 1),
+            }
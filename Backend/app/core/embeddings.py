@@ -1,9 +1,110 @@
 # backend/app/core/embeddings.py
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import os
+import re
+from typing import List
 
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
 
-def get_embedding_model(model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+from app.core import config
+from app.core.batching import MicroBatcher
+from app.core.embedding_cache import EmbeddingCache
+
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings backed by one SentenceTransformer and a micro-batcher.
+
+    Texts from concurrent callers (uploads, legal checks, queries) are merged into
+    shared forward passes; vectors come back L2-normalized as float32 NumPy rows.
+    Document texts are looked up in the optional EmbeddingCache before the model runs.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, max_batch: int = None,
+                 max_wait_ms: float = None, device: str = None, cache_dir: str = None):
+        self.model_name = model_name
+        self.max_batch = max_batch or config.EMBED_MAX_BATCH
+        self.model = SentenceTransformer(model_name, device=device or config.EMBED_DEVICE)
+        # Renamed to get_embedding_dimension() in newer sentence-transformers
+        get_dim = getattr(self.model, "get_embedding_dimension", None) or self.model.get_sentence_embedding_dimension
+        self.dim = get_dim()
+        self.batcher = MicroBatcher(
+            self._encode,
+            max_batch=self.max_batch,
+            max_wait_ms=config.EMBED_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms,
+            name=f"embed:{model_name}",
+        ).start()
+        self.cache = None
+        if cache_dir:
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name).strip("_")
+            self.cache = EmbeddingCache(
+                os.path.join(cache_dir, slug), model_name, self.dim, config.EMBED_CACHE_MAX_ENTRIES
+            )
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=self.max_batch,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        ).astype(np.float32, copy=False)
+
+    def embed_array(self, texts: List[str], use_cache: bool = False) -> np.ndarray:
+        """
+        Embed texts through the shared batcher and return a (len(texts), dim) float32 array.
+        Long inputs are split into max_batch slices so short queries can join in between.
+        With use_cache, only texts missing from the embedding cache reach the model.
+        """
+        if use_cache and self.cache is not None and texts:
+            out, missing = self.cache.get_many(texts)
+            if missing:
+                fresh = self.embed_array([texts[i] for i in missing])
+                out[missing] = fresh
+                self.cache.put_many([texts[i] for i in missing], fresh)
+            return out
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        futures = [
+            self.batcher.submit(texts[i:i + self.max_batch])
+            for i in range(0, len(texts), self.max_batch)
+        ]
+        return np.vstack([f.result() for f in futures])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(list(texts), use_cache=True).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+    def stats(self):
+        stats = {"batching": self.batcher.stats()}
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    def close(self):
+        self.batcher.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def load_embedding_model(model_name: str = DEFAULT_MODEL_NAME):
     """
-    Return a HuggingFaceEmbeddings instance (works locally with sentence-transformers).
+    Build a fresh BatchedEmbeddings instance (loads the model weights).
+    Prefer get_embedding_model(), which reuses the process-wide instance.
     """
-    return HuggingFaceEmbeddings(model_name=model_name)
+    return BatchedEmbeddings(model_name=model_name, cache_dir=config.EMBED_CACHE_DIR)
+
+
+def get_embedding_model(model_name: str = DEFAULT_MODEL_NAME):
+    """
+    Return the shared embedding model (works locally with sentence-transformers).
+    The model is loaded once per process and kept in the registry.
+    """
+    from app.core.registry import registry
+
+    return registry.get_embedding_model(model_name)
@@ -0,0 +1,132 @@
+# backend/app/core/ingest.py
+import logging
+
+from langchain_core.documents import Document
+
+from app.core.chunker import iter_chunks
+from app.core.legal_check import TypeDetector
+from app.core.parser import iter_pdf_pages
+from app.core.memory import current_rss_mb, peak_rss_mb
+from app.core.registry import registry
+from app.core.spool import hash_file
+from app.core.vectorstore import file_hash, index_document
+
+LOG = logging.getLogger("intellidoc.ingest")
+
+
+def _no_progress(stage: str, fraction: float):
+    pass
+
+
+def _parser_name(methods) -> str:
+    """
+    The parser used for a document's pages: one name, "a+b" when pages differed, or
+    None when unknown.
+    """
+    methods = set(methods)
+    if len(methods) <= 1:
+        return methods.pop() if methods else None
+    return "+".join(sorted(methods))
+
+
+def ingest_pdf(source: str, pdf, persist_dir: str = "chroma_db", content_hash: str = None,
+               progress=None, parse=None):
+    """
+    Parse, chunk and index one PDF (bytes or a file path) under `source`, replacing
+    any previous version. Returns {"status": "indexed" | "replaced" | "unchanged",
+    "num_chunks": int}, plus "parser", per-page "pages" timings and "memory" when
+    the PDF was parsed.
+
+    Pages stream from the parser through the chunker into the vectorstore, so memory
+    is bounded by a window of pages. `progress(stage, fraction)` is called as the
+    stages advance; `parse` overrides the streaming parser (the ingestion queue
+    passes its process-pool parser, which returns a list of pages). The document is
+    catalogued with its page count, parser and detected document type.
+    """
+    progress = progress or _no_progress
+    parse = parse or iter_pdf_pages
+    rss_before = current_rss_mb()
+
+    # Same file, same bytes: nothing to parse or embed
+    if content_hash is None:
+        content_hash = file_hash(pdf) if isinstance(pdf, bytes) else hash_file(pdf)
+    entry = registry.get_manifest(persist_dir).get(source)
+    if entry and entry["sha256"] == content_hash:
+        return {"status": "unchanged", "num_chunks": entry["num_chunks"]}
+
+    progress("parse", 0.05)
+    page_stats = []
+    detector = TypeDetector()
+    # RSS sampled once per page (after the previous pages were chunked and embedded): the
+    # peak of this upload, where the process high-water mark would report the largest
+    # upload since startup
+    rss_samples = [rss_before]
+
+    def pages():
+        for page in parse(pdf, ocr_if_needed=True):
+            page.metadata["source"] = source
+            page_stats.append({
+                "page": page.metadata["page"],
+                "method": page.metadata["parser"],
+                "seconds": page.metadata.pop("parse_seconds"),
+                "chars": len(page.page_content),
+            })
+            detector.feed(page.page_content)
+            progress("parse+embed", 0.05 + 0.9 * page.metadata["page"] / max(page.metadata["page_count"], 1))
+            rss_samples.append(current_rss_mb())
+            yield page
+
+    def details():
+        return {"page_count": len(page_stats), "parser": _parser_name(p["method"] for p in page_stats),
+                "doc_type": detector.document_type()}
+
+    result = index_document(source, content_hash, iter_chunks(pages()), persist_dir=persist_dir, details=details)
+
+    parser = _parser_name(p["method"] for p in page_stats)
+    rss_after = current_rss_mb()
+    sampled = [rss for rss in rss_samples + [rss_after] if rss is not None]
+    memory = {"rss_before_mb": rss_before, "rss_after_mb": rss_after,
+              "peak_rss_mb": max(sampled) if sampled else None, "process_peak_rss_mb": peak_rss_mb()}
+    return {**result, "parser": parser, "pages": page_stats, "memory": memory}
+
+
+def ingest_spooled(source: str, upload, persist_dir: str = "chroma_db", progress=None, parse=None):
+    """
+    ingest_pdf() for a SpooledUpload; the spool file is removed afterwards.
+    """
+    try:
+        return ingest_pdf(source, upload.path, persist_dir, content_hash=upload.sha256,
+                          progress=progress, parse=parse)
+    finally:
+        upload.cleanup()
+
+
+def index_pages(source: str, content_hash: str, pages: list, persist_dir: str = "chroma_db", progress=None,
+                document_type: str = None):
+    """
+    Chunk and index pages that were already parsed (the legal-check path). The
+    document type is detected from the pages unless the rule check already has it.
+    """
+    progress = progress or _no_progress
+    progress("chunk", 0.1)
+    docs = [
+        Document(
+            page_content=p.page_content,
+            metadata={**{k: v for k, v in p.metadata.items() if k != "parse_seconds"}, "source": source},
+        )
+        for p in pages
+    ]
+
+    def details():
+        doc_type = document_type
+        if doc_type is None:
+            detector = TypeDetector()
+            for p in pages:
+                detector.feed(p.page_content)
+            doc_type = detector.document_type()
+        parser = _parser_name(p.metadata["parser"] for p in pages if "parser" in p.metadata)
+        return {"page_count": len(pages), "parser": parser, "doc_type": doc_type}
+
+    progress("embed", 0.3)
+    return index_document(source, content_hash, iter_chunks(docs),
+                          persist_dir=persist_dir, details=details)
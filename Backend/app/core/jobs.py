@@ -0,0 +1,199 @@
+# backend/app/core/jobs.py
+import asyncio
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from app.core import config
+from app.core.parser import iter_pdf_pages, load_pdf_bytes
+
+LOG = logging.getLogger("intellidoc.jobs")
+
+_STOP = object()
+
+
+class QueueFull(Exception):
+    """Raised when the ingestion queue cannot take another job."""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    source: str
+    status: str = "queued"  # queued -> running -> done | failed
+    stage: str = "queued"
+    progress: float = 0.0
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    future: Future = field(default_factory=Future, repr=False, compare=False)  # result or exception
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "source": self.source,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "result": self.result,
+            "error": self.error,
+            "queued_seconds": round((self.started_at or time.time()) - self.created_at, 3),
+            "run_seconds": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None,
+        }
+
+
+class IngestionQueue:
+    """
+    Bounded job queue drained by a pool of worker threads.
+
+    Job functions receive `progress(stage, fraction)` as their `progress` keyword and
+    run parse / OCR / embed off the event loop. With `parse_processes` > 0, PDF parsing
+    and OCR go to a process pool so CPU-heavy documents do not hold the GIL.
+    """
+
+    def __init__(self, workers: int = None, max_queued: int = None, parse_processes: int = None,
+                 max_history: int = 1000):
+        self.workers = workers or config.INGEST_WORKERS
+        self.max_queued = max_queued or config.INGEST_MAX_QUEUED
+        self.parse_processes = config.INGEST_PARSE_PROCESSES if parse_processes is None else parse_processes
+        self.max_history = max_history
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._process_pool = None
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return self
+            if self.parse_processes > 0:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.parse_processes)
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, name=f"ingest-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        LOG.info("Ingestion queue started (%d workers, %d parse processes)", self.workers, self.parse_processes)
+        return self
+
+    def close(self, timeout: float = 30.0):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(_STOP)
+        for t in threads:
+            t.join(timeout)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(cancel_futures=True)
+            self._process_pool = None
+
+    # -----------------------------
+    # Jobs
+    # -----------------------------
+    def submit(self, kind: str, source: str, fn: Callable, *args, **kwargs) -> Job:
+        """
+        Queue fn(*args, progress=..., **kwargs). Raises QueueFull when the queue is at capacity.
+        """
+        if not self._threads:
+            self.start()
+        job = Job(id=uuid.uuid4().hex, kind=kind, source=source)
+        try:
+            self._queue.put_nowait((job, fn, args, kwargs))
+        except queue.Full:
+            raise QueueFull(f"Ingestion queue is full ({self.max_queued} jobs waiting)")
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim_history()
+        return job
+
+    async def run(self, kind: str, source: str, fn: Callable, *args, **kwargs):
+        """
+        Queue fn like submit() and wait for its result without holding a thread; the
+        job's exception is re-raised. QueueFull is raised at once when the queue is at
+        capacity, so synchronous routes get the same bound as background jobs.
+        """
+        job = self.submit(kind, source, fn, *args, **kwargs)
+        return await asyncio.wrap_future(job.future)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def parse(self, pdf, ocr_if_needed: bool = True):
+        """
+        Parse a PDF (bytes or path) into a list of pages, in the process pool when one is configured.
+        A parse process OCRs its pages itself: the pool already parallelises across documents.
+        """
+        if self._process_pool is not None:
+            return self._process_pool.submit(load_pdf_bytes, pdf, ocr_if_needed, None, 1).result()
+        return load_pdf_bytes(pdf, ocr_if_needed=ocr_if_needed)
+
+    def iter_pages(self, pdf, ocr_if_needed: bool = True):
+        """
+        Like parse(), but streams pages lazily when parsing in-process.
+        """
+        if self._process_pool is not None:
+            return self.parse(pdf, ocr_if_needed)
+        return iter_pdf_pages(pdf, ocr_if_needed=ocr_if_needed)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "parse_processes": self.parse_processes,
+            "queued": self._queue.qsize(),
+            "max_queued": self.max_queued,
+            "jobs": counts,
+        }
+
+    def _trim_history(self):
+        # Forget the oldest finished jobs once the history is full
+        excess = len(self._jobs) - self.max_history
+        for job_id in [j.id for j in self._jobs.values() if j.status in ("done", "failed")][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            job, fn, args, kwargs = item
+
+            def progress(stage: str, fraction: float, job=job):
+                job.stage = stage
+                job.progress = fraction
+
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = fn(*args, progress=progress, **kwargs)
+                job.status = "done"
+                job.stage = "done"
+                job.progress = 1.0
+                job.finished_at = time.time()
+                job.future.set_result(job.result)
+            except Exception as e:
+                LOG.exception("Job %s (%s %s) failed", job.id, job.kind, job.source)
+                job.status = "failed"
+                job.error = str(e)
+                job.finished_at = time.time()
+                job.future.set_exception(e)
+
+
+ingestion_queue = IngestionQueue()
@@ -1,14 +1,22 @@
-import json
 import re
 from pathlib import Path
 from langchain_core.documents import Document
+from .clause_matcher import ClauseMatcher
+from .rules_registry import RulesRegistry
+from .segmenter import SectionIndex, segment_text
+from .context import build_context
 from .llm_client import ask_llm as query_llm
-from .vectorstore import create_or_load_chroma, get_embedding_model
+from .vectorstore import create_or_load_store, get_embedding_model
 
 # -----------------------------
 # Global Constants
 # -----------------------------
 RULES_PATH = Path(__file__).parent / "rules"
+MAX_HITS_PER_CLAUSE = 10  # keyword hit offsets returned per clause
+DETECT_TOP_K = 3  # document types returned in auto-detect mode
+DETECT_MIN_RELATIVE = 0.8  # ...if their score is at least this fraction of the best
+
+rules_registry = RulesRegistry(RULES_PATH)
 
 
 # -----------------------------
@@ -16,131 +24,289 @@ RULES_PATH = Path(__file__).parent / "rules"
 # -----------------------------
 def load_rules(document_type: str):
     """
-    Loads the JSON rule file for a given document type.
+    Returns the rules for a given document type (cached, reloaded when the JSON changes).
+    """
+    return rules_registry.get(document_type)[0]
+
+
+def get_clause_matcher(document_type: str):
+    """
+    Returns (rules, ClauseMatcher) for a document type, compiled once per process.
+    """
+    return rules_registry.get(document_type)
+
+
+def preload_rules():
+    """
+    Compile every rule set in RULES_PATH (called at startup).
     """
-    rule_file = RULES_PATH / f"{document_type}.json"
-    if not rule_file.exists():
-        raise FileNotFoundError(f"No rules found for document type: {document_type}")
-    with open(rule_file, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return rules_registry.load_all()
 
 
 # -----------------------------
 # Step 2: Clause Value Extraction (generalized)
 # -----------------------------
-def extract_values(clause_name: str, text: str) -> str:
+PERCENT_RE = re.compile(r"(\d{1,2}\.\d{1,2}%|\d{1,2}%)(\s*(p\.?a\.?|per annum)?)")
+MONTHS_RE = re.compile(r"(\d{1,3}\s*months?)")
+INR_RE = re.compile(r"inr\s?[\d,]+")
+JURISDICTION_RE = re.compile(r"(jurisdiction|court of|governing law)[^.\n]+")
+
+
+NO_VALUE = {"N/A", "Missing"}
+
+
+def _first_of(items, text_lower):
     """
-    Extract actual clause values for any document type using semantic regex heuristics.
-    Supports loan, NDA, employment, consultancy, and MSA document types.
+    (True, span of the first hit) if any literal in items occurs in text_lower.
     """
-    text_lower = text.lower()
+    offsets = [(text_lower.find(x), x) for x in items]
+    offsets = [(o, x) for o, x in offsets if o >= 0]
+    if not offsets:
+        return False, None
+    o, x = min(offsets)
+    return True, (o, o + len(x))
+
 
+def _extract(clause_name: str, text_lower: str):
+    """
+    Value extraction on already-lowercased text: returns (value, (start, end) or None),
+    the span covering the text the value came from.
+    """
     # ---- Financial / Loan Documents ----
     if clause_name in {"interest_rate", "apr"}:
-        match = re.search(r"(\d{1,2}\.\d{1,2}%|\d{1,2}%)(\s*(p\.?a\.?|per annum)?)", text_lower)
-        return match.group(0) if match else "N/A"
+        match = PERCENT_RE.search(text_lower)
+        return (match.group(0), match.span()) if match else ("N/A", None)
 
     elif clause_name in {"repayment", "tenure", "installment"}:
-        months = re.findall(r"(\d{1,3}\s*months?)", text_lower)
-        emis = re.findall(r"inr\s?[\d,]+", text_lower)
-        return ", ".join(months + emis) if (months or emis) else "N/A"
+        months = list(MONTHS_RE.finditer(text_lower))
+        emis = list(INR_RE.finditer(text_lower))
+        if not (months or emis):
+            return "N/A", None
+        value = ", ".join(m.group(0) for m in months + emis)
+        return value, (min(m.start() for m in months + emis), max(m.end() for m in months + emis))
 
     elif clause_name in {"loan_amount", "principal_amount"}:
-        match = re.search(r"inr\s?[\d,]+", text_lower)
-        return match.group(0) if match else "N/A"
+        match = INR_RE.search(text_lower)
+        return (match.group(0), match.span()) if match else ("N/A", None)
 
     elif clause_name in {"collateral", "security"}:
         if "security" in text_lower and "na" in text_lower:
-            return "No collateral required"
-        if any(x in text_lower for x in ["mortgage", "pledge", "guarantee", "lien"]):
-            return "Collateral/security clause mentioned"
-        return "N/A"
+            return "No collateral required", _first_of(["security"], text_lower)[1]
+        found, span = _first_of(["mortgage", "pledge", "guarantee", "lien"], text_lower)
+        return ("Collateral/security clause mentioned", span) if found else ("N/A", None)
 
     elif clause_name in {"default", "termination"}:
-        if any(x in text_lower for x in ["default", "non-payment", "breach", "terminate", "repayable on demand"]):
-            return "Default or termination conditions mentioned"
-        return "N/A"
+        found, span = _first_of(["default", "non-payment", "breach", "terminate", "repayable on demand"], text_lower)
+        return ("Default or termination conditions mentioned", span) if found else ("N/A", None)
 
     # ---- Contractual / Corporate Documents ----
     elif clause_name in {"confidentiality", "confidential_information"}:
-        if any(x in text_lower for x in ["confidential", "non-disclosure", "proprietary"]):
-            return "Confidentiality clause present"
-        return "N/A"
+        found, span = _first_of(["confidential", "non-disclosure", "proprietary"], text_lower)
+        return ("Confidentiality clause present", span) if found else ("N/A", None)
 
     elif clause_name in {"payment_terms", "fees"}:
-        if any(x in text_lower for x in ["payment", "invoice", "fees", "charges", "compensation"]):
-            return "Payment terms mentioned"
-        return "N/A"
+        found, span = _first_of(["payment", "invoice", "fees", "charges", "compensation"], text_lower)
+        return ("Payment terms mentioned", span) if found else ("N/A", None)
 
     elif clause_name in {"intellectual_property", "ip"}:
-        if any(x in text_lower for x in ["intellectual property", "copyright", "ownership"]):
-            return "IP ownership clause found"
-        return "N/A"
+        found, span = _first_of(["intellectual property", "copyright", "ownership"], text_lower)
+        return ("IP ownership clause found", span) if found else ("N/A", None)
 
     elif clause_name in {"scope_of_work", "services"}:
-        if "scope" in text_lower or "services" in text_lower:
-            return "Scope/services clause found"
-        return "N/A"
+        found, span = _first_of(["scope", "services"], text_lower)
+        return ("Scope/services clause found", span) if found else ("N/A", None)
 
     elif clause_name in {"governing_law", "jurisdiction"}:
-        match = re.search(r"(jurisdiction|court of|governing law)[^.\n]+", text_lower)
-        return match.group(0) if match else "Missing"
+        match = JURISDICTION_RE.search(text_lower)
+        return (match.group(0), match.span()) if match else ("Missing", None)
 
     elif clause_name in {"liability", "indemnity"}:
-        if any(x in text_lower for x in ["liability", "indemnify", "damages", "loss"]):
-            return "Liability/indemnity clause present"
-        return "N/A"
+        found, span = _first_of(["liability", "indemnify", "damages", "loss"], text_lower)
+        return ("Liability/indemnity clause present", span) if found else ("N/A", None)
+
+    return "N/A", None
+
+
+def extract_values(clause_name: str, text: str, text_lower: str = None) -> str:
+    """
+    Extract actual clause values for any document type using semantic regex heuristics.
+    Supports loan, NDA, employment, consultancy, and MSA document types.
+    Runs over the whole text; keyword_check uses extract_clause_value instead.
+    """
+    if text_lower is None:
+        text_lower = text.lower()
+    return _extract(clause_name, text_lower)[0]
+
 
-    return "N/A"
+def extract_clause_value(clause_name: str, text_lower: str, sections: SectionIndex, offsets):
+    """
+    Extract a clause value only from the sections containing its keyword hits, in
+    document order, so the cost follows the matched sections instead of the document
+    length. Returns (value, span) where span is {"start", "end", "page", "section",
+    "title"} in full-text offsets, or None when no section yields a value.
+    """
+    for section in sections.sections_for(offsets):
+        value, span = _extract(clause_name, text_lower[section.start:section.end])
+        if value in NO_VALUE:
+            continue
+        start, end = (section.start + span[0], section.start + span[1]) if span else (section.start, section.end)
+        return value, {"start": start, "end": end, "page": sections.page_at(start),
+                       "section": section.index, "title": section.title}
+    return _extract(clause_name, "")[0], None
 
 
 # -----------------------------
 # Step 3: Rule-based Clause Check
 # -----------------------------
-def keyword_check(text: str, clause_rules: dict):
+def keyword_check(text: str, clause_rules: dict, matcher: ClauseMatcher = None, text_lower: str = None,
+                  hits: dict = None, values: dict = None, sections: SectionIndex = None):
     """
     Performs keyword-based clause presence detection + value extraction.
+    The text is lowercased once and searched by the compiled ClauseMatcher, one
+    str.find pass per distinct keyword (shared keywords are searched once); the
+    first keyword hit offsets are returned per clause, and values are extracted only
+    from the sections those hits fall in. `hits` and `sections` can be passed in when
+    the text was already scanned/segmented, and `values` caches extracted values
+    across rule sets.
     """
+    if text_lower is None:
+        text_lower = text.lower()
+    if sections is None:
+        sections = segment_text(text)
+    if hits is None:
+        if matcher is None:
+            matcher = ClauseMatcher(clause_rules)
+        hits = matcher.scan(text_lower, max_hits=MAX_HITS_PER_CLAUSE)
+    if values is None:
+        values = {}
+
     results = {}
     for clause, info in clause_rules.items():
-        found = any(kw.lower() in text.lower() for kw in info["keywords"])
-        if found:
-            value = extract_values(clause, text)
+        clause_hits = hits.get(clause)
+        if clause_hits:
+            for hit in clause_hits:
+                hit["page"] = sections.page_at(hit["offset"])
+            key = (clause, tuple(s.index for s in sections.sections_for(h["offset"] for h in clause_hits)))
+            if key not in values:
+                values[key] = extract_clause_value(clause, text_lower, sections, [h["offset"] for h in clause_hits])
+            value, span = values[key]
             results[clause] = {
                 "status": "found",
                 "value": value,
+                "span": span,
                 "summary": info["description"],
-                "recommendation": f"'{clause}' clause appears to be covered."
+                "recommendation": f"'{clause}' clause appears to be covered.",
+                "hits": clause_hits,
             }
         else:
             results[clause] = {
                 "status": "missing",
                 "value": None,
+                "span": None,
                 "summary": info["description"],
-                "recommendation": f"'{clause}' clause appears to be missing."
+                "recommendation": f"'{clause}' clause appears to be missing.",
+                "hits": [],
             }
     return results
 
 
-def run_rule_check(text: str, document_type: str):
+def run_rule_check(text: str, document_type: str, pages=()):
     """
     Perform rule-based keyword & regex value extraction for any document type.
+    `pages` is an optional list of (page_offset, page_number) used to report pages.
     """
-    rules = load_rules(document_type)
-    keyword_results = keyword_check(text, rules["clauses"])
+    rules, matcher = get_clause_matcher(document_type)
+    keyword_results = keyword_check(text, rules["clauses"], matcher=matcher, sections=segment_text(text, pages))
     return {"document_type": document_type, "results": keyword_results}
 
 
+def detect_document_type(keyword_hits: dict, all_rules: dict, weights: dict):
+    """
+    Score every rule set from one keyword scan. A type's score is the weighted share of
+    its keywords found in the text, where each keyword weighs 1 / (number of rule sets
+    using it); confidence is the type's share of the summed scores.
+    """
+    scored = []
+    for document_type, rules in all_rules.items():
+        keywords = {kw.lower() for info in rules["clauses"].values() for kw in info["keywords"]}
+        total = sum(weights[kw] for kw in keywords)
+        found = sum(weights[kw] for kw in keywords if kw in keyword_hits)
+        scored.append((found / total if total else 0.0, document_type))
+    scored.sort(key=lambda x: (-x[0], x[1]))
+    norm = sum(score for score, _ in scored) or 1.0
+    return [
+        {"document_type": document_type, "score": round(score, 4), "confidence": round(score / norm, 4)}
+        for score, document_type in scored
+    ]
+
+
+class TypeDetector:
+    """
+    detect_document_type() over text that arrives in pieces (pages or chunks during
+    ingestion): only which keywords occur is kept, so memory stays constant.
+    """
+
+    def __init__(self):
+        self.rules, self.matcher, self.weights = rules_registry.combined()
+        self.found = set()
+
+    def feed(self, text: str):
+        text_lower = text.lower()
+        self.found.update(kw for kw in self.matcher.keywords if kw not in self.found and kw in text_lower)
+
+    def document_type(self):
+        """
+        The best-scoring document type, or None when no rule set matched at all.
+        """
+        candidates = detect_document_type(dict.fromkeys(self.found), self.rules, self.weights)
+        return candidates[0]["document_type"] if candidates and candidates[0]["score"] > 0 else None
+
+
+def run_rule_check_all(text: str, top_k: int = DETECT_TOP_K, pages=()):
+    """
+    Scan the text once against every rule set, detect the most likely document type(s)
+    and return their clause results together. Types are kept if their score is within
+    DETECT_MIN_RELATIVE of the best one, up to top_k.
+    """
+    all_rules, matcher, weights = rules_registry.combined()
+    text_lower = text.lower()
+    sections = segment_text(text, pages)
+    keyword_hits = matcher.scan_keywords(text_lower, max_hits=MAX_HITS_PER_CLAUSE)
+    clause_hits = matcher.clause_hits(keyword_hits, max_hits=MAX_HITS_PER_CLAUSE)
+
+    candidates = detect_document_type(keyword_hits, all_rules, weights)
+    best = candidates[0]["score"] if candidates else 0.0
+    selected = [c for c in candidates[:top_k] if c["score"] > 0 and c["score"] >= best * DETECT_MIN_RELATIVE]
+
+    values = {}
+    checks = {}
+    for c in selected:
+        document_type = c["document_type"]
+        clauses = all_rules[document_type]["clauses"]
+        hits = {clause: clause_hits[(document_type, clause)] for clause in clauses if (document_type, clause) in clause_hits}
+        checks[document_type] = {
+            "document_type": document_type,
+            "results": keyword_check(text, clauses, text_lower=text_lower, hits=hits, values=values,
+                                     sections=sections),
+        }
+    return {
+        "document_type": selected[0]["document_type"] if selected else None,
+        "detected": selected,
+        "candidates": candidates,
+        "checks": checks,
+    }
+
+
 # -----------------------------
 # Step 4: Save Document to Vectorstore
 # -----------------------------
 def save_document_to_vectorstore(file_name: str, text: str):
     """
-    Stores document text & metadata into Chroma vectorstore.
+    Stores document text & metadata into the vectorstore.
     """
     doc = Document(page_content=text, metadata={"source": file_name})
     embedding_model = get_embedding_model()
-    db = create_or_load_chroma([doc], embedding_model=embedding_model)
+    db = create_or_load_store([doc], embedding_model=embedding_model)
     return db
 
 
@@ -152,7 +318,8 @@ def query_document(db, user_query: str):
     Hybrid retrieval: vectorstore context + LLM-based response generation.
     """
     docs = db.similarity_search(user_query, k=3)
-    context = "\n\n".join([d.page_content for d in docs])
+    # Overlap-free chunks within the context token budget
+    context = "\n\n".join(build_context(docs).texts)
 
     prompt = (
         "You are a legal document assistant.\n"
@@ -0,0 +1,251 @@
+# backend/app/core/lexical.py
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from heapq import nlargest
+from typing import List, Optional, Sequence, Tuple
+
+LOG = logging.getLogger("intellidoc.lexical")
+
+LEXICAL_FILE = "lexical.sqlite3"
+
+# Words plus numbers/identifiers that keep their inner punctuation ("14.2", "5,00,000",
+# "s/2024-17"), so exact clause numbers and amounts stay one token.
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,/-][a-z0-9]+)*")
+_PARTS_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or shall that the this to was were "
+    "will with which who what when where how any all such may".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased tokens for indexing and querying. A compound like "14.2" is emitted both
+    whole and as its parts, so "clause 14" still matches.
+    """
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(p for p in _PARTS_RE.findall(token) if p not in STOPWORDS)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    Persisted inverted index over chunk text with BM25 scoring, kept next to the vector
+    index files and updated per document alongside the vectors.
+
+    Stored in SQLite: one row per chunk (id, source, length), one posting per
+    (term, chunk) with its term frequency, and per-term document frequencies. Adding or
+    removing a source touches only that source's rows; corpus size and total length are
+    kept incrementally so scoring never scans the whole index.
+    """
+
+    def __init__(self, persist_dir: str = "chroma_db", k1: float = 1.2, b: float = 0.75):
+        os.makedirs(persist_dir, exist_ok=True)
+        self.path = os.path.join(persist_dir, LEXICAL_FILE)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY, chunk_id TEXT UNIQUE NOT NULL,
+                source TEXT NOT NULL, length INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS chunks_source ON chunks(source);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL, chunk INTEGER NOT NULL, tf INTEGER NOT NULL,
+                PRIMARY KEY (term, chunk)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_chunk ON postings(chunk);
+            CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS totals (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO totals VALUES ('chunks', 0), ('length', 0);
+            """
+        )
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def add(self, chunk_ids: List[str], texts: List[str], sources: List[str]):
+        """
+        Index chunks (replacing any with the same chunk id).
+        """
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._delete_chunks(self._ids_for(chunk_ids))
+            df = Counter()
+            n_chunks = total_len = 0
+            for chunk_id, text, source in zip(chunk_ids, texts, sources):
+                tf = Counter(tokenize(text))
+                length = sum(tf.values())
+                rowid = self._db.execute(
+                    "INSERT INTO chunks (chunk_id, source, length) VALUES (?, ?, ?)", (chunk_id, source, length)
+                ).lastrowid
+                self._db.executemany(
+                    "INSERT INTO postings VALUES (?, ?, ?)", [(term, rowid, n) for term, n in tf.items()]
+                )
+                df.update(tf.keys())
+                n_chunks += 1
+                total_len += length
+            self._db.executemany(
+                "INSERT INTO terms VALUES (?, ?) ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                df.items(),
+            )
+            self._bump_totals(n_chunks, total_len)
+
+    def remove(self, chunk_ids: List[str]) -> int:
+        """
+        Drop the given chunks; returns the number removed.
+        """
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            rowids = self._ids_for(list(chunk_ids))
+            self._delete_chunks(rowids)
+            return len(rowids)
+
+    def remove_source(self, source: str, keep: Sequence[str] = ()) -> int:
+        """
+        Drop every chunk of `source` except those in `keep`; returns the number removed.
+        """
+        keep = set(keep)
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            rowids = [r[0] for r in self._db.execute("SELECT id, chunk_id FROM chunks WHERE source = ?", (source,))
+                      if r[1] not in keep]
+            self._delete_chunks(rowids)
+            return len(rowids)
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM postings")
+            self._db.execute("DELETE FROM terms")
+            self._db.execute("DELETE FROM chunks")
+            self._db.execute("UPDATE totals SET value = 0")
+
+    def _ids_for(self, chunk_ids: List[str]) -> List[int]:
+        rowids = []
+        for i in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[i:i + 500]
+            rowids += [r[0] for r in self._db.execute(
+                f"SELECT id FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch
+            )]
+        return rowids
+
+    def _delete_chunks(self, rowids: List[int]):
+        if not rowids:
+            return
+        df = Counter()
+        total_len = 0
+        for i in range(0, len(rowids), 500):
+            batch = rowids[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            df.update(dict(self._db.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE chunk IN ({marks}) GROUP BY term", batch
+            )))
+            total_len += self._db.execute(
+                f"SELECT COALESCE(SUM(length), 0) FROM chunks WHERE id IN ({marks})", batch
+            ).fetchone()[0]
+            self._db.execute(f"DELETE FROM postings WHERE chunk IN ({marks})", batch)
+            self._db.execute(f"DELETE FROM chunks WHERE id IN ({marks})", batch)
+        self._db.executemany("UPDATE terms SET df = df - ? WHERE term = ?", [(n, t) for t, n in df.items()])
+        self._db.execute("DELETE FROM terms WHERE df <= 0")
+        self._bump_totals(-len(rowids), -total_len)
+
+    def _bump_totals(self, n_chunks: int, total_len: int):
+        self._db.execute("UPDATE totals SET value = value + ? WHERE key = 'chunks'", (n_chunks,))
+        self._db.execute("UPDATE totals SET value = value + ? WHERE key = 'length'", (total_len,))
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT value FROM totals WHERE key = 'chunks'").fetchone()[0]
+
+    def search(self, query: str, k: int = 20, source: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k (chunk_id, bm25 score) for a query, optionally restricted to one source.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            totals = dict(self._db.execute("SELECT key, value FROM totals"))
+            n, avgdl = totals["chunks"], totals["length"] / max(totals["chunks"], 1)
+            if n == 0:
+                return []
+            scores = defaultdict(float)
+            source_chunks = None
+            for term in terms:
+                row = self._db.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+                if row is None:
+                    continue
+                idf = math.log(1 + (n - row[0] + 0.5) / (row[0] + 0.5))
+                sql = ("SELECT p.chunk, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk "
+                       "WHERE p.term = ?")
+                args = (term,)
+                if source is not None:
+                    if source_chunks is None:
+                        source_chunks = self._db.execute(
+                            "SELECT COUNT(*) FROM chunks WHERE source = ?", (source,)).fetchone()[0]
+                    if row[0] > source_chunks:
+                        # Common term: probe the document's chunks instead of scanning the
+                        # term's postings across the whole corpus
+                        sql = ("SELECT p.chunk, p.tf, c.length FROM chunks c CROSS JOIN postings p "
+                               "ON p.term = ? AND p.chunk = c.id WHERE c.source = ?")
+                    else:
+                        sql += " AND c.source = ?"
+                    args = (term, source)
+                k1, b = self.k1, self.b
+                for rowid, tf, length in self._db.execute(sql, args):
+                    scores[rowid] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avgdl))
+            top = nlargest(k, scores.items(), key=lambda x: x[1])
+            if not top:
+                return []
+            ids = dict(self._db.execute(
+                f"SELECT id, chunk_id FROM chunks WHERE id IN ({','.join('?' * len(top))})", [r for r, _ in top]
+            ))
+        return [(ids[rowid], score) for rowid, score in top]
+
+    def sources(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT DISTINCT source FROM chunks ORDER BY source")]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            totals = dict(self._db.execute("SELECT key, value FROM totals"))
+            terms = self._db.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+        return {"chunks": totals["chunks"], "terms": terms,
+                "avg_chunk_tokens": round(totals["length"] / totals["chunks"], 1) if totals["chunks"] else 0}
+
+
+def build_from_store(index: LexicalIndex, store, batch_size: int = 1000) -> int:
+    """
+    (Re)build the lexical index from an existing vector index (vector_index.VectorIndex),
+    e.g. one indexed before the lexical index existed. Returns the number of chunks indexed.
+    """
+    index.clear()
+    total = 0
+    for docs in store.iter_documents(batch_size):
+        index.add([d.id for d in docs], [d.page_content for d in docs],
+                  [d.metadata.get("source", "") for d in docs])
+        total += len(docs)
+    LOG.info("Built lexical index from the vector index (%d chunks)", total)
+    return total
@@ -1,11 +1,17 @@
 # backend/app/core/llm_client.py
 import logging
-from langchain_ollama import OllamaLLM  # keep if you use Ollama
-from typing import List
+from typing import AsyncIterator, List
+
+from langchain_core.documents import Document
+
+from app.core.context import build_context
+from app.core.ollama_client import LLMStream, OllamaClient
 
 LOG = logging.getLogger("intellidoc.llm")
 
-llm = OllamaLLM(model="llama3:8b", temperature=0.0)  # adjust as needed
+# Shared Ollama client: pooled connections, bounded concurrency, coalesced identical prompts.
+# Model, URL and limits come from INTELLIDOC_LLM_* (see config.py).
+client = OllamaClient()
 
 QA_PROMPT = """
 You are a contract analysis assistant. You must base your answer only on the context provided below.
@@ -26,29 +32,61 @@ Always include the document name and chunk number (e.g., [Shravan.pdf, chunk 2])
 
 def _llm_call(prompt: str) -> str:
     """
-    Unified llm call: support .predict(), .generate(), or callable llm.
+    Blocking LLM call through the shared client (for sync callers).
     """
     try:
-        if hasattr(llm, "predict"):
-            return llm.predict(prompt)
-        if hasattr(llm, "generate"):
-            gen = llm.generate([prompt])
-            # Retrieval depends on LLM object; try to extract text
-            try:
-                # langchain LLMResult -> .generations[0][0].text
-                return gen.generations[0][0].text
-            except Exception:
-                return str(gen)
-        # fallback: try direct call
-        return llm(prompt)
-    except Exception as e:
+        return client.generate(prompt)
+    except Exception:
         LOG.exception("LLM call failed")
         raise
 
-def run_qa(context_texts: List[str], question: str) -> str:
+def build_qa_prompt(context_texts: List[str], question: str) -> str:
     context = "\n\n---\n\n".join(context_texts)
-    prompt = QA_PROMPT.format(context=context, question=question)
-    return _llm_call(prompt)
+    return QA_PROMPT.format(context=context, question=question)
+
+def build_budgeted_qa_prompt(contexts: list, question: str, max_tokens: int = None) -> str:
+    """
+    QA prompt over contexts (Documents or strings, best first) packed into the context
+    token budget; see context.build_context.
+    """
+    docs = [c if isinstance(c, Document) else Document(page_content=c) for c in contexts]
+    return build_qa_prompt(build_context(docs, max_tokens).texts, question)
+
+def run_qa(contexts: list, question: str) -> str:
+    return _llm_call(build_budgeted_qa_prompt(contexts, question))
+
+async def arun_qa(contexts: list, question: str) -> str:
+    return await aask_llm(build_budgeted_qa_prompt(contexts, question))
+
+async def astream_llm(prompt: str) -> AsyncIterator[str]:
+    """
+    Yield the answer in pieces as the LLM produces them. Closing this generator early
+    closes the request and Ollama stops generating.
+    """
+    stream = client.astream(prompt)
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.aclose()
+
+async def open_llm_stream(prompt: str) -> LLMStream:
+    """
+    Start streaming the answer and return once the LLM has accepted the request, so a
+    busy or unresponsive LLM (LLMBusy / LLMTimeout) is raised before any output is sent.
+    """
+    try:
+        return await client.open_stream(prompt)
+    except Exception:
+        LOG.exception("LLM call failed")
+        raise
 
 def ask_llm(prompt: str):
     return _llm_call(prompt)
+
+async def aask_llm(prompt: str) -> str:
+    try:
+        return await client.agenerate(prompt)
+    except Exception:
+        LOG.exception("LLM call failed")
+        raise
@@ -0,0 +1,204 @@
+# backend/app/core/manifest.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+LOG = logging.getLogger("intellidoc.manifest")
+
+MANIFEST_FILE = "manifest.sqlite3"
+# Earlier layout: the whole manifest as one JSON file, imported once on open
+LEGACY_MANIFEST_FILE = "manifest.json"
+
+
+# Catalog fields recorded per document besides its chunk ids
+CATALOG_FIELDS = ("sha256", "num_chunks", "page_count", "doc_type", "parser", "indexed_at", "ingest_seconds")
+
+
+class DocumentManifest:
+    """
+    Record of every indexed document, persisted in SQLite next to the vector index
+    files: source -> {"sha256", "chunk_ids", "num_chunks", "indexed_at"} plus, when the
+    ingest path knows them, "page_count", "doc_type", "parser" and "ingest_seconds".
+
+    It doubles as the document catalog. The catalog fields live in a small table that
+    is also held in memory, so counts are O(1) and listings page through a sorted copy
+    of the sources that is rebuilt only after a change. Chunk ids are stored per
+    document in their own table and read only by get(). Recording or removing a
+    document writes that document's rows alone, whatever the size of the corpus.
+
+    Every change bumps an in-process generation counter, globally and for the source
+    concerned, so caches can key on version() and never serve results computed from
+    chunks that have since been replaced or deleted.
+    """
+
+    def __init__(self, persist_dir: str = "chroma_db"):
+        os.makedirs(persist_dir, exist_ok=True)
+        self.path = os.path.join(persist_dir, MANIFEST_FILE)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                source TEXT PRIMARY KEY, sha256 TEXT NOT NULL, num_chunks INTEGER NOT NULL,
+                page_count INTEGER, doc_type TEXT, parser TEXT, indexed_at REAL NOT NULL,
+                ingest_seconds REAL);
+            CREATE TABLE IF NOT EXISTS chunk_ids (source TEXT PRIMARY KEY, ids TEXT NOT NULL);
+            """
+        )
+        self._import_legacy(os.path.join(persist_dir, LEGACY_MANIFEST_FILE))
+        self._docs = {}  # source -> catalog fields (no chunk ids)
+        for row in self._db.execute(f"SELECT source, {', '.join(CATALOG_FIELDS)} FROM documents"):
+            self._docs[row[0]] = {k: v for k, v in zip(CATALOG_FIELDS, row[1:]) if v is not None}
+        self._chunks = sum(entry["num_chunks"] for entry in self._docs.values())
+        self._generation = 0
+        self._source_generation = {}
+        self._order = None  # sorted sources, rebuilt lazily after a change
+
+    def _import_legacy(self, path: str):
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                docs = json.load(f)
+        except (OSError, ValueError):
+            LOG.exception("Unreadable manifest %s, not imported", path)
+            return
+        with self._db:
+            self._db.execute("BEGIN")
+            for source, entry in docs.items():
+                self._write(source, entry, entry.get("chunk_ids", []))
+        os.remove(path)
+        LOG.info("Imported %d documents from %s", len(docs), path)
+
+    def _write(self, source: str, entry: dict, chunk_ids: list):
+        self._db.execute(
+            f"INSERT OR REPLACE INTO documents (source, {', '.join(CATALOG_FIELDS)}) "
+            f"VALUES (?, {', '.join('?' * len(CATALOG_FIELDS))})",
+            (source, *(entry.get(k) for k in CATALOG_FIELDS)))
+        self._db.execute("INSERT OR REPLACE INTO chunk_ids VALUES (?, ?)", (source, json.dumps(list(chunk_ids))))
+
+    def get(self, source: str):
+        with self._lock:
+            entry = self._docs.get(source)
+            if entry is None:
+                return None
+            row = self._db.execute("SELECT ids FROM chunk_ids WHERE source = ?", (source,)).fetchone()
+            return {**entry, "chunk_ids": json.loads(row[0]) if row else []}
+
+    def is_unchanged(self, source: str, sha256: str) -> bool:
+        with self._lock:
+            entry = self._docs.get(source)
+            return entry is not None and entry["sha256"] == sha256
+
+    def record(self, source: str, sha256: str, chunk_ids: list, **details):
+        """
+        Record `source` as indexed from `sha256` under chunk_ids. `details` holds the
+        other catalog fields known to the caller (page_count, doc_type, parser,
+        ingest_seconds).
+        """
+        entry = {
+            **{k: v for k, v in details.items() if k in CATALOG_FIELDS and v is not None},
+            "sha256": sha256,
+            "num_chunks": len(chunk_ids),
+            "indexed_at": time.time(),
+        }
+        with self._lock:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._write(source, entry, chunk_ids)
+            previous = self._docs.get(source)
+            self._docs[source] = entry
+            self._chunks += len(chunk_ids) - (previous["num_chunks"] if previous else 0)
+            self._bump(source)
+
+    def remove(self, source: str):
+        with self._lock:
+            entry = self.get(source)
+            self._bump(source)
+            if entry is not None:
+                with self._db:
+                    self._db.execute("BEGIN")
+                    self._db.execute("DELETE FROM documents WHERE source = ?", (source,))
+                    self._db.execute("DELETE FROM chunk_ids WHERE source = ?", (source,))
+                del self._docs[source]
+                self._chunks -= entry["num_chunks"]
+            return entry
+
+    def clear(self):
+        with self._lock:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.execute("DELETE FROM documents")
+                self._db.execute("DELETE FROM chunk_ids")
+            self._generation += 1
+            for source in set(self._docs) | set(self._source_generation):
+                self._bump(source)
+            self._docs = {}
+            self._chunks = 0
+
+    def sources(self):
+        with self._lock:
+            return list(self._sorted())
+
+    def counts(self) -> dict:
+        """
+        {"documents", "chunks"} in O(1).
+        """
+        with self._lock:
+            return {"documents": len(self._docs), "chunks": self._chunks}
+
+    def describe(self, source: str):
+        """
+        The catalog entry of `source` (without its chunk ids), or None.
+        """
+        with self._lock:
+            entry = self._docs.get(source)
+            return self._catalog_entry(source, entry) if entry else None
+
+    def catalog(self, offset: int = 0, limit: int = 50, doc_type: str = None, parser: str = None) -> dict:
+        """
+        One page of catalog entries in source order, optionally filtered by doc type
+        and parser: {"total", "offset", "limit", "documents"}. Unfiltered pages cost
+        O(limit); filters scan the entries once.
+        """
+        with self._lock:
+            sources = self._sorted()
+            if doc_type is not None or parser is not None:
+                sources = [s for s in sources
+                           if (doc_type is None or self._docs[s].get("doc_type") == doc_type)
+                           and (parser is None or self._docs[s].get("parser") == parser)]
+            page = [self._catalog_entry(s, self._docs[s]) for s in sources[offset:offset + limit]]
+            return {"total": len(sources), "offset": offset, "limit": limit, "documents": page}
+
+    @staticmethod
+    def _catalog_entry(source: str, entry: dict) -> dict:
+        return {"source": source, **{k: entry.get(k) for k in CATALOG_FIELDS}}
+
+    def _sorted(self) -> list:
+        if self._order is None:
+            self._order = sorted(self._docs)
+        return self._order
+
+    def version(self, source: str = None):
+        """
+        Changes whenever `source` (or, without a source, any document) is indexed,
+        replaced or removed.
+        """
+        with self._lock:
+            if source is None:
+                return self._generation
+            return self._source_generation.get(source, 0)
+
+    def _bump(self, source: str):
+        self._order = None
+        self._generation += 1
+        self._source_generation[source] = self._source_generation.get(source, 0) + 1
+
+    def close(self):
+        with self._lock:
+            self._db.close()
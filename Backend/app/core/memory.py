@@ -0,0 +1,59 @@
+# backend/app/core/memory.py
+# Process memory readings, shared by the registry, ingestion reports and the benchmarks.
+
+# Optional dependencies (memory reporting)
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _proc_status_mb(field: str):
+    """
+    A memory field of /proc/self/status (Linux) in MB, or None.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_mb():
+    """
+    Resident memory of this process in MB (peak RSS where neither psutil nor /proc is
+    available).
+    """
+    if psutil:
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    rss = _proc_status_mb("VmRSS")
+    if rss is not None:
+        return rss
+    if resource:
+        # ru_maxrss is in KB on Linux
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return None
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process so far (since it started, not per request)
+    in MB, or None where unsupported.
+    """
+    # VmHWM resets on exec, unlike ru_maxrss (which reload workers inherit)
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    if resource:
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    if psutil and hasattr(psutil.Process().memory_info(), "peak_wset"):  # Windows
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    return None
@@ -0,0 +1,312 @@
+# backend/app/core/ollama_client.py
+import asyncio
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import AsyncIterator, Callable
+
+import httpx
+
+from app.core import config
+
+LOG = logging.getLogger("intellidoc.ollama")
+
+_STARTED = object()
+_DONE = object()
+
+
+class LLMBusy(Exception):
+    """Too many generations already waiting for a slot."""
+
+
+class LLMTimeout(Exception):
+    """A generation did not finish within the client's timeout."""
+
+
+class OllamaClient:
+    """
+    Async client for Ollama's /api/generate with a bounded number of generations in
+    flight, timeouts (`timeout_s` without a response byte fails the call with
+    LLMTimeout), retries on connection errors / 5xx and one pooled httpx connection set.
+
+    All I/O runs on a private event loop thread, so sync callers (CLI, worker threads)
+    and async routes share the same connections, concurrency limit and coalescing
+    table. At most `max_concurrency` generations run at once; further calls wait, and
+    once `max_queued` are waiting new calls fail fast with LLMBusy. Identical prompts
+    in flight at the same time share one generation.
+    """
+
+    def __init__(self, base_url: str = None, model: str = None, temperature: float = None,
+                 max_concurrency: int = None, max_queued: int = None, timeout_s: float = None,
+                 connect_timeout_s: float = None, retries: int = None):
+        self.base_url = (base_url or config.LLM_BASE_URL).rstrip("/")
+        self.model = model or config.LLM_MODEL
+        self.temperature = config.LLM_TEMPERATURE if temperature is None else temperature
+        self.max_concurrency = max(1, max_concurrency or config.LLM_MAX_CONCURRENCY)
+        self.max_queued = config.LLM_MAX_QUEUED if max_queued is None else max_queued
+        self.timeout_s = timeout_s or config.LLM_TIMEOUT_S
+        self.connect_timeout_s = connect_timeout_s or config.LLM_CONNECT_TIMEOUT_S
+        self.retries = config.LLM_RETRIES if retries is None else retries
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._http = None
+        self._slots = None
+        self._inflight = {}  # (model, prompt, options) -> [task, waiters]
+        self._waiting = 0
+        self._active = 0
+        self._stats = {"requests": 0, "generations": 0, "coalesced": 0, "rejected": 0, "timeouts": 0,
+                       "retries": 0, "errors": 0, "busy_seconds": 0.0}
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="ollama-client", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _submit(self, coro) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def _client(self) -> httpx.AsyncClient:
+        # Created on the client loop, the only loop that uses it
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout_s, connect=self.connect_timeout_s),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._http
+
+    def close(self, timeout: float = 5.0):
+        with self._lock:
+            loop, thread, self._loop, self._thread = self._loop, self._thread, None, None
+        if loop is None:
+            return
+
+        async def _shutdown():
+            for task, _ in list(self._inflight.values()):
+                task.cancel()
+            if self._http is not None:
+                await self._http.aclose()
+            self._http = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            loop.close()
+
+    # -----------------------------
+    # Generation
+    # -----------------------------
+    def generate(self, prompt: str, **options) -> str:
+        """
+        Blocking generation for sync callers.
+        """
+        return self._submit(self._coalesced(prompt, options)).result()
+
+    async def agenerate(self, prompt: str, **options) -> str:
+        """
+        Generation for async callers on any event loop. Cancelling the caller drops its
+        interest; the shared generation is cancelled once no caller is waiting for it.
+        """
+        return await asyncio.wrap_future(self._submit(self._coalesced(prompt, options)))
+
+    async def open_stream(self, prompt: str, **options) -> "LLMStream":
+        """
+        Start a streamed generation (not coalesced) and return once Ollama has accepted
+        it: a slot is held and the response has begun. LLMBusy, LLMTimeout and HTTP
+        errors are raised here rather than from the first piece, so a caller can still
+        turn them into a status code; failures after this come out of the iteration.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        future = self._submit(
+            self._stream(prompt, options, lambda item: loop.call_soon_threadsafe(queue.put_nowait, item))
+        )
+        stream = LLMStream(queue, future)
+        try:
+            item = await stream._get()
+        except BaseException:
+            await stream.aclose()
+            raise
+        if item is _DONE:
+            stream._done = True
+        return stream
+
+    async def astream(self, prompt: str, **options) -> AsyncIterator[str]:
+        """
+        Yield the response in pieces as Ollama produces them (not coalesced). Closing the
+        generator early closes the HTTP request, which stops generation on the server.
+        """
+        stream = await self.open_stream(prompt, **options)
+        try:
+            async for item in stream:
+                yield item
+        finally:
+            await stream.aclose()
+
+    def _payload(self, prompt: str, options: dict, stream: bool) -> dict:
+        return {"model": options.pop("model", self.model), "prompt": prompt, "stream": stream,
+                "options": {"temperature": self.temperature, **options}}
+
+    async def _coalesced(self, prompt: str, options: dict) -> str:
+        self._stats["requests"] += 1
+        key = (options.get("model", self.model), prompt, json.dumps(options, sort_keys=True))
+        shared = self._inflight.get(key)
+        if shared is None:
+            task = asyncio.ensure_future(self._generate(prompt, dict(options)))
+            shared = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._stats["coalesced"] += 1
+        shared[1] += 1
+        try:
+            return await asyncio.shield(shared[0])
+        except asyncio.CancelledError:
+            if not shared[0].done() and shared[1] == 1:
+                shared[0].cancel()
+            raise
+        finally:
+            shared[1] -= 1
+
+    async def _generate(self, prompt: str, options: dict) -> str:
+        payload = self._payload(prompt, options, stream=False)
+        async with self._slot():
+            attempt = 0
+            while True:
+                try:
+                    response = await self._client().post("/api/generate", json=payload)
+                    response.raise_for_status()
+                    return response.json()["response"]
+                except httpx.TimeoutException as e:
+                    self._stats["timeouts"] += 1
+                    raise LLMTimeout(f"LLM did not answer within {self.timeout_s:g}s") from e
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    # Connection failures and 5xx (model loading, server overloaded) are retried
+                    server_side = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code >= 500
+                    if not server_side or attempt >= self.retries:
+                        self._stats["errors"] += 1
+                        raise
+                    attempt += 1
+                    self._stats["retries"] += 1
+                    LOG.warning("LLM call failed (%s), retry %d/%d", e, attempt, self.retries)
+                    await asyncio.sleep(0.25 * 2 ** (attempt - 1))
+
+    async def _stream(self, prompt: str, options: dict, put: Callable):
+        payload = self._payload(prompt, dict(options), stream=True)
+        self._stats["requests"] += 1
+        try:
+            async with self._slot():
+                async with self._client().stream("POST", "/api/generate", json=payload) as response:
+                    response.raise_for_status()
+                    put(_STARTED)
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        if data.get("error"):
+                            raise RuntimeError(data["error"])
+                        if data.get("response"):
+                            put(data["response"])
+                        if data.get("done"):
+                            break
+            put(_DONE)
+        except asyncio.CancelledError:
+            raise
+        except httpx.TimeoutException:
+            self._stats["timeouts"] += 1
+            put(LLMTimeout(f"LLM stalled for more than {self.timeout_s:g}s"))
+        except Exception as e:
+            self._stats["errors"] += 1
+            put(e)
+
+    def _slot(self):
+        return _Slot(self)
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["busy_seconds"] = round(stats["busy_seconds"], 3)
+        return {**stats, "model": self.model, "base_url": self.base_url, "active": self._active,
+                "waiting": self._waiting, "max_concurrency": self.max_concurrency, "max_queued": self.max_queued}
+
+
+class LLMStream:
+    """
+    The pieces of a generation opened by OllamaClient.open_stream, as an async
+    iterator. aclose() closes the HTTP request (Ollama stops generating) and frees the
+    slot; call it whether or not the stream was read to the end.
+    """
+
+    def __init__(self, queue: asyncio.Queue, future: Future):
+        self._queue = queue
+        self._future = future
+        self._done = False
+
+    async def _get(self):
+        item = await self._queue.get()
+        if isinstance(item, BaseException):
+            self._done = True
+            raise item
+        return item
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        if self._done:
+            raise StopAsyncIteration
+        item = await self._get()
+        if item is _DONE:
+            self._done = True
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self):
+        self._done = True
+        self._future.cancel()
+
+
+class _Slot:
+    """
+    One of the client's `max_concurrency` generation slots; rejects with LLMBusy when
+    `max_queued` callers are already waiting for one.
+    """
+
+    def __init__(self, client: OllamaClient):
+        self.client = client
+        self.started = None
+
+    async def __aenter__(self):
+        client = self.client
+        client._client()
+        if client._slots.locked() and client._waiting >= client.max_queued:
+            client._stats["rejected"] += 1
+            raise LLMBusy(f"LLM is busy ({client._waiting} generations waiting)")
+        client._waiting += 1
+        try:
+            await client._slots.acquire()
+        finally:
+            client._waiting -= 1
+        client._active += 1
+        client._stats["generations"] += 1
+        self.started = time.perf_counter()
+        return self
+
+    async def __aexit__(self, *exc):
+        client = self.client
+        client._active -= 1
+        client._stats["busy_seconds"] += time.perf_counter() - self.started
+        client._slots.release()
+        return False
@@ -1,12 +1,19 @@
 # backend/app/core/parser.py
 import io
 import logging
+import mmap
 import os
 import tempfile
-from typing import List
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator, List, Union
 
 from langchain_core.documents import Document
 
+from app.core import config
+
 
 # Optional dependencies
 try:
@@ -28,57 +35,242 @@ except ImportError:
 
 LOG = logging.getLogger("intellidoc.parser")
 
+# Pages are joined with this separator; "page_offset" metadata indexes into the joined text
+PAGE_SEPARATOR = "\n\n"
+
 
-def load_pdf_bytes(file_bytes: bytes, ocr_if_needed: bool = True) -> List[Document]:
+# -----------------------------
+# Text layer
+# -----------------------------
+def _open_text_layer(pdf: Union[bytes, str]):
     """
-    Load PDF from bytes:
-    1. Try PyMuPDF for text extraction.
-    2. If PyMuPDF fails, fallback to PyPDF2.
-    3. If still empty and ocr_if_needed=True, run OCR via pytesseract.
+    Return (parser name, page count, lazy iterator of (text, seconds) per page).
+    `pdf` is raw bytes or a file path; paths are read lazily by PyMuPDF or through
+    an mmap for PyPDF2, never copied into memory whole.
+    Tries PyMuPDF first and falls back to PyPDF2; returns (None, 0, None) if both fail.
     """
-    # --- PyMuPDF first ---
     if fitz:
         try:
-            doc = fitz.open(stream=file_bytes, filetype="pdf")
-            text = ""
-            for page in doc:
-                text += page.get_text("text") or ""
-            doc.close()
-            if text.strip():
-                return [Document(page_content=text, metadata={"source": "pymupdf"})]
-            LOG.debug("PyMuPDF returned empty text, trying fallback.")
+            doc = fitz.open(pdf) if isinstance(pdf, str) else fitz.open(stream=pdf, filetype="pdf")
+
+            def pages():
+                try:
+                    for page in doc:
+                        start = time.perf_counter()
+                        text = page.get_text("text") or ""
+                        yield text, time.perf_counter() - start
+                finally:
+                    doc.close()
+
+            return "pymupdf", doc.page_count, pages()
         except Exception as e:
             LOG.debug("PyMuPDF failed: %s", e, exc_info=True)
 
-    # --- PyPDF2 fallback ---
     if PdfReader:
         try:
-            reader = PdfReader(io.BytesIO(file_bytes))
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() or ""
-            if text.strip():
-                return [Document(page_content=text, metadata={"source": "pypdf2"})]
-            LOG.debug("PyPDF2 returned empty text, trying OCR if enabled.")
+            if isinstance(pdf, str):
+                with open(pdf, "rb") as f:
+                    stream = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                stream = io.BytesIO(pdf)
+            reader = PdfReader(stream)
+
+            def pages():
+                try:
+                    for page in reader.pages:
+                        start = time.perf_counter()
+                        text = page.extract_text() or ""
+                        yield text, time.perf_counter() - start
+                finally:
+                    stream.close()
+
+            return "pypdf2", len(reader.pages), pages()
         except Exception as e:
             LOG.debug("PyPDF2 failed: %s", e, exc_info=True)
 
-    # --- OCR fallback ---
-    if ocr_if_needed and Image and pytesseract:
+    return None, 0, None
+
+
+# -----------------------------
+# OCR
+# -----------------------------
+def _ocr_page(path: str, page_no: int, dpi: int):
+    """
+    Render one page (0-based) and OCR it. Runs in a worker process, so only this
+    page's image is ever held in memory. Returns (text, seconds).
+    """
+    start = time.perf_counter()
+    if fitz:
+        with fitz.open(path) as doc:
+            pix = doc[page_no].get_pixmap(dpi=dpi)
+            image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    else:
+        from pdf2image import convert_from_path
+        image = convert_from_path(path, dpi=dpi, first_page=page_no + 1, last_page=page_no + 1)[0]
+    text = pytesseract.image_to_string(image)
+    image.close()
+    return text, time.perf_counter() - start
+
+
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+
+def _shared_ocr_pool() -> ProcessPoolExecutor:
+    """
+    The process pool of OCR_WORKERS processes shared by every document parsed in this
+    process, created when a page first needs OCR. Concurrent ingests queue their pages
+    on it instead of each starting a pool of their own.
+    """
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ProcessPoolExecutor(max_workers=max(1, config.OCR_WORKERS))
+        return _ocr_pool
+
+
+def shutdown_ocr_pool():
+    global _ocr_pool
+    with _ocr_pool_lock:
+        pool, _ocr_pool = _ocr_pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+class _PageOCR:
+    """
+    OCRs single pages on demand, in the shared OCR pool (or in this process with one
+    worker). Workers render from the PDF's path (bytes are first written to a temp file).
+    """
+
+    def __init__(self, pdf: Union[bytes, str], dpi: int, workers: int):
+        self.pdf = pdf
+        self.dpi = dpi
+        self.workers = max(1, workers)
+        self.path = pdf if isinstance(pdf, str) else None
+        self.owns_path = False
+        self.futures = []
+
+    def _ensure_file(self):
+        if self.path is None:
+            fd, self.path = tempfile.mkstemp(suffix=".pdf")
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.pdf)
+            self.owns_path = True
+        return self.path
+
+    def page_count(self) -> int:
+        path = self._ensure_file()
+        if fitz:
+            with fitz.open(path) as doc:
+                return doc.page_count
+        from pdf2image import pdfinfo_from_path
+        return int(pdfinfo_from_path(path)["Pages"])
+
+    def submit(self, page_no: int) -> Future:
+        path = self._ensure_file()
+        if self.workers == 1:
+            fut = Future()
+            fut.set_result(_ocr_page(path, page_no, self.dpi))
+            return fut
+        fut = _shared_ocr_pool().submit(_ocr_page, path, page_no, self.dpi)
+        self.futures = [f for f in self.futures if not f.done()] + [fut]
+        return fut
+
+    def close(self):
+        # Pages of this document still queued (the caller stopped early) are dropped
+        for fut in self.futures:
+            fut.cancel()
+        if self.owns_path:
+            os.unlink(self.path)
+
+
+def _done(value) -> Future:
+    fut = Future()
+    fut.set_result(value)
+    return fut
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+def iter_pdf_pages(pdf: Union[bytes, str], ocr_if_needed: bool = True, dpi: int = None,
+                   workers: int = None) -> Iterator[Document]:
+    """
+    Lazily yield one Document per page of `pdf` (bytes or a file path), in page order, with metadata:
+    page (1-based), page_offset (char offset in the PAGE_SEPARATOR-joined text),
+    page_count, parser (pymupdf / pypdf2 / ocr) and parse_seconds.
+
+    Pages with a text layer use it; pages without one are OCR'd when ocr_if_needed=True,
+    in parallel on the process-wide pool of OCR_WORKERS processes (workers=1 OCRs in the
+    calling process instead). At most ~2x workers pages are in flight at any time.
+    """
+    dpi = dpi or config.OCR_DPI
+    workers = workers or config.OCR_WORKERS
+    can_ocr = bool(ocr_if_needed and Image and pytesseract)
+
+    parser_name, page_count, pages = _open_text_layer(pdf)
+    ocr = _PageOCR(pdf, dpi, workers) if can_ocr else None
+    if parser_name is None:
+        if ocr is None:
+            raise ValueError("Could not parse PDF: PyMuPDF/PyPDF2 failed and OCR disabled or failed.")
+        LOG.debug("Text layer unavailable, OCR'ing every page.")
+        page_count = ocr.page_count()
+        pages = (("", 0.0) for _ in range(page_count))
+
+    window = 2 * workers
+    pending = deque()
+    state = {"offset": 0, "chars": 0}
+
+    def emit(page_no, method, fut):
         try:
-            from pdf2image import convert_from_bytes
-            images = convert_from_bytes(file_bytes)
-            text_pieces = [pytesseract.image_to_string(img) for img in images]
-            text = "\n\n".join(text_pieces).strip()
-            if text:
-                return [Document(page_content=text, metadata={"source": "ocr"})]
+            text, seconds = fut.result()
         except Exception as e:
-            LOG.exception("OCR fallback failed")
+            LOG.exception("OCR failed on page %d", page_no + 1)
             raise ValueError(f"OCR fallback failed: {e}")
+        doc = Document(page_content=text, metadata={
+            "page": page_no + 1,
+            "page_offset": state["offset"],
+            "page_count": page_count,
+            "parser": method,
+            "parse_seconds": round(seconds, 4),
+        })
+        state["offset"] += len(text) + len(PAGE_SEPARATOR)
+        state["chars"] += len(text.strip())
+        return doc
+
+    try:
+        for i, (text, seconds) in enumerate(pages):
+            if ocr is not None and len(text.strip()) < config.OCR_MIN_CHARS:
+                pending.append((i, "ocr", ocr.submit(i)))
+            else:
+                pending.append((i, parser_name, _done((text, seconds))))
+            while pending and (pending[0][2].done() or len(pending) > window):
+                yield emit(*pending.popleft())
+        while pending:
+            yield emit(*pending.popleft())
+    finally:
+        if ocr is not None:
+            ocr.close()
 
-    raise ValueError("Could not parse PDF: PyMuPDF/PyPDF2 failed and OCR disabled or failed.")
+    if not state["chars"]:
+        raise ValueError("Could not parse PDF: PyMuPDF/PyPDF2 failed and OCR disabled or failed.")
+
+
+def join_pages(docs: List[Document]) -> str:
+    """
+    Full document text, consistent with each page's "page_offset".
+    """
+    return PAGE_SEPARATOR.join(d.page_content for d in docs)
+
+
+def load_pdf_bytes(pdf: Union[bytes, str], ocr_if_needed: bool = True, dpi: int = None,
+                   workers: int = None) -> List[Document]:
+    """
+    Load PDF from bytes (or a file path) as a list of per-page Documents (see iter_pdf_pages).
+    """
+    return list(iter_pdf_pages(pdf, ocr_if_needed=ocr_if_needed, dpi=dpi, workers=workers))
 
 
 def parse_pdf(path: str, ocr_if_needed: bool = True):
-    with open(path, "rb") as f:
-        return load_pdf_bytes(f.read(), ocr_if_needed=ocr_if_needed)
+    return load_pdf_bytes(path, ocr_if_needed=ocr_if_needed)
@@ -0,0 +1,199 @@
+# backend/app/core/registry.py
+import logging
+import threading
+import time
+
+import chromadb
+from langchain_chroma import Chroma
+
+from app.core import config
+from app.core.doc_index import doc_indexes
+from app.core.embeddings import DEFAULT_MODEL_NAME, load_embedding_model
+from app.core.lexical import LexicalIndex, build_from_store
+from app.core.manifest import DocumentManifest
+from app.core.memory import current_rss_mb
+from app.core.vector_index import ChromaIndex, LocalIndex, VectorIndex
+
+LOG = logging.getLogger("intellidoc.registry")
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the embedding model(s) and one vector index per persist dir
+    (Chroma or the local memory-mapped index, per INTELLIDOC_VECTOR_BACKEND), with its
+    manifest, BM25 index and per-document sub-indexes. Each tenant has its own persist dir.
+    Started from the FastAPI lifespan and closed on shutdown; safe to use from worker threads.
+    """
+
+    def __init__(self, default_model: str = DEFAULT_MODEL_NAME):
+        self.default_model = default_model
+        self._lock = threading.RLock()
+        self._models = {}
+        self._clients = {}
+        self._stores = {}
+        self._manifests = {}
+        self._lexical = {}
+        self._stats = {"models": {}, "stores": {}}
+        self.started_at = None
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self, persist_dir: str = "chroma_db"):
+        """
+        Load and warm the default embedding model and open the default store.
+        """
+        model = self.get_embedding_model()
+        model.embed_query("warmup")
+        store = self.get_store(persist_dir)
+        lexical = self.get_lexical(persist_dir)
+        if len(lexical) == 0 and store.count() > 0:
+            # Store indexed before the lexical index existed
+            build_from_store(lexical, store)
+        self.started_at = time.time()
+        LOG.info("Registry started (rss=%s MB)", current_rss_mb())
+
+    def close(self):
+        """
+        Drop all cached stores and models and release the Chroma clients.
+        """
+        with self._lock:
+            for store in self._stores.values():
+                store.close()
+            self._stores.clear()
+            self._clients.clear()
+            for manifest in self._manifests.values():
+                manifest.close()
+            self._manifests.clear()
+            doc_indexes.clear()
+            for lexical in self._lexical.values():
+                lexical.close()
+            self._lexical.clear()
+            for model in self._models.values():
+                if hasattr(model, "close"):
+                    model.close()
+            self._models.clear()
+            self._stats = {"models": {}, "stores": {}}
+            self.started_at = None
+            chromadb.api.client.SharedSystemClient.clear_system_cache()
+        LOG.info("Registry closed")
+
+    # -----------------------------
+    # Embedding models
+    # -----------------------------
+    def get_embedding_model(self, model_name: str = None):
+        model_name = model_name or self.default_model
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            if model_name not in self._models:
+                rss_before = current_rss_mb()
+                start = time.perf_counter()
+                self._models[model_name] = load_embedding_model(model_name)
+                self._stats["models"][model_name] = {
+                    "load_seconds": round(time.perf_counter() - start, 3),
+                    "rss_before_mb": rss_before,
+                    "rss_after_mb": current_rss_mb(),
+                }
+                LOG.info("Loaded embedding model %s", model_name)
+            return self._models[model_name]
+
+    def register_embedding_model(self, model, model_name: str = None):
+        """
+        Install an already-built embedding model (e.g. a lightweight one for benchmarks).
+        """
+        model_name = model_name or self.default_model
+        with self._lock:
+            self._models[model_name] = model
+            self._stats["models"][model_name] = {"load_seconds": 0.0, "registered": True}
+
+    # -----------------------------
+    # Vector stores
+    # -----------------------------
+    def get_store(self, persist_dir: str = "chroma_db", embedding_model=None) -> VectorIndex:
+        """
+        Return the shared vector index for persist_dir, opening it on first use.
+        """
+        if embedding_model is self._models.get(self.default_model):
+            embedding_model = None
+        if embedding_model is None:
+            store = self._stores.get(persist_dir)
+            if store is not None:
+                return store
+
+        with self._lock:
+            if embedding_model is not None:
+                if config.VECTOR_BACKEND != "chroma":
+                    raise ValueError("The local vector index only serves the default embedding model")
+                # Caller-supplied model: reuse the client, build a dedicated wrapper
+                return ChromaIndex(Chroma(client=self._get_client(persist_dir), embedding_function=embedding_model))
+
+            if persist_dir not in self._stores:
+                start = time.perf_counter()
+                if config.VECTOR_BACKEND == "local":
+                    store = LocalIndex(persist_dir, self.get_embedding_model())
+                elif config.VECTOR_BACKEND == "chroma":
+                    store = ChromaIndex(Chroma(client=self._get_client(persist_dir),
+                                               embedding_function=self.get_embedding_model()))
+                else:
+                    raise ValueError(f"Unknown vector backend: {config.VECTOR_BACKEND}")
+                self._stores[persist_dir] = store
+                self._stats["stores"][persist_dir] = {
+                    "backend": store.backend,
+                    "open_seconds": round(time.perf_counter() - start, 3),
+                }
+            return self._stores[persist_dir]
+
+    def get_manifest(self, persist_dir: str = "chroma_db") -> DocumentManifest:
+        """
+        Return the shared document manifest stored alongside persist_dir.
+        """
+        manifest = self._manifests.get(persist_dir)
+        if manifest is not None:
+            return manifest
+        with self._lock:
+            if persist_dir not in self._manifests:
+                self._manifests[persist_dir] = DocumentManifest(persist_dir)
+            return self._manifests[persist_dir]
+
+    def get_lexical(self, persist_dir: str = "chroma_db") -> LexicalIndex:
+        """
+        Return the shared BM25 index stored alongside persist_dir.
+        """
+        lexical = self._lexical.get(persist_dir)
+        if lexical is not None:
+            return lexical
+        with self._lock:
+            if persist_dir not in self._lexical:
+                self._lexical[persist_dir] = LexicalIndex(persist_dir)
+            return self._lexical[persist_dir]
+
+    def _get_client(self, persist_dir: str):
+        if persist_dir not in self._clients:
+            self._clients[persist_dir] = chromadb.PersistentClient(path=persist_dir)
+        return self._clients[persist_dir]
+
+    # -----------------------------
+    # Reporting
+    # -----------------------------
+    def stats(self):
+        with self._lock:
+            return {
+                "started": self.started_at is not None,
+                "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else None,
+                "rss_mb": current_rss_mb(),
+                "models": {
+                    name: dict(info, **self._models[name].stats())
+                    if hasattr(self._models.get(name), "stats") else dict(info)
+                    for name, info in self._stats["models"].items()
+                },
+                "stores": {d: dict(info, **self._stores[d].stats()) if d in self._stores else dict(info)
+                           for d, info in self._stats["stores"].items()},
+                "lexical": {d: index.stats() for d, index in self._lexical.items()},
+                "doc_indexes": doc_indexes.stats(),
+            }
+
+
+registry = ModelRegistry()
@@ -1,32 +1,177 @@
-from sentence_transformers import CrossEncoder
+# backend/app/core/reranker.py
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
 from langchain_core.documents import Document
 
-# Lightweight reranker using cross-encoder
-model = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+from app.core import config
+from app.core.batching import MicroBatcher
+
+LOG = logging.getLogger("intellidoc.reranker")
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+def _key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class RerankerService:
+    """
+    Shared cross-encoder for reranking retrieved chunks.
 
-def rerank(docs, question, top_k=3):
+    The model is loaded on first use or in the background from the app lifespan, so
+    importing the routes never waits for it. (question, chunk) pairs from concurrent
+    requests are merged into one `predict` call by a MicroBatcher, and scores are kept
+    in an LRU cache keyed by (question hash, chunk id) so repeated questions over the
+    same chunks skip the model. Chunk text is truncated to `max_chars` before scoring;
+    the model would truncate to its token limit anyway.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, max_batch: int = None, max_wait_ms: float = None,
+                 cache_size: int = None, max_chars: int = None, device: str = None):
+        self.model_name = model_name
+        self.max_batch = max_batch or config.RERANK_MAX_BATCH
+        self.max_wait_ms = config.RERANK_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+        self.cache_size = config.RERANK_CACHE_SIZE if cache_size is None else cache_size
+        self.max_chars = max_chars or config.RERANK_MAX_CHARS
+        self.device = device or config.EMBED_DEVICE
+        self._model = None
+        self._load_error = None
+        self._load_seconds = None
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self.batcher = MicroBatcher(self._predict, max_batch=self.max_batch, max_wait_ms=self.max_wait_ms,
+                                    name="rerank")
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def load(self):
+        """
+        Load the cross-encoder if it is not loaded yet (blocking, thread-safe).
+        """
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                start = time.perf_counter()
+                try:
+                    self._model = CrossEncoder(self.model_name, device=self.device)
+                except Exception as e:
+                    self._load_error = str(e)
+                    raise
+                self._load_seconds = round(time.perf_counter() - start, 3)
+                self._load_error = None
+                LOG.info("Loaded reranker %s in %.1fs", self.model_name, self._load_seconds)
+        return self._model
+
+    def start_background(self):
+        """
+        Load the model on a daemon thread; requests arriving earlier wait for it.
+        """
+        def _load():
+            try:
+                self.load()
+            except Exception:
+                LOG.exception("Background reranker load failed; will retry on first use")
+
+        threading.Thread(target=_load, name="rerank-load", daemon=True).start()
+        self.batcher.start()
+        return self
+
+    def close(self):
+        self.batcher.close()
+        with self._cache_lock:
+            self._cache.clear()
+
+    # -----------------------------
+    # Scoring
+    # -----------------------------
+    def _predict(self, pairs):
+        model = self.load()
+        return list(model.predict(pairs, batch_size=self.max_batch, show_progress_bar=False))
+
+    def score(self, question: str, docs: List[Document]) -> List[float]:
+        """
+        Cross-encoder score per document, from the cache where possible.
+        """
+        qkey = _key(question)
+        keys = [(qkey, d.id or _key(d.page_content)) for d in docs]
+        scores = [None] * len(docs)
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+        missing = [i for i, s in enumerate(scores) if s is None]
+        with self._cache_lock:
+            self._hits += len(docs) - len(missing)
+            self._misses += len(missing)
+        if missing:
+            pairs = [(question, docs[i].page_content[:self.max_chars]) for i in missing]
+            fresh = self.batcher.submit(pairs).result()
+            with self._cache_lock:
+                for i, s in zip(missing, fresh):
+                    scores[i] = float(s)
+                    if self.cache_size:
+                        self._cache[keys[i]] = scores[i]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores
+
+    def rerank(self, docs, question: str, top_k: int = 3, prune_to: Optional[int] = None) -> List[Document]:
+        """
+        Re-rank documents (best retrieval rank first) by cross-encoder relevance.
+        With prune_to, only the first prune_to candidates are cross-encoded.
+        """
+        docs = [d if isinstance(d, Document) else Document(page_content=d) for d in docs]
+        if prune_to:
+            docs = docs[:prune_to]
+        if not docs:
+            return []
+        scores = self.score(question, docs)
+        ranked = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)
+        return [d for d, _ in ranked[:top_k]]
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            lookups = self._hits + self._misses
+            cache = {"entries": len(self._cache), "max_entries": self.cache_size, "hits": self._hits,
+                     "misses": self._misses, "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0}
+        return {
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "load_seconds": self._load_seconds,
+            "load_error": self._load_error,
+            "batching": self.batcher.stats(),
+            "cache": cache,
+        }
+
+
+reranker = RerankerService()
+
+
+def rerank(docs, question, top_k=3, prune_to=None):
     """
     Re-rank a list of documents (Document objects or strings) by relevance to a question.
 
     Args:
-        docs (list): List of Document objects or plain text strings.
+        docs (list): List of Document objects or plain text strings, best retrieval rank first.
         question (str): The query string.
         top_k (int): Number of top documents to return.
+        prune_to (int): Cross-encode only the first prune_to candidates (optional).
 
     Returns:
         List[Document]: Top-k reranked Document objects.
     """
-    # Ensure all docs are Document objects
-    docs = [d if isinstance(d, Document) else Document(page_content=d) for d in docs]
-
-    # Prepare input pairs for CrossEncoder scoring
-    pairs = [(question, d.page_content) for d in docs]
-
-    # Get relevance scores
-    scores = model.predict(pairs)
-
-    # Rank documents by score (descending)
-    ranked = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)
-
-    # Return top-k Document objects
-    return [d for d, _ in ranked[:top_k]]
+    return reranker.rerank(docs, question, top_k=top_k, prune_to=prune_to)
@@ -0,0 +1,69 @@
+# backend/app/core/retrieval.py
+import logging
+from collections import defaultdict
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from app.core import config
+from app.core.doc_index import doc_indexes
+from app.core.registry import registry
+
+LOG = logging.getLogger("intellidoc.retrieval")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = None) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked id lists: each id scores sum(1 / (k + rank)) over the lists it appears in.
+    Returns (id, score) best first; ties keep first-seen order.
+    """
+    k = config.RRF_K if k is None else k
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def dense_search(question: str, k: int, source: Optional[str] = None, persist_dir: str = "chroma_db",
+                 embedding: Optional[List[float]] = None) -> List[Document]:
+    """
+    Top-k chunks by embedding similarity. Pass `embedding` when the question vector is
+    already known (e.g. from the answer cache lookup) to skip embedding it again.
+    With a source, only that document's vectors are scanned (its sub-index) when the
+    manifest knows its chunks and they fit the sub-index cache; otherwise the vector
+    index filters by source.
+    """
+    db = registry.get_store(persist_dir)
+    if source is not None and config.DOC_INDEX_CACHE_MB > 0:
+        if embedding is None:
+            embedding = db.embedding.embed_query(question)
+        docs = doc_indexes.search(persist_dir, db, registry.get_manifest(persist_dir), source, embedding, k)
+        if docs is not None:
+            return docs
+    if embedding is not None:
+        return db.similarity_search_by_vector(embedding, k=k, source=source)
+    return db.similarity_search(question, k=k, source=source)
+
+
+def hybrid_search(question: str, k: int = 3, source: Optional[str] = None, persist_dir: str = "chroma_db",
+                  fetch_k: int = None, embedding: Optional[List[float]] = None) -> List[Document]:
+    """
+    Top-k chunks for a question from the dense (vector index) and lexical (BM25) rankings,
+    fused with reciprocal rank fusion. Each ranking contributes fetch_k candidates;
+    both honour the optional source filter.
+    """
+    fetch_k = max(fetch_k or config.RETRIEVAL_FETCH_K, k)
+    dense = dense_search(question, fetch_k, source, persist_dir, embedding)
+    lexical = registry.get_lexical(persist_dir).search(question, k=fetch_k, source=source)
+
+    by_id = {d.id: d for d in dense if d.id}
+    fused = reciprocal_rank_fusion([[d.id for d in dense if d.id], [chunk_id for chunk_id, _ in lexical]])[:k]
+
+    missing = [chunk_id for chunk_id, _ in fused if chunk_id not in by_id]
+    if missing:
+        for doc in registry.get_store(persist_dir).get(missing):
+            by_id[doc.id] = doc
+
+    LOG.debug("hybrid: %d dense, %d lexical, %d fused", len(dense), len(lexical), len(fused))
+    return [by_id[chunk_id] for chunk_id, _ in fused if chunk_id in by_id]
@@ -10,3 +10,29 @@ def score_risk(missing_clauses, severity_map=None):
     max_possible = sum(severity_map.values())
     scaled = int((score / max_possible) * 10)
     return min(max(scaled,1),10)
+
+
+def severity_map_from_rules(rules):
+    # clause -> "severity" from the rule JSON (clauses without one weigh 1)
+    return {clause: info.get("severity", 1) for clause, info in rules["clauses"].items()}
+
+
+def risk_level(score):
+    if score >= 7:
+        return "high"
+    if score >= 4:
+        return "medium"
+    return "low"
+
+
+def assess_rule_check(rule_check, rules):
+    # risk of one run_rule_check result, weighted by the rule set's clause severities
+    severity_map = severity_map_from_rules(rules)
+    missing = [c for c, r in rule_check["results"].items() if r["status"] == "missing"]
+    score = score_risk(missing, severity_map)
+    return {
+        "score": score,
+        "level": risk_level(score),
+        "missing": missing,
+        "missing_severity": {c: severity_map.get(c, 1) for c in missing},
+    }
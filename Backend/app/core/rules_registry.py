@@ -0,0 +1,109 @@
+# backend/app/core/rules_registry.py
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from app.core.clause_matcher import ClauseMatcher
+
+LOG = logging.getLogger("intellidoc.rules")
+
+
+class RulesRegistry:
+    """
+    Rule sets from a directory of <document_type>.json files, parsed and compiled into
+    ClauseMatchers once and kept in memory. Every lookup compares the file mtimes with
+    what was loaded, so edited, added or removed rule files are picked up on the next
+    request without a restart.
+
+    Besides one matcher per document type, the registry keeps a combined matcher over
+    all rule sets (clauses keyed by (document_type, clause)) so a keyword shared by
+    several types is searched for once per document, and a per-keyword weight (1 / number of rule sets
+    using it) that makes type-specific keywords count more during detection.
+    """
+
+    def __init__(self, rules_path: Path):
+        self.rules_path = Path(rules_path)
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Tuple[int, dict, ClauseMatcher]] = {}
+        self._combined = None  # (signature, ClauseMatcher, keyword weights)
+        self.reloads = 0
+
+    def _mtimes(self) -> Dict[str, int]:
+        return {p.stem: p.stat().st_mtime_ns for p in self.rules_path.glob("*.json")}
+
+    def _load(self, document_type: str, mtime: int):
+        rule_file = self.rules_path / f"{document_type}.json"
+        with open(rule_file, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+        entry = (mtime, rules, ClauseMatcher(rules["clauses"]))
+        if document_type in self._entries:
+            self.reloads += 1
+            LOG.info("Reloaded rules for %s", document_type)
+        self._entries[document_type] = entry
+        return entry
+
+    def get(self, document_type: str) -> Tuple[dict, ClauseMatcher]:
+        """
+        Returns (rules, ClauseMatcher) for a document type, reloading it if the rule file
+        changed since it was compiled.
+        """
+        rule_file = self.rules_path / f"{document_type}.json"
+        try:
+            mtime = rule_file.stat().st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._entries.pop(document_type, None)
+            raise FileNotFoundError(f"No rules found for document type: {document_type}")
+        with self._lock:
+            entry = self._entries.get(document_type)
+            if entry is None or entry[0] != mtime:
+                entry = self._load(document_type, mtime)
+            return entry[1], entry[2]
+
+    def document_types(self) -> List[str]:
+        return sorted(self._mtimes())
+
+    def load_all(self) -> List[str]:
+        """
+        Compile every rule set and the combined matcher (called at startup).
+        """
+        self.combined()
+        return self.document_types()
+
+    def combined(self):
+        """
+        Returns ({document_type: rules}, combined ClauseMatcher, {keyword: weight}),
+        rebuilt whenever any rule file is added, removed or modified.
+        """
+        mtimes = self._mtimes()
+        signature = tuple(sorted(mtimes.items()))
+        with self._lock:
+            if self._combined is not None and self._combined[0] == signature:
+                return self._combined[1:]
+            for gone in set(self._entries) - set(mtimes):
+                del self._entries[gone]
+            all_rules, clause_rules, types_for = {}, {}, {}
+            for document_type, mtime in sorted(mtimes.items()):
+                entry = self._entries.get(document_type)
+                if entry is None or entry[0] != mtime:
+                    entry = self._load(document_type, mtime)
+                rules = entry[1]
+                all_rules[document_type] = rules
+                for clause, info in rules["clauses"].items():
+                    clause_rules[(document_type, clause)] = info
+                    for kw in info["keywords"]:
+                        types_for.setdefault(kw.lower(), set()).add(document_type)
+            weights = {kw: 1.0 / len(types) for kw, types in types_for.items()}
+            self._combined = (signature, all_rules, ClauseMatcher(clause_rules), weights)
+            LOG.info("Compiled %d rule sets (%d keywords)", len(all_rules), len(weights))
+            return self._combined[1:]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rule_sets": sorted(self._entries),
+                "reloads": self.reloads,
+                "combined_keywords": len(self._combined[3]) if self._combined else 0,
+            }
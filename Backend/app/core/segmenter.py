@@ -0,0 +1,90 @@
+# backend/app/core/segmenter.py
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# A heading starts a line and is either numbered ("1.", "4.2", "12.3.1)", "(a)"),
+# introduced by a keyword ("Section 5", "ARTICLE IV", "Clause 7:", "Schedule 2"),
+# or a short ALL-CAPS title line ("GOVERNING LAW"). Anchored on the preceding newline
+# rather than ^ so the scan can jump between newlines; offset 0 always starts a section.
+HEADING_RE = re.compile(
+    r"\n[ \t]*(?:"
+    r"\d{1,3}(?:\.\d{1,3})*[.)](?=\s)"
+    r"|\(\w{1,4}\)(?=\s)"
+    r"|(?i:section|article|clause|schedule|annexure)\s+[\dIVXLCivxlc]+[.:)]?(?=\s|$)"
+    r"|[A-Z][A-Z0-9 ,&'/()-]{2,60}$"
+    r")",
+    re.MULTILINE,
+)
+
+
+@dataclass
+class Section:
+    index: int
+    title: str
+    start: int
+    end: int
+    page: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        return {"section": self.index, "title": self.title, "start": self.start,
+                "end": self.end, "page": self.page}
+
+
+class SectionIndex:
+    """
+    Sections of a document's text, split once at numbered / titled headings, with an
+    offset index so any character offset (e.g. a keyword hit) maps to its section and
+    page by binary search. Only the section start offsets are kept; Section objects
+    are built on first access, so a long document costs one heading scan.
+    """
+
+    def __init__(self, text: str, starts: List[int], pages: Sequence[Tuple[int, int]] = ()):
+        self.text = text
+        self._starts = starts
+        self._page_starts = [offset for offset, _ in pages]
+        self._page_numbers = [page for _, page in pages]
+        self._sections = {}
+
+    def __len__(self):
+        return len(self._starts)
+
+    def section(self, i: int) -> Section:
+        section = self._sections.get(i)
+        if section is None:
+            start = self._starts[i]
+            end = self._starts[i + 1] if i + 1 < len(self._starts) else len(self.text)
+            line_end = self.text.find("\n", start, end)
+            title = self.text[start:line_end if line_end >= 0 else end].strip()[:120]
+            section = self._sections[i] = Section(i, title, start, end, self.page_at(start))
+        return section
+
+    @property
+    def sections(self) -> List[Section]:
+        return [self.section(i) for i in range(len(self._starts))]
+
+    def section_at(self, offset: int) -> Section:
+        return self.section(max(bisect_right(self._starts, offset) - 1, 0))
+
+    def page_at(self, offset: int) -> Optional[int]:
+        if not self._page_starts:
+            return None
+        return self._page_numbers[max(bisect_right(self._page_starts, offset) - 1, 0)]
+
+    def sections_for(self, offsets: Iterable[int]) -> List[Section]:
+        """
+        The distinct sections containing the given offsets, in document order.
+        """
+        indexes = {max(bisect_right(self._starts, offset) - 1, 0) for offset in offsets}
+        return [self.section(i) for i in sorted(indexes)]
+
+
+def segment_text(text: str, pages: Sequence[Tuple[int, int]] = ()) -> SectionIndex:
+    """
+    Split text into sections at heading lines. Text before the first heading becomes a
+    preamble section; text with no headings is one section. `pages` is an optional
+    sorted list of (page_offset, page_number) for the pages the text was joined from.
+    """
+    starts = [0] + [m.start() + 1 for m in HEADING_RE.finditer(text)]
+    return SectionIndex(text, starts, pages)
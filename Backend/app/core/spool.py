@@ -0,0 +1,130 @@
+# backend/app/core/spool.py
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from typing import List
+
+from app.core import config
+
+LOG = logging.getLogger("intellidoc.spool")
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds INTELLIDOC_UPLOAD_MAX_MB."""
+
+
+@dataclass
+class SpooledUpload:
+    """
+    An upload written to a temp file; parse it from `path` and call cleanup() when done.
+    `id` tells uploads apart when their filenames collide.
+    """
+    filename: str
+    path: str
+    size: int
+    sha256: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def cleanup(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
+async def spool_upload(file, max_bytes: int = None, chunk_size: int = None) -> SpooledUpload:
+    """
+    Stream an UploadFile to a temp file in fixed-size chunks, hashing as it goes, so
+    only one chunk of the upload is in memory at a time.
+    """
+    max_bytes = max_bytes or config.UPLOAD_MAX_MB * 1024 * 1024
+    chunk_size = chunk_size or config.UPLOAD_CHUNK_KB * 1024
+
+    fd, path = tempfile.mkstemp(prefix="intellidoc-", suffix=".pdf", dir=config.SPOOL_DIR)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return SpooledUpload(filename=file.filename, path=path, size=size, sha256=digest.hexdigest())
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_zip(upload: SpooledUpload) -> bool:
+    return upload.filename.lower().endswith(".zip") or zipfile.is_zipfile(upload.path)
+
+
+def unpack_zip(upload: SpooledUpload, max_bytes: int = None, chunk_size: int = None,
+               max_files: int = None, max_total_bytes: int = None) -> List[SpooledUpload]:
+    """
+    Spool every PDF inside a zip upload to its own temp file, streaming each member in
+    chunks. The per-file size limit, the member count (max_files) and the total
+    decompressed size (max_total_bytes) are enforced while streaming, so a zip bomb is
+    stopped before it fills the disk. Members are named "<zip name>/<member path>".
+    """
+    max_bytes = max_bytes or config.UPLOAD_MAX_MB * 1024 * 1024
+    chunk_size = chunk_size or config.UPLOAD_CHUNK_KB * 1024
+    max_files = config.BATCH_MAX_FILES if max_files is None else max_files
+    max_total_bytes = config.BATCH_MAX_TOTAL_MB * 1024 * 1024 if max_total_bytes is None else max_total_bytes
+
+    members, total = [], 0
+    try:
+        with zipfile.ZipFile(upload.path) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(".pdf"):
+                    continue
+                if len(members) >= max_files:
+                    raise UploadTooLarge(f"{upload.filename} holds more than {max_files} PDFs")
+                fd, path = tempfile.mkstemp(prefix="intellidoc-", suffix=".pdf", dir=config.SPOOL_DIR)
+                member = SpooledUpload(filename=f"{upload.filename}/{info.filename}", path=path, size=0, sha256="")
+                members.append(member)
+                digest = hashlib.sha256()
+                with zf.open(info) as src, os.fdopen(fd, "wb") as out:
+                    for chunk in iter(lambda: src.read(chunk_size), b""):
+                        member.size += len(chunk)
+                        total += len(chunk)
+                        if member.size > max_bytes:
+                            raise UploadTooLarge(
+                                f"{info.filename} exceeds {max_bytes // (1024 * 1024)} MB limit"
+                            )
+                        if total > max_total_bytes:
+                            raise UploadTooLarge(
+                                f"{upload.filename} exceeds {max_total_bytes // (1024 * 1024)} MB uncompressed"
+                            )
+                        digest.update(chunk)
+                        out.write(chunk)
+                member.sha256 = digest.hexdigest()
+    except BaseException:
+        for member in members:
+            member.cleanup()
+        raise
+    return members
@@ -0,0 +1,62 @@
+# backend/app/core/tenants.py
+import os
+import re
+from typing import List, Optional
+
+from app.core import config
+
+# Where the default tenant's collection lives (the single-tenant layout)
+DEFAULT_PERSIST_DIR = "chroma_db"
+
+TENANT_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class UnknownTenant(LookupError):
+    """A tenant with no collection on disk."""
+
+
+def tenant_dir(tenant: Optional[str] = None) -> str:
+    """
+    Persist dir of `tenant`'s collection. No tenant (or INTELLIDOC_DEFAULT_TENANT) maps to
+    chroma_db; any other name to TENANTS_DIR/<tenant>. Names are letters, digits, "_" and
+    "-" (at most 64), so a tenant can never reach another one's files.
+    """
+    if not tenant or tenant == config.DEFAULT_TENANT:
+        return DEFAULT_PERSIST_DIR
+    if not TENANT_RE.fullmatch(tenant):
+        raise ValueError(f"Invalid tenant name: {tenant!r}")
+    return os.path.join(config.TENANTS_DIR, tenant)
+
+
+def existing_tenant_dir(tenant: Optional[str] = None) -> str:
+    """
+    tenant_dir of a tenant that already has a collection on disk (the default tenant
+    always does). Every tenant-scoped route uses this, so an arbitrary X-Tenant opens
+    no store, manifest or BM25 index and creates no directory: the handles held open
+    stay bounded by the tenants an admin has created.
+    """
+    path = tenant_dir(tenant)
+    if path != DEFAULT_PERSIST_DIR and not os.path.isdir(path):
+        raise UnknownTenant(f"Unknown tenant: {tenant!r}")
+    return path
+
+
+def create_tenant(tenant: str) -> str:
+    """
+    Create the collection directory of `tenant` (a no-op when it exists) and return
+    its tenant_dir. Ingest and query routes accept the tenant from then on.
+    """
+    path = tenant_dir(tenant)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def list_tenants() -> List[str]:
+    """
+    Tenants with a collection on disk, the default tenant first.
+    """
+    tenants = [config.DEFAULT_TENANT] if os.path.isdir(DEFAULT_PERSIST_DIR) else []
+    if os.path.isdir(config.TENANTS_DIR):
+        tenants += sorted(name for name in os.listdir(config.TENANTS_DIR)
+                          if TENANT_RE.fullmatch(name) and os.path.isdir(os.path.join(config.TENANTS_DIR, name)))
+    return tenants
@@ -0,0 +1,770 @@
+# backend/app/core/vector_index.py
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.core import config
+
+LOG = logging.getLogger("intellidoc.vector_index")
+
+LOCAL_VECTORS_FILE = "vectors.f32"
+LOCAL_CHUNKS_FILE = "vectors.sqlite3"
+LOCAL_CENTROIDS_FILE = "ivf_centroids.npy"
+# Compact codes scanned instead of the float32 matrix: (file, dtype, bytes per row for `dim`)
+LOCAL_CODES = {
+    "int8": ("vectors.i8", np.int8, lambda dim: dim),
+    "binary": ("vectors.b1", np.uint8, lambda dim: (dim + 7) // 8),
+}
+# int8 code of a component: round(x * 127). Components of L2-normalized vectors lie in
+# [-1, 1], so one fixed scale covers every vector the index will hold; a scale taken
+# from the data seen first would clip later vectors with larger components.
+INT8_SCALE = 127.0
+
+# Rows scored per matrix product in an exact scan
+SCAN_BLOCK_ROWS = 65_536
+# Rows per block when scanning codes (int8 codes are widened to float32 per block, which
+# is fastest while the block stays in cache)
+CODE_SCAN_BLOCK_ROWS = 1024
+# IVF training: k-means over up to this many sampled rows per list, for this many rounds
+IVF_SAMPLE_PER_LIST = 64
+IVF_ITERATIONS = 10
+# Retrain the IVF lists once the index has grown this much since the last training
+IVF_RETRAIN_GROWTH = 2.0
+
+# Set bits per byte value, for NumPy < 2 (no np.bitwise_count, which also takes 64-bit words)
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+_popcount = getattr(np, "bitwise_count", _POPCOUNT.__getitem__)
+_POPCOUNT_WORDS = hasattr(np, "bitwise_count")
+
+
+class VectorIndex(ABC):
+    """
+    What the app needs from a vector store, whatever the backend: add embedded chunks
+    under stable ids, delete by id or by source, filtered top-k search, fetch chunks by
+    id or source, count and list sources. Chunks come back as Documents with `id` set.
+    Each backend implements the abstract methods; search by text, close and stats have
+    defaults.
+    """
+
+    backend = ""
+
+    def __init__(self, embedding):
+        self.embedding = embedding
+
+    # Writes
+    @abstractmethod
+    def add_documents(self, documents: List[Document], ids: List[str] = None):
+        """
+        Embed and store documents under ids (random ids when None), replacing existing ids.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_vectors(self, ids: List[str], vectors, documents: List[Document]):
+        """
+        Store precomputed (L2-normalized) vectors for documents under ids.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_source(self, source: str, ids: Sequence[str] = None, keep: Sequence[str] = ()) -> int:
+        """
+        Delete every chunk of `source` (plus `ids`, when known) except those in `keep`;
+        returns the number deleted.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def reset(self):
+        raise NotImplementedError
+
+    # Reads
+    def similarity_search(self, query: str, k: int = 4, source: Optional[str] = None) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k, source)
+
+    @abstractmethod
+    def similarity_search_by_vector(self, embedding, k: int = 4, source: Optional[str] = None) -> List[Document]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, ids: Sequence[str]) -> List[Document]:
+        """
+        The stored chunks for `ids`, in that order; unknown ids are skipped.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_vectors(self, ids: Sequence[str]):
+        """
+        (found ids, float32 matrix with one row per found id); unknown ids are skipped.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_source(self, source: str) -> List[Document]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_documents(self, batch_size: int = 1000) -> Iterator[List[Document]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def count(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def sources(self) -> List[str]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, "chunks": self.count()}
+
+
+def _documents(ids, texts, metadatas) -> List[Document]:
+    return [Document(id=i, page_content=t, metadata=m or {}) for i, t, m in zip(ids, texts, metadatas)]
+
+
+# -----------------------------
+# Chroma (SQLite + HNSW)
+# -----------------------------
+class ChromaIndex(VectorIndex):
+    """
+    The langchain-chroma store behind the VectorIndex interface.
+    """
+
+    backend = "chroma"
+
+    def __init__(self, db):
+        super().__init__(db.embeddings)
+        self.db = db
+        self._collection = db._collection
+
+    def add_documents(self, documents, ids=None):
+        if documents:
+            self.db.add_documents(documents, ids=ids)
+
+    def add_vectors(self, ids, vectors, documents):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        step = self.db._client.get_max_batch_size()
+        for i in range(0, len(ids), step):
+            self._collection.upsert(ids=list(ids[i:i + step]), embeddings=vectors[i:i + step],
+                                    documents=[d.page_content for d in documents[i:i + step]],
+                                    metadatas=[d.metadata or None for d in documents[i:i + step]])
+
+    def delete(self, ids):
+        if ids:
+            self._collection.delete(ids=list(ids))
+
+    def delete_source(self, source, ids=None, keep=()):
+        ids = set(ids or [])
+        # Pre-manifest copies of the source have random ids; catch them via metadata
+        ids.update(self._collection.get(where={"source": source}, include=[])["ids"])
+        ids.difference_update(keep)
+        self.delete(ids)
+        return len(ids)
+
+    def reset(self):
+        self.db.reset_collection()
+        self._collection = self.db._collection
+
+    def similarity_search(self, query, k=4, source=None):
+        return self.db.similarity_search(query, k=k, filter={"source": source} if source else None)
+
+    def similarity_search_by_vector(self, embedding, k=4, source=None):
+        return self.db.similarity_search_by_vector(embedding, k=k, filter={"source": source} if source else None)
+
+    def get(self, ids):
+        if not ids:
+            return []
+        data = self._collection.get(ids=list(ids), include=["documents", "metadatas"])
+        found = {d.id: d for d in _documents(data["ids"], data["documents"], data["metadatas"])}
+        return [found[i] for i in ids if i in found]
+
+    def get_vectors(self, ids):
+        found, vectors = [], []
+        step = self.db._client.get_max_batch_size()
+        ids = list(ids)
+        for i in range(0, len(ids), step):
+            data = self._collection.get(ids=ids[i:i + step], include=["embeddings"])
+            found += data["ids"]
+            vectors.append(np.asarray(data["embeddings"], dtype=np.float32).reshape(len(data["ids"]), -1))
+        return found, np.vstack(vectors) if found else np.zeros((0, 0), dtype=np.float32)
+
+    def get_source(self, source):
+        data = self._collection.get(where={"source": source}, include=["documents", "metadatas"])
+        return _documents(data["ids"], data["documents"], data["metadatas"])
+
+    def iter_documents(self, batch_size=1000):
+        offset = 0
+        while True:
+            data = self._collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not data["ids"]:
+                return
+            yield _documents(data["ids"], data["documents"], data["metadatas"])
+            offset += batch_size
+
+    def count(self):
+        return self._collection.count()
+
+    def sources(self):
+        sources, offset = set(), 0
+        while True:
+            data = self._collection.get(include=["metadatas"], limit=5000, offset=offset)
+            if not data["ids"]:
+                return sorted(sources)
+            sources.update((m or {}).get("source", "") for m in data["metadatas"])
+            offset += 5000
+
+
+# -----------------------------
+# Local memory-mapped matrix
+# -----------------------------
+class LocalIndex(VectorIndex):
+    """
+    In-process index over one memory-mapped float32 matrix (vectors.f32, one row per
+    chunk) with chunk ids, text and metadata in SQLite (vectors.sqlite3). Rows freed by
+    deletes are reused once no search that started before the delete is still running
+    (searches score rows without the lock); the in-memory state is one alive flag per row
+    plus the set of rows of each source, so a source filter scores only that source's rows.
+
+    Search is by inner product (the embedding model L2-normalizes). "exact" scans the
+    matrix in blocks; "ivf" clusters the rows with spherical k-means once there are
+    LOCAL_IVF_MIN_ROWS of them and scans only the LOCAL_IVF_NPROBE lists nearest to the
+    query (falling back to exact below the threshold and for source-filtered queries).
+
+    With codes "int8" (one byte per dimension, see INT8_SCALE) or "binary"
+    (sign bits compared by Hamming distance) the scan reads a compact copy of the matrix
+    instead; the best k * rescore candidates are then rescored with their float32 rows,
+    which are paged in from the memory map only for those candidates.
+    """
+
+    backend = "local"
+
+    def __init__(self, persist_dir: str = "chroma_db", embedding=None, search: str = None,
+                 ivf_min_rows: int = None, nprobe: int = None, codes: str = None, rescore: int = None):
+        super().__init__(embedding)
+        os.makedirs(persist_dir, exist_ok=True)
+        self.vectors_path = os.path.join(persist_dir, LOCAL_VECTORS_FILE)
+        self.centroids_path = os.path.join(persist_dir, LOCAL_CENTROIDS_FILE)
+        self.search_mode = search or config.LOCAL_INDEX_SEARCH
+        if self.search_mode not in ("exact", "ivf"):
+            raise ValueError(f"Unknown local index search: {self.search_mode}")
+        self.ivf_min_rows = config.LOCAL_IVF_MIN_ROWS if ivf_min_rows is None else ivf_min_rows
+        self.nprobe = nprobe or config.LOCAL_IVF_NPROBE
+        self.codes = codes or config.LOCAL_INDEX_CODES
+        if self.codes != "float32" and self.codes not in LOCAL_CODES:
+            raise ValueError(f"Unknown local index codes: {self.codes}")
+        self.rescore = rescore or config.LOCAL_RESCORE_FACTOR
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(persist_dir, LOCAL_CHUNKS_FILE),
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY, chunk_id TEXT UNIQUE NOT NULL, source TEXT NOT NULL,
+                text TEXT NOT NULL, metadata TEXT NOT NULL, list INTEGER);
+            CREATE INDEX IF NOT EXISTS chunks_source ON chunks(source);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        self.dim = int(meta["dim"]) if "dim" in meta else None
+        self._trained_rows = int(meta.get("ivf_trained_rows", 0))
+        # Codes written by an index opened with other codes are stale: re-encode. So are
+        # int8 codes from before INT8_SCALE, which recorded a data-dependent scale.
+        stale_codes = meta.get("codes", "float32") != self.codes or "int8_scale" in meta
+        self._vectors = None
+        self._codes = None
+        self._capacity = 0
+        self._centroids = None
+        self._epoch = 0  # bumped by every batch of freed rows
+        self._readers = {}  # epoch -> searches (and trainings) started at it, still running
+        self._retired = []  # (epoch, rows) freed but possibly still read by older searches
+        self._touched = None  # rows written while the IVF lists are retrained
+        self._load()
+        if stale_codes:
+            self._encode_all()
+
+    def _load(self):
+        """
+        Rebuild the in-memory row state from SQLite (the source of truth) and map the matrix.
+        """
+        rows = self._db.execute("SELECT row, source, list FROM chunks").fetchall()
+        self._size = max((r for r, _, _ in rows), default=-1) + 1
+        if self.dim is not None:
+            self._map(max(self._size, 1024))
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._by_source = {}
+        self._lists = {}
+        for row, source, lst in rows:
+            self._alive[row] = True
+            self._by_source.setdefault(source, set()).add(row)
+            if lst is not None:
+                self._lists.setdefault(lst, set()).add(row)
+        self._free = np.flatnonzero(~self._alive[:self._size]).tolist()
+        self._count = len(rows)
+        if self._lists and os.path.exists(self.centroids_path):
+            self._centroids = np.load(self.centroids_path)
+
+    def _map(self, capacity: int):
+        """
+        (Re)map the matrix with room for `capacity` rows, growing the file if needed.
+        Readers holding the previous map keep a valid view of the rows they saw.
+        """
+        self._vectors = self._memmap(self.vectors_path, np.float32, capacity, self.dim)
+        if self.codes != "float32":
+            name, dtype, width = LOCAL_CODES[self.codes]
+            self._codes = self._memmap(os.path.join(os.path.dirname(self.vectors_path), name),
+                                       dtype, capacity, width(self.dim))
+            if hasattr(mmap, "MADV_RANDOM"):
+                # Only rescoring reads the float32 rows, a few scattered ones per query:
+                # no read-ahead when they have to come from disk
+                self._vectors._mmap.madvise(mmap.MADV_RANDOM)
+        self._capacity = capacity
+        if hasattr(self, "_alive") and len(self._alive) < capacity:
+            self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+
+    @staticmethod
+    def _memmap(path: str, dtype, capacity: int, width: int) -> np.memmap:
+        size = capacity * width * np.dtype(dtype).itemsize
+        if not os.path.exists(path) or os.path.getsize(path) < size:
+            with open(path, "ab") as f:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=(capacity, width))
+
+    # -----------------------------
+    # Codes
+    # -----------------------------
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.codes == "binary":
+            return np.packbits(vectors > 0, axis=1)
+        return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+
+    def _encode_all(self):
+        """
+        (Re)write the codes of every row and record which codes the index holds.
+        """
+        if self.codes != "float32" and self._size:
+            start = time.perf_counter()
+            for i in range(0, self._size, SCAN_BLOCK_ROWS):
+                end = min(i + SCAN_BLOCK_ROWS, self._size)
+                self._codes[i:end] = self._encode(np.asarray(self._vectors[i:end]))
+            self._codes.flush()
+            LOG.info("Encoded %d vectors as %s codes in %.1fs", self._size, self.codes, time.perf_counter() - start)
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('codes', ?)", (self.codes,))
+            self._db.execute("DELETE FROM meta WHERE key = 'int8_scale'")
+
+    def _scores(self, vectors, codes, rows, query: np.ndarray, query_bits) -> np.ndarray:
+        """
+        Scores of `rows` (higher is nearer): inner products with the float32 vectors when
+        `codes` is None, else approximate ones from the codes (negated Hamming distance
+        for binary codes).
+        """
+        if codes is None:
+            return np.asarray(vectors[rows]) @ query
+        if self.codes == "binary":
+            block = codes[rows]
+            if _POPCOUNT_WORDS and block.shape[1] % 8 == 0:
+                block, query_bits = block.view(np.uint64), query_bits.view(np.uint64)
+            counts = _popcount(np.bitwise_xor(block, query_bits))
+            # Row sums as a matrix product: much faster than sum(axis=1) over a few columns
+            return -(counts @ np.ones(counts.shape[1], dtype=np.float32))
+        return codes[rows].astype(np.float32) @ query
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    def add_documents(self, documents, ids=None):
+        if not documents:
+            return
+        ids = ids or [str(uuid.uuid4()) for _ in documents]
+        texts = [d.page_content for d in documents]
+        if hasattr(self.embedding, "embed_array"):
+            vectors = self.embedding.embed_array(texts, use_cache=True)
+        else:
+            vectors = np.asarray(self.embedding.embed_documents(texts), dtype=np.float32)
+        self.add_vectors(ids, vectors, documents)
+
+    def add_vectors(self, ids, vectors, documents):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (str(self.dim),))
+                self._map(1024)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match the index ({self.dim})")
+
+            # Replaced ids keep their row; new ids take freed rows, then the end of the matrix
+            self._reclaim()
+            replaced = {cid: (row, source, lst) for cid, row, source, lst in self._select(
+                "SELECT chunk_id, row, source, list FROM chunks WHERE chunk_id IN ({})", ids)}
+            for row, source, lst in replaced.values():
+                self._forget(row, source, lst)
+            self._count -= len(replaced)
+            row_of = {}
+            for cid in ids:
+                if cid in row_of:
+                    continue
+                if cid in replaced:
+                    row_of[cid] = replaced[cid][0]
+                elif self._free:
+                    row_of[cid] = self._free.pop()
+                else:
+                    row_of[cid] = self._size
+                    self._size += 1
+            if self._size > self._capacity:
+                self._map(max(self._size, self._capacity * 2))
+
+            rows = np.array([row_of[cid] for cid in ids], dtype=np.int64)
+            if self._touched is not None:
+                self._touched.update(rows.tolist())
+            self._vectors[rows] = vectors
+            self._vectors.flush()
+            if self._codes is not None:
+                self._codes[rows] = self._encode(vectors)
+                self._codes.flush()
+            lists = self._assign(vectors) if self._centroids is not None else [None] * len(ids)
+            records = {}
+            for cid, row, doc, lst in zip(ids, rows.tolist(), documents, lists):
+                records[cid] = (row, cid, doc.metadata.get("source", ""), doc.page_content,
+                                json.dumps(doc.metadata), None if lst is None else int(lst))
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?)", records.values())
+            for row, _, source, _, _, lst in records.values():
+                self._alive[row] = True
+                self._by_source.setdefault(source, set()).add(row)
+                if lst is not None:
+                    self._lists.setdefault(lst, set()).add(row)
+            self._count += len(records)
+            train = self._should_train()
+        if train:
+            self._train()
+
+    def delete(self, ids):
+        with self._lock:
+            found = self._select("SELECT row, source, list FROM chunks WHERE chunk_id IN ({})", list(ids))
+            if not found:
+                return
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row, _, _ in found])
+            for row, source, lst in found:
+                self._forget(row, source, lst)
+            self._retire([row for row, _, _ in found])
+            self._count -= len(found)
+
+    def delete_source(self, source, ids=None, keep=()):
+        keep = set(keep)
+        with self._lock:
+            found = dict.fromkeys(r[1:] for r in self._db.execute(
+                "SELECT chunk_id, row, source, list FROM chunks WHERE source = ?", (source,)) if r[0] not in keep)
+            found.update(dict.fromkeys(r[1:] for r in self._select(
+                "SELECT chunk_id, row, source, list FROM chunks WHERE chunk_id IN ({})", list(ids or []))
+                if r[0] not in keep))
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row, _, _ in found])
+            for row, src, lst in found:
+                self._forget(row, src, lst)
+            self._retire([row for row, _, _ in found])
+            self._count -= len(found)
+            return len(found)
+
+    def reset(self):
+        with self._lock:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.execute("DELETE FROM chunks")
+                self._db.execute("DELETE FROM meta WHERE key IN ('ivf_trained_rows', 'int8_scale')")
+            self._alive[:] = False
+            self._by_source, self._lists = {}, {}
+            if self._readers:
+                # Searches still running read the old rows: retire them all
+                self._free, self._retired = [], []
+                self._retire(range(self._size - 1, -1, -1))
+            else:
+                self._free, self._retired, self._size = [], [], 0
+            self._count = self._trained_rows = 0
+            self._centroids = self._touched = None
+            if os.path.exists(self.centroids_path):
+                os.remove(self.centroids_path)
+
+    def _forget(self, row: int, source: str, lst: Optional[int]):
+        self._alive[row] = False
+        rows = self._by_source.get(source)
+        if rows is not None:
+            rows.discard(row)
+            if not rows:
+                del self._by_source[source]
+        if lst is not None and lst in self._lists:
+            self._lists[lst].discard(row)
+
+    def _retire(self, rows):
+        self._epoch += 1
+        self._retired.append((self._epoch, list(rows)))
+
+    def _reclaim(self):
+        """
+        Move retired rows to the free list once every search that started before they
+        were freed has finished.
+        """
+        oldest = min(self._readers, default=self._epoch)
+        while self._retired and self._retired[0][0] <= oldest:
+            self._free.extend(self._retired.pop(0)[1])
+
+    def _enter(self) -> int:
+        epoch = self._epoch
+        self._readers[epoch] = self._readers.get(epoch, 0) + 1
+        return epoch
+
+    def _leave(self, epoch: int):
+        with self._lock:
+            if self._readers[epoch] > 1:
+                self._readers[epoch] -= 1
+            else:
+                del self._readers[epoch]
+
+    def _select(self, sql: str, ids: Sequence[str]) -> list:
+        """
+        Run `sql` with its "IN ({})" over ids in batches of 500.
+        """
+        out, ids = [], list(ids)
+        for i in range(0, len(ids), 500):
+            batch = ids[i:i + 500]
+            out += self._db.execute(sql.format(",".join("?" * len(batch))), batch).fetchall()
+        return out
+
+    # -----------------------------
+    # IVF
+    # -----------------------------
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1)
+
+    def _should_train(self) -> bool:
+        if self._touched is not None or self.search_mode != "ivf" or self._count < self.ivf_min_rows:
+            return False
+        if self._centroids is not None and self._count < self._trained_rows * IVF_RETRAIN_GROWTH:
+            return False
+        self._touched = set()  # also marks the training as started
+        return True
+
+    def _train(self):
+        """
+        Spherical k-means (sqrt(n) lists) on a sample of the rows, then assign every row.
+        Runs without the lock like a search, so writes and searches go on (with the
+        previous lists) meanwhile; rows written in the meantime are assigned under the
+        lock when the new lists are swapped in.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            touched, vectors = self._touched, self._vectors
+            rows = np.flatnonzero(self._alive[:self._size])
+            epoch = self._enter()
+        try:
+            self._fit(rows, vectors, touched, start)
+        finally:
+            self._leave(epoch)
+            with self._lock:
+                if self._touched is touched:
+                    self._touched = None
+
+    def _fit(self, rows: np.ndarray, vectors: np.ndarray, touched: set, start: float):
+        nlist = max(1, int(np.sqrt(len(rows))))
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(rows, min(len(rows), nlist * IVF_SAMPLE_PER_LIST), replace=False))
+        x = np.asarray(vectors[sample])
+        centroids = x[rng.choice(len(x), nlist, replace=False)]
+        for _ in range(IVF_ITERATIONS):
+            assign = np.concatenate([self._nearest(x[i:i + 8192], centroids) for i in range(0, len(x), 8192)])
+            order = np.argsort(assign, kind="stable")
+            lists, starts = np.unique(assign[order], return_index=True)
+            sums = np.add.reduceat(x[order], starts, axis=0)
+            centroids[lists] = sums
+            empty = np.setdiff1d(np.arange(nlist), lists)
+            centroids[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        centroids = centroids.astype(np.float32)
+        assignment = np.empty(len(rows), dtype=np.int64)
+        for i in range(0, len(rows), SCAN_BLOCK_ROWS):
+            assignment[i:i + SCAN_BLOCK_ROWS] = self._nearest(
+                np.asarray(vectors[rows[i:i + SCAN_BLOCK_ROWS]]), centroids)
+
+        with self._lock:
+            if self._touched is not touched:
+                return  # reset or closed meanwhile
+            # Deleted rows drop out; rows written during training are (re)assigned now
+            changed = np.fromiter(touched, dtype=np.int64, count=len(touched))
+            changed = changed[self._alive[changed]]
+            keep = self._alive[rows] & ~np.isin(rows, changed)
+            rows = np.concatenate([rows[keep], changed])
+            assignment = np.concatenate(
+                [assignment[keep], self._nearest(np.asarray(self._vectors[changed]), centroids)])
+            self._centroids = centroids
+            np.save(self.centroids_path, centroids)
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany("UPDATE chunks SET list = ? WHERE row = ?",
+                                     zip(assignment.tolist(), rows.tolist()))
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('ivf_trained_rows', ?)", (str(len(rows)),))
+            self._lists = {}
+            for row, lst in zip(rows.tolist(), assignment.tolist()):
+                self._lists.setdefault(lst, set()).add(row)
+            self._trained_rows = len(rows)
+        LOG.info("Trained %d IVF lists over %d vectors in %.1fs", nlist, len(rows), time.perf_counter() - start)
+
+    @staticmethod
+    def _nearest(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        return np.argmax(x @ centroids.T, axis=1)
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+    def similarity_search_by_vector(self, embedding, k=4, source=None):
+        query = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            # Snapshot the state; the scan itself runs without the lock, and rows freed
+            # meanwhile are not reused until it is done
+            if self._count == 0:
+                return []
+            vectors, codes, size = self._vectors, self._codes, self._size
+            if source is not None:
+                candidates = np.fromiter(self._by_source.get(source, ()), dtype=np.int64)
+            elif self.search_mode == "ivf" and self._centroids is not None:
+                probe = np.argsort(-(self._centroids @ query))[:self.nprobe]
+                candidates = np.concatenate(
+                    [np.fromiter(self._lists.get(int(p), ()), dtype=np.int64) for p in probe])
+            else:
+                candidates = None
+            if candidates is not None:
+                candidates.sort()  # read the memory map in file order
+                alive = None
+            else:
+                alive = self._alive[:size].copy()
+            epoch = self._enter()
+        try:
+            return self._search(query, k, source, vectors, codes, alive, size, candidates)
+        finally:
+            self._leave(epoch)
+
+    def _search(self, query, k, source, vectors, codes, alive, size, candidates) -> List[Document]:
+        if candidates is not None and len(candidates) == 0:
+            return []
+        # Few enough candidates (a source filter) are scored on float32 directly
+        coded = codes is not None and (candidates is None or len(candidates) > k * self.rescore)
+        n, step = (k * self.rescore, CODE_SCAN_BLOCK_ROWS) if coded else (k, SCAN_BLOCK_ROWS)
+        scan = codes if coded else None
+        bits = np.packbits(query > 0) if coded and self.codes == "binary" else None
+
+        if candidates is None:
+            # One score per row, computed block by block
+            scores = np.empty(size, dtype=np.float32)
+            for start in range(0, size, step):
+                end = min(start + step, size)
+                scores[start:end] = self._scores(vectors, scan, slice(start, end), query, bits)
+            scores[~alive] = -np.inf
+        else:
+            scores = self._scores(vectors, scan, candidates, query, bits)
+        best = np.argpartition(-scores, min(n, len(scores)) - 1)[:n]
+        best = best[scores[best] > -np.inf]
+        rows = best if candidates is None else candidates[best]
+
+        if coded:
+            # Rescore the shortlist with the full-precision rows, read in file order
+            rows = np.sort(rows)
+            scores = np.asarray(vectors[rows]) @ query
+        else:
+            scores = scores[best]
+        return self._rows(rows[np.argsort(-scores, kind="stable")[:k]].tolist(), source)
+
+    def _rows(self, rows: List[int], source: Optional[str] = None) -> List[Document]:
+        """
+        Documents of `rows`, skipping rows deleted since they were scored (and, with a
+        source, chunks re-added under another source meanwhile).
+        """
+        if not rows:
+            return []
+        with self._lock:
+            found = {r[0]: r[1:] for r in self._db.execute(
+                f"SELECT row, chunk_id, source, text, metadata FROM chunks WHERE row IN ({','.join('?' * len(rows))})",
+                rows) if source is None or r[2] == source}
+        return [Document(id=found[r][0], page_content=found[r][2], metadata=json.loads(found[r][3]))
+                for r in rows if r in found]
+
+    def get(self, ids):
+        with self._lock:
+            found = {cid: (text, meta) for cid, text, meta in self._select(
+                "SELECT chunk_id, text, metadata FROM chunks WHERE chunk_id IN ({})", ids)}
+        return [Document(id=i, page_content=found[i][0], metadata=json.loads(found[i][1])) for i in ids if i in found]
+
+    def get_vectors(self, ids):
+        with self._lock:
+            found = sorted(self._select("SELECT row, chunk_id FROM chunks WHERE chunk_id IN ({})", ids))
+            if not found:
+                return [], np.zeros((0, self.dim or 0), dtype=np.float32)
+            # Copied under the lock: a row freed and reused afterwards holds another chunk
+            return [cid for _, cid in found], np.asarray(self._vectors[[row for row, _ in found]])
+
+    def get_source(self, source):
+        with self._lock:
+            data = self._db.execute(
+                "SELECT chunk_id, text, metadata FROM chunks WHERE source = ? ORDER BY row", (source,)).fetchall()
+        return [Document(id=cid, page_content=text, metadata=json.loads(meta)) for cid, text, meta in data]
+
+    def iter_documents(self, batch_size=1000):
+        last = -1
+        while True:
+            with self._lock:
+                data = self._db.execute("SELECT row, chunk_id, text, metadata FROM chunks WHERE row > ? "
+                                        "ORDER BY row LIMIT ?", (last, batch_size)).fetchall()
+            if not data:
+                return
+            yield [Document(id=cid, page_content=text, metadata=json.loads(meta)) for _, cid, text, meta in data]
+            last = data[-1][0]
+
+    def count(self):
+        return self._count
+
+    def sources(self):
+        with self._lock:
+            return sorted(self._by_source)
+
+    def close(self):
+        with self._lock:
+            for matrix in (self._vectors, self._codes):
+                if matrix is not None:
+                    matrix.flush()
+            self._vectors = self._codes = self._touched = None
+            self._db.close()
+
+    def stats(self):
+        with self._lock:
+            return {"backend": self.backend, "search": self.search_mode, "chunks": self._count,
+                    "dim": self.dim, "rows": self._size, "free_rows": len(self._free),
+                    "file_mb": round(self._capacity * (self.dim or 0) * 4 / (1024 * 1024), 1),
+                    "codes": self.codes,
+                    "codes_mb": 0 if self._codes is None else round(self._codes.nbytes / (1024 * 1024), 1),
+                    "ivf_lists": 0 if self._centroids is None else len(self._centroids)}
@@ -1,39 +1,189 @@
+import hashlib
+import logging
 import os
-from langchain_chroma import Chroma
-from langchain_core.documents import Document
+import threading
+import time
+from contextlib import contextmanager
+from app.core import config
 from app.core.embeddings import get_embedding_model
+from app.core.registry import registry
+from app.core.vector_index import VectorIndex
 
+LOG = logging.getLogger("intellidoc.vectorstore")
 
-def create_or_load_chroma(chunks: list, embedding_model=None, persist_dir: str = "chroma_db"):
+# (persist_dir, source) -> [lock, holders]; entries go away with their last holder
+_source_locks = {}
+_source_locks_guard = threading.Lock()
+
+
+def create_or_load_store(chunks: list, embedding_model=None, persist_dir: str = "chroma_db", ids: list = None):
     """
-    Create or load a Chroma vectorstore from a list of Document objects.
-    Works with your current langchain-chroma version (auto persistence).
+    Add a list of Document objects to the shared vector index for persist_dir
+    (INTELLIDOC_VECTOR_BACKEND; the local one can also keep int8 or binary codes of
+    the vectors, INTELLIDOC_LOCAL_INDEX_CODES). Both backends persist on write.
+    With ids, existing vectors under the same ids are overwritten instead of duplicated.
     """
     os.makedirs(persist_dir, exist_ok=True)
 
-    if embedding_model is None:
-        embedding_model = get_embedding_model()
-
-    # ✅ Use 'embedding' for from_documents (not 'embedding_function')
-    # ✅ No need to call db.persist(), Chroma auto-persists
-    db = Chroma.from_documents(
-        documents=chunks,
-        embedding=embedding_model,
-        persist_directory=persist_dir,
-    )
+    # ✅ Reuse the process-wide store instead of reopening the directory per call
+    db = registry.get_store(persist_dir, embedding_model)
+    if chunks:
+        db.add_documents(chunks, ids=ids)
 
     return db
 
 
-def load_existing_chroma(persist_dir: str = "chroma_db", embedding_model=None):
+def load_existing_store(persist_dir: str = "chroma_db", embedding_model=None) -> VectorIndex:
+    """
+    Load the persisted vector index using the same embedding model.
+    """
+    return registry.get_store(persist_dir, embedding_model)
+
+
+# -----------------------------
+# Idempotent ingestion
+# -----------------------------
+def file_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def make_chunk_ids(source: str, content_hash: str, chunks: list, seen: set = None, start: int = 0) -> list:
+    """
+    Deterministic chunk ids: "<doc key>:<char offset>", where the doc key hashes the
+    source name with the file hash. Chunks without a start_index use their position.
+    Pass the same `seen` set (and running `start` position) when ids are made in batches.
+    """
+    doc_key = hashlib.sha1(f"{source}\0{content_hash}".encode("utf-8")).hexdigest()[:16]
+    ids = []
+    seen = set() if seen is None else seen
+    for i, chunk in enumerate(chunks, start):
+        offset = chunk.metadata.get("start_index", i)
+        chunk_id = f"{doc_key}:{offset}"
+        if chunk_id in seen:
+            chunk_id = f"{chunk_id}.{i}"
+        seen.add(chunk_id)
+        ids.append(chunk_id)
+    return ids
+
+
+@contextmanager
+def source_lock(source: str, persist_dir: str = "chroma_db"):
+    """
+    Serialize writes (index, replace, delete) to one source; other sources proceed.
+    """
+    key = (persist_dir, source)
+    with _source_locks_guard:
+        entry = _source_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _source_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _source_locks[key]
+
+
+def delete_source_vectors(source: str, persist_dir: str = "chroma_db", chunk_ids: list = None,
+                          keep: list = ()) -> int:
+    """
+    Delete one source's vectors and lexical postings, except the chunks in `keep`; cost
+    is proportional to that source's chunk count. Uses the known chunk ids when given,
+    plus a metadata-filtered lookup on "source".
+    """
+    registry.get_lexical(persist_dir).remove_source(source, keep)
+    return registry.get_store(persist_dir).delete_source(source, chunk_ids, keep)
+
+
+def _batched(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def is_indexed(source: str, content_hash: str, persist_dir: str = "chroma_db") -> bool:
+    """
+    True if `source` is already indexed from exactly these bytes.
+    """
+    return registry.get_manifest(persist_dir).is_unchanged(source, content_hash)
+
+
+def index_document(source: str, content_hash: str, chunks, persist_dir: str = "chroma_db", details=None):
     """
-    Load a persisted Chroma DB using the same embedding model.
+    Index one document's chunks under deterministic ids and record it in the manifest.
+    Unchanged bytes are a no-op; changed bytes replace only this source's vectors.
+    `chunks` may be a lazy iterator; it is embedded and written in batches.
+    `details()`, called once the chunks are consumed, returns the catalog fields the
+    caller knows (page_count, doc_type, parser); the time spent is recorded too.
+
+    A new version is written under its own ids next to the previous one, which is
+    deleted only once every chunk is in and the manifest points at the new ids. If
+    the chunks fail (a corrupt PDF) or yield no text, what was written of the new
+    version is removed and the previous one stays searchable. Concurrent calls for
+    the same source run one after the other.
     """
-    if embedding_model is None:
-        embedding_model = get_embedding_model()
+    with source_lock(source, persist_dir):
+        return _index_document(source, content_hash, chunks, persist_dir, details)
+
+
+def _index_document(source: str, content_hash: str, chunks, persist_dir: str, details):
+    start = time.perf_counter()
+    manifest = registry.get_manifest(persist_dir)
+    entry = manifest.get(source)
+    if entry and entry["sha256"] == content_hash:
+        return {"status": "unchanged", "num_chunks": entry["num_chunks"]}
+
+    store = registry.get_store(persist_dir)
+    lexical = registry.get_lexical(persist_dir)
+    ids, seen = [], set()
+    try:
+        for batch in _batched(chunks, config.INDEX_BATCH_SIZE):
+            for c in batch:
+                c.metadata["source"] = source
+            batch_ids = make_chunk_ids(source, content_hash, batch, seen=seen, start=len(ids))
+            ids += batch_ids
+            create_or_load_store(batch, persist_dir=persist_dir, ids=batch_ids)
+            lexical.add(batch_ids, [c.page_content for c in batch], [source] * len(batch))
+        if not ids:
+            raise ValueError(f"No text could be extracted from {source}")
+    except BaseException:
+        LOG.warning("Indexing %s failed; %s", source, "previous version kept" if entry else "nothing indexed")
+        store.delete(ids)
+        lexical.remove(ids)
+        raise
+
+    manifest.record(source, content_hash, ids, **(details() if details else {}),
+                    ingest_seconds=round(time.perf_counter() - start, 3))
+    # Now drop the previous version (and any pre-manifest copies of this source)
+    delete_source_vectors(source, persist_dir, entry["chunk_ids"] if entry else None, keep=ids)
 
-    # ✅ Use 'embedding_function' for the direct constructor
-    return Chroma(
-        persist_directory=persist_dir,
-        embedding_function=embedding_model,
-    )
+    LOG.info("Indexed %s (%d chunks, %s)", source, len(ids), "replaced" if entry else "new")
+    return {"status": "replaced" if entry else "indexed", "num_chunks": len(ids)}
+
+
+def load_source_text(source: str, persist_dir: str = "chroma_db"):
+    """
+    Rebuild an indexed document's text from its stored chunks (ordered by start_index,
+    overlaps removed). Returns None if the source is not indexed.
+    """
+    entry = registry.get_manifest(persist_dir).get(source)
+    store = registry.get_store(persist_dir)
+    docs = store.get(entry["chunk_ids"]) if entry else store.get_source(source)
+    if not docs:
+        return None
+    chunks = sorted((d.metadata.get("start_index", i), d.page_content) for i, d in enumerate(docs))
+    parts, end = [], 0
+    for start, text in chunks:
+        if start >= end:
+            # Separators the splitter dropped between chunks are not stored; keep a line break
+            parts.append(("\n" if parts and start > end else "") + text)
+        elif start + len(text) > end:
+            parts.append(text[end - start:])
+        end = max(end, start + len(text))
+    return "".join(parts)
@@ -1,9 +1,38 @@
 # main.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from app.core.batch import batch_checker
+from app.core.jobs import ingestion_queue
+from app.core.legal_check import preload_rules
+from app.core.llm_client import client as llm_client
+from app.core.parser import shutdown_ocr_pool
+from app.core.registry import registry
+from app.core.reranker import reranker
 from app.routes import upload, query, compare, admin, legal_check  # include new router
 
-app = FastAPI(title="IntelliDoc Lite", version="1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model and open Chroma once for the whole process
+    await run_in_threadpool(registry.start, "chroma_db")
+    reranker.start_background()  # cross-encoder loads while the app starts serving
+    preload_rules()
+    ingestion_queue.start()
+    try:
+        yield
+    finally:
+        await run_in_threadpool(ingestion_queue.close)
+        await run_in_threadpool(batch_checker.close)
+        await run_in_threadpool(shutdown_ocr_pool)
+        await run_in_threadpool(llm_client.close)
+        reranker.close()
+        registry.close()
+
+
+app = FastAPI(title="IntelliDoc Lite", version="1.0", lifespan=lifespan)
 
 # CORS settings
 app.add_middleware(
@@ -1,27 +1,95 @@
-from fastapi import APIRouter
-import os, shutil
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from ..core.answer_cache import answer_cache
+from ..core.delete import delete_document
+from ..core.doc_index import doc_indexes
+from ..core.ingest import ingest_spooled
+from ..core.jobs import ingestion_queue
+from ..core.legal_check import rules_registry
+from ..core.llm_client import client as llm_client
+from ..core.registry import registry
+from ..core.reranker import reranker
+from ..core.spool import UploadTooLarge, spool_upload
+from ..core.tenants import create_tenant, list_tenants
+from .tenancy import tenant_persist_dir
 
 router = APIRouter()
 
 @router.get("/status")
-async def system_status():
-    """Basic system status"""
+async def system_status(persist_dir: str = Depends(tenant_persist_dir)):
+    """Basic system status, with the tenant's document and chunk counts from the catalog"""
+    counts = registry.get_manifest(persist_dir).counts()
     return {
         "status": "running",
-        "indexed_docs": len(os.listdir("chroma_db")) if os.path.exists("chroma_db") else 0
+        "indexed_docs": counts["documents"],
+        "indexed_chunks": counts["chunks"],
     }
 
+@router.get("/models")
+async def model_status():
+    """Load time and memory of the shared embedding model and vector stores"""
+    return {**registry.stats(), "ingestion": ingestion_queue.stats(), "rules": rules_registry.stats(),
+            "reranker": reranker.stats(), "answer_cache": answer_cache.stats(),
+            "llm": llm_client.stats()}
+
+@router.get("/tenants")
+async def tenants():
+    """Tenants with a collection on disk"""
+    return {"tenants": list_tenants()}
+
+@router.post("/tenants/{tenant}", status_code=201)
+async def add_tenant(tenant: str):
+    """Create a tenant's (empty) collection; X-Tenant names it on every other route afterwards"""
+    try:
+        create_tenant(tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"tenant": tenant, "tenants": list_tenants()}
+
 @router.delete("/clear")
-async def clear_database():
-    """Delete Chromachroma_chroma_db and cached embeddings"""
-    if os.path.exists("chroma_db"):
-        shutil.rmtree("chroma_db")
-    os.makedirs("chroma_db", exist_ok=True)
+async def clear_database(persist_dir: str = Depends(tenant_persist_dir)):
+    """Delete all of the tenant's vectors; other tenants are untouched"""
+    # Reset through the open store: removing the folder under a live client corrupts it
+    registry.get_store(persist_dir).reset()
+    # Clearing bumps the manifest versions, so the tenant's cached answers are never served again
+    registry.get_manifest(persist_dir).clear()
+    registry.get_lexical(persist_dir).clear()
+    doc_indexes.clear(persist_dir)
     return {"status": "database cleared"}
 
+@router.delete("/documents/{source:path}")
+async def delete_doc(source: str, persist_dir: str = Depends(tenant_persist_dir)):
+    """Delete one document's vectors (cost proportional to its chunk count)"""
+    result = await run_in_threadpool(delete_document, source, persist_dir)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Document not indexed: {source}")
+    return {"status": "deleted", **result}
+
+@router.get("/documents/{source:path}")
+async def describe_doc(source: str, persist_dir: str = Depends(tenant_persist_dir)):
+    """Catalog entry of one indexed document"""
+    entry = registry.get_manifest(persist_dir).describe(source)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Document not indexed: {source}")
+    return entry
+
+@router.put("/documents/{source:path}")
+async def replace_doc(source: str, file: UploadFile = File(...), persist_dir: str = Depends(tenant_persist_dir)):
+    """Replace one document in place with a new version of the PDF"""
+    try:
+        upload = await spool_upload(file)
+        result = await run_in_threadpool(ingest_spooled, source, upload, persist_dir)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"status": result["status"], "source": source, "num_chunks": result["num_chunks"]}
+
 @router.get("/docs")
-async def list_docs():
-    """List uploaded documents"""
-    if not os.path.exists("uploads"):
-        return {"documents": []}
-    return {"documents": os.listdir("uploads")}
+async def list_docs(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=1000),
+                    doc_type: Optional[str] = None, parser: Optional[str] = None,
+                    persist_dir: str = Depends(tenant_persist_dir)):
+    """List the tenant's indexed documents from the catalog, a page at a time"""
+    return registry.get_manifest(persist_dir).catalog(offset, limit, doc_type=doc_type, parser=parser)
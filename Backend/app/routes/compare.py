@@ -1,22 +1,51 @@
 # backend/app/routes/compare.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from ..core.llm_client import _llm_call  # or use run_qa with custom prompt
+from typing import Optional
+from ..core.compare import explain_changes, plan_comparison
+from ..core.llm_client import aask_llm
+from ..core.vectorstore import load_source_text
+from .tenancy import tenant_persist_dir
 import logging
+import time
 
 LOG = logging.getLogger("intellidoc.compare")
 router = APIRouter()
 
 class CompareRequest(BaseModel):
-    doc1_text: str
-    doc2_text: str
+    # Each document is given either as raw text or as the name of an indexed source
+    doc1_text: Optional[str] = None
+    doc2_text: Optional[str] = None
+    doc1_source: Optional[str] = None
+    doc2_source: Optional[str] = None
+    max_llm_pairs: Optional[int] = None  # changed clauses sent to the LLM; default COMPARE_MAX_LLM_PAIRS
+
+def _document_text(text: Optional[str], source: Optional[str], name: str, persist_dir: str) -> str:
+    if (text is None) == (source is None):
+        raise HTTPException(status_code=422, detail=f"Give exactly one of {name}_text or {name}_source")
+    if text is not None:
+        return text
+    stored = load_source_text(source, persist_dir)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Document not indexed: {source}")
+    return stored
 
 @router.post("/compare")
-def compare(req: CompareRequest):
-    prompt = f"Compare and list differing clauses between doc1 and doc2.\n\nDoc1:\n{req.doc1_text}\n\nDoc2:\n{req.doc2_text}\n\nProvide a concise bullet list of differences."
+async def compare(req: CompareRequest, persist_dir: str = Depends(tenant_persist_dir)):
+    """
+    Clause-aligned comparison: both documents are split into clauses, aligned by
+    embedding similarity and diffed locally; only changed clause pairs go to the LLM
+    (in parallel, bounded), and the findings are merged into one list.
+    """
+    start = time.perf_counter()
+    text1 = await run_in_threadpool(_document_text, req.doc1_text, req.doc1_source, "doc1", persist_dir)
+    text2 = await run_in_threadpool(_document_text, req.doc2_text, req.doc2_source, "doc2", persist_dir)
     try:
-        resp = _llm_call(prompt)
-        return {"comparison": resp}
+        comparison = await run_in_threadpool(plan_comparison, text1, text2)
+        await explain_changes(comparison, aask_llm, max_pairs=req.max_llm_pairs)
+        comparison.timings["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return comparison.to_dict()
     except Exception as e:
         LOG.exception("Compare failed")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,9 +1,20 @@
-from fastapi import APIRouter, File, Form, UploadFile, HTTPException
-from app.core.parser import load_pdf_bytes
-from app.core.legal_check import run_rule_check
-from app.core.vectorstore import create_or_load_chroma
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from typing import List
+import json
+import zipfile
+
+from fastapi import APIRouter, Depends, File, Form, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.core import config
+from app.core.batch import PortfolioSummary, batch_checker
+from app.core.legal_check import load_rules, rules_registry, run_rule_check, run_rule_check_all
+from app.core.ingest import index_pages
+from app.core.jobs import QueueFull, ingestion_queue
+from app.core.parser import join_pages
+from app.core.risk import assess_rule_check
+from app.core.spool import UploadTooLarge, is_zip, spool_upload, unpack_zip
+from app.core.vectorstore import is_indexed
+from app.routes.tenancy import tenant_persist_dir
 
 import logging
 
@@ -13,34 +24,135 @@ router = APIRouter()
 
 @router.post("/")
 async def legal_check_route(
-    document_type: str = Form(...),
-    file: UploadFile = File(...)
+    document_type: str = Form("auto"),
+    file: UploadFile = File(...),
+    persist_dir: str = Depends(tenant_persist_dir),
 ):
+    # "auto" scores the text against every rule set in one keyword search and checks the best match(es)
+    if document_type != "auto" and document_type not in rules_registry.document_types():
+        raise HTTPException(status_code=404, detail=f"No rules found for document type: {document_type}")
     try:
-        # 1️⃣ Read PDF bytes
-        content = await file.read()
+        # 1️⃣ Spool the PDF to disk in chunks
+        upload = await spool_upload(file)
 
-        # 2️⃣ Extract text (OCR if needed)
-        docs = load_pdf_bytes(content, ocr_if_needed=True)
-        full_text = "\n\n".join([d.page_content for d in docs])
+        # 2️⃣ Extract text (OCR if needed) on an ingestion worker, straight from the spool file
+        with upload:
+            docs = await ingestion_queue.run("parse", file.filename, _parse, upload.path)
+        full_text = join_pages(docs)
+        pages = [(d.metadata["page_offset"], d.metadata["page"]) for d in docs]
 
         # 3️⃣ Run rule-based check (fast feedback)
-        rule_results = run_rule_check(full_text, document_type)
-
-        # 4️⃣ Split text into chunks for vectorstore
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=50)
-        chunks = splitter.split_text(full_text)
-        doc_chunks = [Document(page_content=c, metadata={"source": file.filename}) for c in chunks]
+        detection = None
+        if document_type == "auto":
+            detection = run_rule_check_all(full_text, pages=pages)
+            document_type = detection["document_type"]
+            rule_results = detection["checks"].get(document_type, {"document_type": None, "results": {}})
+        else:
+            rule_results = run_rule_check(full_text, document_type, pages=pages)
+        risk = assess_rule_check(rule_results, load_rules(document_type)) if document_type else None
 
-        # 5️⃣ Save chunks to Chroma vectorstore
-        create_or_load_chroma(doc_chunks)
+        # 4️⃣ Chunk + embed into the vectorstore in the background (skipped if already indexed)
+        index = _submit_index(file.filename, upload.sha256, docs, document_type, persist_dir)
 
         return {
             "status": "ok",
             "document_type": document_type,
-            "legal_check": rule_results
+            "legal_check": rule_results,
+            "risk": risk,
+            "detection": {
+                "detected": detection["detected"],
+                "candidates": detection["candidates"],
+            } if detection else None,
+            "legal_checks": detection["checks"] if detection else {document_type: rule_results},
+            "index": index,
+            "pages": [
+                {"page": d.metadata["page"], "method": d.metadata["parser"],
+                 "seconds": d.metadata["parse_seconds"], "chars": len(d.page_content)}
+                for d in docs
+            ]
         }
 
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         LOG.exception("Legal check failed")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch")
+async def legal_check_batch_route(
+    files: List[UploadFile] = File(...),
+    document_type: str = Form("auto"),
+    index: bool = Form(False),
+    persist_dir: str = Depends(tenant_persist_dir),
+):
+    """
+    Rule check + risk score for many PDFs (or zips of PDFs) in one request. Documents
+    are parsed in parallel across processes and streamed back as NDJSON, one line per
+    document as it completes, followed by a portfolio summary line.
+    """
+    if document_type != "auto" and document_type not in rules_registry.document_types():
+        raise HTTPException(status_code=404, detail=f"No rules found for document type: {document_type}")
+
+    uploads = []
+    max_total = config.BATCH_MAX_TOTAL_MB * 1024 * 1024
+    try:
+        for file in files:
+            upload = await spool_upload(file)
+            if is_zip(upload):
+                # Limits are enforced while the members are extracted, with what is left of the batch's budget
+                with upload:
+                    uploads.extend(await run_in_threadpool(
+                        unpack_zip, upload, max_files=config.BATCH_MAX_FILES - len(uploads),
+                        max_total_bytes=max_total - sum(u.size for u in uploads)))
+            else:
+                uploads.append(upload)
+            if len(uploads) > config.BATCH_MAX_FILES:
+                raise HTTPException(status_code=413, detail=f"Batch exceeds {config.BATCH_MAX_FILES} documents")
+            if sum(u.size for u in uploads) > max_total:
+                raise HTTPException(status_code=413, detail=f"Batch exceeds {config.BATCH_MAX_TOTAL_MB} MB")
+    except BaseException as e:
+        for upload in uploads:
+            upload.cleanup()
+        if isinstance(e, UploadTooLarge):
+            raise HTTPException(status_code=413, detail=str(e))
+        if isinstance(e, zipfile.BadZipFile):
+            raise HTTPException(status_code=400, detail=f"Invalid zip: {e}")
+        raise
+
+    hashes = {u.id: u.sha256 for u in uploads}
+
+    async def results():
+        summary = PortfolioSummary()
+        async for result in batch_checker.run(uploads, document_type, keep_pages=index):
+            docs = result.pop("_pages", None)
+            upload_id = result.pop("_upload_id")
+            if index and docs is not None:
+                result["index"] = _submit_index(result["source"], hashes[upload_id], docs,
+                                                result.get("document_type"), persist_dir)
+            summary.add(result)
+            yield json.dumps(result) + "\n"
+        yield json.dumps(summary.to_dict()) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+def _submit_index(source: str, content_hash: str, docs, document_type: str = None,
+                  persist_dir: str = "chroma_db"):
+    if is_indexed(source, content_hash, persist_dir):
+        return {"status": "unchanged", "job_id": None}
+    try:
+        job = ingestion_queue.submit("legal_index", source, index_pages, source, content_hash, docs,
+                                     persist_dir, document_type=document_type)
+        return {"status": job.status, "job_id": job.id}
+    except QueueFull:
+        LOG.warning("Ingestion queue full, %s not indexed", source)
+        return {"status": "rejected", "job_id": None}
+
+
+def _parse(path: str, progress=None):
+    if progress:
+        progress("parse", 0.0)
+    return ingestion_queue.parse(path, True)
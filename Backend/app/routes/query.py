@@ -1,11 +1,22 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List
-from ..core.llm_client import run_qa
-from ..core.vectorstore import load_existing_chroma
+from ..core import config
+from ..core.context import ContextPack, build_context, token_counter
+from ..core.llm_client import aask_llm, build_qa_prompt, open_llm_stream
+from ..core.ollama_client import LLMBusy, LLMTimeout
+from ..core.answer_cache import answer_cache
+from ..core.registry import registry
+from ..core.retrieval import dense_search, hybrid_search
 from ..core.reranker import rerank
+from .tenancy import tenant_persist_dir
 from langchain_core.documents import Document
+import json
 import logging
+import time
 
 LOG = logging.getLogger("intellidoc.query")
 router = APIRouter()
@@ -13,51 +24,204 @@ router = APIRouter()
 
 class QARequest(BaseModel):
     question: str
-    k: int = 3
+    k: int = 3  # contexts passed to the LLM
     source_filter: Optional[str] = None  # Allows querying only from a specific PDF
+    hybrid: bool = True  # fuse BM25 and dense candidates before reranking
+    fetch_k: Optional[int] = None  # candidates retrieved (per ranking when hybrid); default RETRIEVAL_FETCH_K
+    rerank_k: Optional[int] = None  # best-ranked candidates cross-encoded; default RERANK_K
+    use_cache: bool = True  # reuse a cached answer to the same (or a near-identical) question
+    max_context_tokens: Optional[int] = None  # token budget for the context; default QA_CONTEXT_TOKENS
 
 
 @router.post("/ask")
-def ask(req: QARequest):
+async def ask(req: QARequest, persist_dir: str = Depends(tenant_persist_dir)):
     """
     Handles question-answering over document embeddings.
-    Optionally restricts to a single PDF using 'source_filter'.
+    Optionally restricts to a single PDF using 'source_filter' (searching only that
+    document's vectors), within the tenant named by the X-Tenant header.
+    Retrieval runs in the thread pool; no thread is held while the LLM generates.
     """
     try:
-        # Load existing Chroma vector DB
-        db = load_existing_chroma("chroma_db")
+        timings = {}
+        start = time.perf_counter()
+        cached, scope, embedding = await run_in_threadpool(_lookup, req, timings, persist_dir)
+        if cached is not None:
+            timings["total_ms"] = _ms_since(start)
+            return {"answer": cached.answer, "sources": cached.sources, "usage": cached.usage, "timings": timings}
+
+        pack = await run_in_threadpool(_retrieve, req, timings, embedding, persist_dir)
+        if not pack.docs:
+            return {"answer": "No relevant information found in the selected document.",
+                    "sources": [], "usage": pack.usage(), "timings": timings}
+
+        # Run question-answering LLM on the token-budgeted context
+        prompt = build_qa_prompt(pack.texts, req.question)
+        usage = pack.usage(token_counter.count(prompt))
+        stage = time.perf_counter()
+        answer = await aask_llm(prompt)
+        timings["llm_ms"] = _ms_since(stage)
+
+        # Collect metadata (source info, with the chunk ids the answer cites)
+        sources = pack.sources()
+        timings["total_ms"] = _ms_since(start)
+        if scope is not None:
+            answer_cache.put(req.question, scope, answer, sources, timings["total_ms"], embedding, usage)
+
+        return {"answer": answer, "sources": sources, "usage": usage, "timings": timings}
+
+    except LLMBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except LLMTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        LOG.exception("Query failed")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Create retriever with top-k results
-        retriever = db.as_retriever(search_kwargs={"k": req.k})
 
-        # Apply document filter if provided
-        if req.source_filter:
-            retriever.search_kwargs["filter"] = {"source": req.source_filter}
+@router.post("/ask/stream")
+async def ask_stream(req: QARequest, request: Request, persist_dir: str = Depends(tenant_persist_dir)):
+    """
+    Same as /ask, streamed as Server-Sent Events: a `sources` event once retrieval and
+    reranking finish and the LLM has accepted the prompt, one `token` event per piece of
+    the answer, then a `done` event with the timings. Generation stops when the client
+    disconnects.
+
+    The response starts only after an LLM slot is held, so a busy LLM is a 429 and one
+    that does not start answering in time a 504, as for /ask. A failure after that (the
+    LLM stalling mid-answer) cannot change the status any more and ends the stream with
+    an `error` event carrying its detail instead of `done`.
+    """
+    stream = None
+    try:
+        timings = {}
+        start = time.perf_counter()
+        cached, scope, embedding = await run_in_threadpool(_lookup, req, timings, persist_dir)
+        if cached is None:
+            pack = await run_in_threadpool(_retrieve, req, timings, embedding, persist_dir)
+            if pack.docs:
+                prompt = build_qa_prompt(pack.texts, req.question)
+                usage = pack.usage(token_counter.count(prompt))
+                stage = time.perf_counter()
+                stream = await open_llm_stream(prompt)
+            else:
+                usage = pack.usage()
+    except LLMBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except LLMTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        LOG.exception("Query failed")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Retrieve relevant document chunks
-        docs = retriever.invoke(req.question)
+    async def events():
+        if cached is not None:
+            yield _sse("sources", {"sources": cached.sources, "usage": cached.usage, "timings": dict(timings)})
+            yield _sse("token", {"text": cached.answer})
+            timings["total_ms"] = _ms_since(start)
+            yield _sse("done", {"timings": timings})
+            return
+
+        if stream is None:
+            yield _sse("sources", {"sources": [], "usage": usage, "timings": dict(timings)})
+            yield _sse("token", {"text": "No relevant information found in the selected document."})
+            timings["total_ms"] = _ms_since(start)
+            yield _sse("done", {"timings": timings})
+            return
+
+        tokens, answer = 0, []
+        try:
+            yield _sse("sources", {"sources": pack.sources(), "usage": usage, "timings": dict(timings)})
+            async for chunk in stream:
+                if await request.is_disconnected():
+                    LOG.info("Client disconnected after %d tokens; generation cancelled", tokens)
+                    return
+                if tokens == 0:
+                    timings["first_token_ms"] = _ms_since(start)
+                tokens += 1
+                answer.append(chunk)
+                yield _sse("token", {"text": chunk})
+        except Exception as e:
+            LOG.exception("Streaming query failed")
+            yield _sse("error", {"detail": str(e)})
+            return
+        finally:
+            await stream.aclose()
+        timings["llm_ms"] = _ms_since(stage)
+        timings["total_ms"] = _ms_since(start)
+        timings["tokens"] = tokens
+        if scope is not None:
+            answer_cache.put(req.question, scope, "".join(answer), pack.sources(), timings["total_ms"], embedding,
+                             usage)
+        yield _sse("done", {"timings": timings})
+
+    # Also frees the LLM slot when the client leaves before the body is started
+    background = BackgroundTask(stream.aclose) if stream is not None else None
+    return StreamingResponse(events(), media_type="text/event-stream", background=background,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _lookup(req: QARequest, timings: dict, persist_dir: str = "chroma_db"):
+    """
+    Check the answer cache. Returns (cached entry or None, cache scope or None when
+    caching is off, question embedding or None). The scope is read before retrieval,
+    so an answer computed while its document is being re-indexed is stored under the
+    old corpus version and never served.
+    """
+    if not req.use_cache or not answer_cache.enabled:
+        return None, None, None
+    start = time.perf_counter()
+    version = registry.get_manifest(persist_dir).version(req.source_filter)
+    scope = (persist_dir, req.source_filter, version, req.k, req.hybrid, req.fetch_k, req.rerank_k, req.max_context_tokens)
+    cached, kind, embedding = answer_cache.get(
+        req.question, scope, embed=lambda: registry.get_embedding_model().embed_query(req.question)
+    )
+    timings["cache_ms"] = _ms_since(start)
+    if cached is not None:
+        timings["cache"] = kind
+        answer_cache.record_saved(cached, timings["cache_ms"])
+    return cached, scope, embedding
+
+
+def _retrieve(req: QARequest, timings: dict, embedding: Optional[List[float]] = None,
+              persist_dir: str = "chroma_db") -> ContextPack:
+    """
+    Retrieve candidates (hybrid or dense), rerank them and pack the best into the
+    context token budget, recording stage timings in `timings`.
+    A precomputed question embedding skips re-embedding for the dense ranking.
+    """
+    start = time.perf_counter()
+    fetch_k = max(req.fetch_k or config.RETRIEVAL_FETCH_K, req.k)
+    rerank_k = max(min(req.rerank_k or config.RERANK_K, fetch_k), req.k)
 
-        if not docs:
-            return {"answer": "No relevant information found in the selected document.",
-                    "sources": []}
+    if req.hybrid:
+        # Dense + BM25 candidates fused by reciprocal rank, so exact terms
+        # ("clause 14.2", amounts, party names) are not lost to embedding similarity
+        docs = hybrid_search(req.question, k=fetch_k, source=req.source_filter, fetch_k=fetch_k,
+                             persist_dir=persist_dir, embedding=embedding)
+    else:
+        # Dense retrieval only, optionally restricted to one document
+        docs = dense_search(req.question, fetch_k, req.source_filter, persist_dir, embedding=embedding)
+    timings["retrieve_ms"] = _ms_since(start)
 
-        # Ensure all docs are Document objects
-        docs = [d if isinstance(d, Document) else Document(page_content=d) for d in docs]
+    if not docs:
+        return ContextPack()
 
-        # Rerank Document objects
-        reranked_docs = rerank(docs, req.question)
+    # Ensure all docs are Document objects
+    docs = [d if isinstance(d, Document) else Document(page_content=d) for d in docs]
 
-        # Extract text strings for LLM
-        reranked_contexts = [d.page_content for d in reranked_docs]
+    # Rerank the best-ranked candidates only (pre-pruned by retrieval rank)
+    stage = time.perf_counter()
+    reranked_docs = rerank(docs, req.question, top_k=req.k, prune_to=rerank_k)
+    timings["rerank_ms"] = _ms_since(stage)
+    timings.update({"candidates": len(docs), "reranked": min(len(docs), rerank_k)})
 
-        # Run question-answering LLM
-        answer = run_qa(reranked_contexts, req.question)
+    # Labelled, de-overlapped chunk texts within the token budget, best first
+    return build_context(reranked_docs, req.max_context_tokens)
 
-        # Collect metadata (source info)
-        sources = [d.metadata for d in reranked_docs]
 
-        return {"answer": answer, "sources": sources}
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
-    except Exception as e:
-        LOG.exception("Query failed")
-        raise HTTPException(status_code=500, detail=str(e))
+
+def _ms_since(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
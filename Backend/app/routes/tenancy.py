@@ -0,0 +1,15 @@
+from typing import Optional
+
+from fastapi import Header, HTTPException
+from ..core.tenants import UnknownTenant, existing_tenant_dir
+
+
+def tenant_persist_dir(x_tenant: Optional[str] = Header(None)) -> str:
+    """Persist dir of the tenant named in the X-Tenant header (default tenant without one); 404 for an unknown one"""
+    try:
+        return existing_tenant_dir(x_tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnknownTenant as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
@@ -1,34 +1,71 @@
-from fastapi import APIRouter, File, UploadFile
-from ..core.parser import load_pdf_bytes
-from ..core.chunker import chunk_documents
-from ..core.embeddings import get_embedding_model
-from ..core.vectorstore import create_or_load_chroma
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from ..core.ingest import ingest_spooled
+from ..core.jobs import QueueFull, ingestion_queue
+from ..core.spool import UploadTooLarge, spool_upload
+from .tenancy import tenant_persist_dir
 import traceback
 
 router = APIRouter()
 
 @router.post("/")
-async def upload_doc(file: UploadFile = File(...)):
+async def upload_doc(file: UploadFile = File(...), persist_dir: str = Depends(tenant_persist_dir)):
+    """Ingest a PDF and return once it is indexed (429 when the ingestion queue is full)"""
     try:
-        content = await file.read()
+        # Stream the upload to disk in chunks instead of holding it in memory
+        upload = await spool_upload(file)
 
-        docs = load_pdf_bytes(content, ocr_if_needed=True)
-        if not docs:
-            return {"status": "error", "detail": "No text extracted from PDF"}
+        # Parse / OCR / embed on an ingestion worker, so synchronous uploads share the
+        # INGEST_WORKERS bound with background jobs
+        try:
+            result = await ingestion_queue.run(
+                "upload", file.filename, ingest_spooled, file.filename, upload, persist_dir,
+                parse=ingestion_queue.iter_pages,
+            )
+        except QueueFull as e:
+            upload.cleanup()
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
 
-        for d in docs:
-            d.metadata["source"] = file.filename
-        chunks = chunk_documents(docs)
-        for c in chunks:
-            c.metadata["source"] = file.filename
-        embed_model = get_embedding_model()
-        db = create_or_load_chroma(chunks, embed_model, persist_dir="chroma_db")
-
-        return {"status": "ok", "num_chunks": len(chunks)}
+        return {
+            "status": "ok",
+            "num_chunks": result["num_chunks"],
+            "unchanged": result["status"] == "unchanged",
+            "parser": result.get("parser"),
+            "pages": result.get("pages", []),
+            "memory": result.get("memory"),
+        }
 
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         return {
             "status": "error",
             "detail": str(e),
             "traceback": traceback.format_exc()
         }
+
+@router.post("/jobs", status_code=202)
+async def submit_upload_job(file: UploadFile = File(...), persist_dir: str = Depends(tenant_persist_dir)):
+    """Queue a PDF for background ingestion and return its job id"""
+    try:
+        upload = await spool_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        job = ingestion_queue.submit(
+            "upload", file.filename, ingest_spooled, file.filename, upload, persist_dir,
+            parse=ingestion_queue.iter_pages,
+        )
+    except QueueFull as e:
+        upload.cleanup()
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}")
+async def upload_job_status(job_id: str):
+    """Status, current stage and progress of an ingestion job"""
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_batch.py
+# Portfolio legal check: one document at a time in-process (what N calls to /legal
+# cost, minus HTTP) versus BatchChecker spreading documents over a process pool.
+#
+#   python -m benchmarks.bench_batch [--docs 64] [--pages 40] [--processes 0,2,4]
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+
+from app.core.batch import BatchChecker, PortfolioSummary, check_document
+from app.core.legal_check import preload_rules
+from app.core.spool import SpooledUpload
+from benchmarks.bench_parser import make_pdf
+from benchmarks.common import print_table, timer
+
+
+def _copies(src: str, n: int):
+    # BatchChecker removes each spool file once its document is done
+    out = []
+    for i in range(n):
+        fd, path = tempfile.mkstemp(prefix="intellidoc-", suffix=".pdf")
+        os.close(fd)
+        shutil.copyfile(src, path)
+        out.append(SpooledUpload(filename=f"doc-{i}.pdf", path=path, size=0, sha256=""))
+    return out
+
+
+async def _run_batch(checker: BatchChecker, uploads):
+    summary = PortfolioSummary()
+    async for result in checker.run(uploads, "auto"):
+        summary.add(result)
+    return summary.to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=64)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--processes", default=f"0,2,{os.cpu_count() or 1}")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"intellidoc-bench-{args.pages}p.pdf")
+    if not os.path.exists(path):
+        make_pdf(path, args.pages)
+    preload_rules()
+
+    rows = []
+    uploads = _copies(path, args.docs)
+    with timer() as t:
+        for u in uploads:
+            check_document(u.path, u.filename)
+            u.cleanup()
+    rows.append({"mode": "sequential", "processes": "-", "seconds": round(t["seconds"], 2),
+                 "docs_per_s": round(args.docs / t["seconds"], 1)})
+
+    for processes in sorted({int(p) for p in args.processes.split(",")}):
+        checker = BatchChecker(processes=processes)
+        if processes:
+            checker._executor().submit(preload_rules).result()  # warm the pool
+        uploads = _copies(path, args.docs)
+        with timer() as t:
+            summary = asyncio.run(_run_batch(checker, uploads))
+        checker.close()
+        assert summary["ok"] == args.docs, summary
+        rows.append({"mode": "batch" if processes else "batch (threads)", "processes": processes,
+                     "seconds": round(t["seconds"], 2), "docs_per_s": round(args.docs / t["seconds"], 1)})
+
+    print(f"docs={args.docs} pages/doc={args.pages} cpus={os.cpu_count()}")
+    print_table(rows, ["mode", "processes", "seconds", "docs_per_s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# backend/benchmarks/bench_chunker.py
+# Chunking strategies on synthetic multi-page contracts: the previous character splitter
+# (recursive, 1000 chars / 200 overlap) versus the structure-aware chunker (clauses,
+# headings, defined terms; token target). Reports chunk count, characters embedded,
+# chunking time on a 1 MB+ text, index (embed + store) time, and retrieval hit rate:
+# a hit is a top-k chunk from the right document holding the whole asked-for clause.
+# Lines are wrapped at ~90 chars as in text extracted from a PDF page, so the character
+# splitter's newline boundaries fall inside clauses.
+#
+# Runs offline with a small random sentence-transformers model by default (hit rate
+# then leans on BM25); pass --model sentence-transformers/all-MiniLM-L6-v2 for the
+# production embedder.
+#
+#   python -m benchmarks.bench_chunker [--docs 40] [--sections 12] [--queries 200] [--k 3] [--model PATH]
+import argparse
+import random
+import shutil
+import tempfile
+import textwrap
+
+from langchain_core.documents import Document
+
+from app.core.chunker import iter_chunks
+from app.core.embeddings import BatchedEmbeddings
+from app.core.parser import PAGE_SEPARATOR
+from app.core.registry import registry
+from app.core.retrieval import hybrid_search
+from app.core.vectorstore import index_document
+from benchmarks.common import PARTIES, build_tiny_model, print_table, synthetic_clause, timer
+
+STRATEGIES = [("recursive", {"strategy": "recursive", "chunk_size": 1000, "chunk_overlap": 200}),
+              ("structure", {"strategy": "structure"})]
+
+
+def make_contract(rng: random.Random, sections: int):
+    """
+    Pages of a contract with a definitions block and numbered sections of 1-6 numbered
+    clauses, each 1-6 sentences. Returns (pages, {clause number: clause text}).
+    """
+    lines = [f"LOAN AGREEMENT between {rng.choice(PARTIES)} and {rng.choice(PARTIES)}", "", "DEFINITIONS"]
+    for term in ("Borrower", "Lender", "Loan", "Security"):
+        lines.append(f'"{term}" means {synthetic_clause(rng)[:-1].lower()}.')
+    clauses = {}
+    for s in range(1, sections + 1):
+        lines += ["", f"{s}. {rng.choice(['PAYMENT', 'SECURITY', 'DEFAULT', 'TERMINATION', 'GENERAL'])}"]
+        for c in range(1, rng.randint(1, 6) + 1):
+            number = f"{s}.{c}"
+            clauses[number] = f"{number} " + " ".join(synthetic_clause(rng) for _ in range(rng.randint(1, 6)))
+            lines.append(clauses[number])
+    text = "\n".join(textwrap.fill(line, 90) for line in lines)
+
+    # Pages of up to ~1800 chars, broken at line ends
+    docs, start, offset = [], 0, 0
+    while start < len(text):
+        end = text.rfind("\n", start, start + 1800) if start + 1800 < len(text) else len(text)
+        end = end if end > start else len(text)
+        page = text[start:end]
+        docs.append(Document(page_content=page, metadata={"page": len(docs) + 1, "page_offset": offset}))
+        offset += len(page) + len(PAGE_SEPARATOR)
+        start = end + 1
+    return docs, clauses
+
+
+def _words(text: str) -> str:
+    return " ".join(text.split())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    corpus = [(f"contract_{d:04d}.pdf", *make_contract(rng, args.sections)) for d in range(args.docs)]
+    queries = []
+    for _ in range(args.queries):
+        source, _, clauses = rng.choice(corpus)
+        number = rng.choice(list(clauses))
+        queries.append((f"What does clause {number} say?", source, _words(clauses[number])))
+    big_pages, _ = make_contract(random.Random(1), 1500)
+    big_chars = sum(len(p.page_content) for p in big_pages)
+
+    model = BatchedEmbeddings(args.model or build_tiny_model())
+    registry.register_embedding_model(model)
+    rows, persist_dirs = [], []
+    try:
+        for name, kwargs in STRATEGIES:
+            with timer() as big:
+                sum(1 for _ in iter_chunks(big_pages, **kwargs))
+            persist_dir = tempfile.mkdtemp(prefix=f"intellidoc-bench-chunker-{name}-")
+            persist_dirs.append(persist_dir)
+            chunks, chars, whole, total, chunked = 0, 0, 0, 0, []
+            with timer() as index:
+                for d, (source, pages, clauses) in enumerate(corpus):
+                    docs = [Document(page_content=p.page_content, metadata={**p.metadata, "source": source})
+                            for p in pages]
+                    batch = list(iter_chunks(docs, **kwargs))
+                    chunks += len(batch)
+                    chars += sum(len(c.page_content) for c in batch)
+                    index_document(source, f"{d:064x}", batch, persist_dir=persist_dir)
+                    chunked.append((batch, clauses))
+            for batch, clauses in chunked:
+                texts = [_words(c.page_content) for c in batch]
+                whole += sum(any(_words(c) in t for t in texts) for c in clauses.values())
+                total += len(clauses)
+            hits = 0
+            for question, source, clause in queries:
+                found = hybrid_search(question, args.k, source, persist_dir)
+                hits += any(clause in _words(doc.page_content) for doc in found)
+            rows.append({
+                "strategy": name,
+                "chunks": chunks,
+                "chars_embedded": chars,
+                f"chunk_{big_chars // 1024}kb_ms": round(big["seconds"] * 1000, 1),
+                "index_s": round(index["seconds"], 2),
+                "clauses_whole": round(whole / total, 3),
+                f"hit@{args.k}": round(hits / len(queries), 3),
+            })
+    finally:
+        registry.close()
+        for persist_dir in persist_dirs:
+            shutil.rmtree(persist_dir, ignore_errors=True)
+    print(f"docs={args.docs} queries={args.queries}")
+    print_table(rows, list(rows[0]))
+
+
+if __name__ == "__main__":
+    main()
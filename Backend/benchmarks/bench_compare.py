@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_compare.py
+# Document comparison cost: the old single prompt with both full documents versus the
+# clause-aligned map-reduce (segment, align, diff locally, one small prompt per changed
+# clause). Reports LLM prompt tokens (total and largest single prompt) and the local
+# planning time; no LLM is called. Embeddings come from a small random model so it
+# runs offline (alignment of edited clauses is then a floor).
+#
+#   python -m benchmarks.bench_compare [--clauses 40,200,800] [--changed 0.1] [--model PATH]
+import argparse
+import random
+
+from app.core.compare import pair_prompt, plan_comparison
+from app.core.context import token_counter
+from app.core.embeddings import BatchedEmbeddings
+from benchmarks.common import build_tiny_model, print_table, synthetic_clause, timer
+
+OLD_PROMPT = "Compare and list differing clauses between doc1 and doc2.\n\nDoc1:\n{}\n\nDoc2:\n{}\n\n" \
+             "Provide a concise bullet list of differences."
+
+
+def make_pair(n_clauses: int, changed: float, rng: random.Random):
+    """
+    Two versions of a numbered contract: a `changed` fraction of clauses reworded with
+    new values, a few removed / added, and some clauses moved.
+    """
+    clauses = [synthetic_clause(rng) for _ in range(n_clauses)]
+    revised = []
+    for clause in clauses:
+        r = rng.random()
+        if r < changed:
+            revised.append(synthetic_clause(random.Random(clause)).replace("shall", "must"))
+        elif r < changed + 0.02:
+            continue  # removed
+        else:
+            revised.append(clause)
+        if rng.random() < 0.02:
+            revised.append(synthetic_clause(rng))  # added
+    for _ in range(n_clauses // 20):
+        i, j = rng.randrange(len(revised)), rng.randrange(len(revised))
+        revised[i], revised[j] = revised[j], revised[i]
+
+    def render(body):
+        return "LOAN AGREEMENT\n" + "\n".join(f"{i}. {c}" for i, c in enumerate(body, start=1))
+
+    return render(clauses), render(revised)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clauses", default="40,200,800")
+    parser.add_argument("--changed", type=float, default=0.1)
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    model = BatchedEmbeddings(args.model or build_tiny_model(), cache_dir=None)
+    embed = lambda texts: model.embed_array(texts)  # noqa: E731
+    rng = random.Random(0)
+    rows = []
+    for n in [int(x) for x in args.clauses.split(",")]:
+        doc1, doc2 = make_pair(n, args.changed, rng)
+        old_tokens = token_counter.count(OLD_PROMPT.format(doc1, doc2))
+        with timer() as t:
+            comparison = plan_comparison(doc1, doc2, embed=embed)
+        prompts = [token_counter.count(pair_prompt(p)) for p in comparison.pairs if p.status == "changed"]
+        summary = comparison.to_dict()["summary"]
+        rows.append({
+            "clauses": n,
+            "old_prompt_tokens": old_tokens,
+            "new_llm_calls": len(prompts),
+            "new_tokens_total": sum(prompts),
+            "new_max_prompt": max(prompts, default=0),
+            "identical": summary["identical"],
+            "added/removed": f"{summary['added']}/{summary['removed']}",
+            "plan_ms": round(t["seconds"] * 1000, 1),
+        })
+    model.close()
+    print_table(rows, list(rows[0]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# backend/benchmarks/bench_delete.py
+# Latency of deleting one document as the corpus grows: the per-document delete
+# (app.core.delete.delete_document) versus the old rebuild-the-store approach.
+# Embeddings are random vectors so only vectorstore work is measured.
+#
+#   python -m benchmarks.bench_delete [--sizes 1000,5000,20000] [--chunks-per-doc 50]
+import argparse
+import random
+import shutil
+import tempfile
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import FakeEmbeddings
+
+from app.core.delete import delete_document
+from app.core.registry import registry
+from app.core.vectorstore import create_or_load_store, index_document
+from benchmarks.common import print_table, synthetic_clause, timer
+
+
+def build_corpus(persist_dir: str, total_chunks: int, chunks_per_doc: int):
+    rng = random.Random(0)
+    sources = []
+    for d in range(total_chunks // chunks_per_doc):
+        source = f"contract_{d:05d}.pdf"
+        chunks = [Document(page_content=synthetic_clause(rng), metadata={"start_index": i * 1000})
+                  for i in range(chunks_per_doc)]
+        index_document(source, f"{d:064x}", chunks, persist_dir=persist_dir)
+        sources.append(source)
+    return sources
+
+
+def rebuild_delete(persist_dir: str, source: str):
+    """
+    The previous app/core/delete.py: re-add every other chunk into a fresh collection.
+    """
+    db = registry.get_store(persist_dir)
+    keep = [Document(page_content=d.page_content, metadata=d.metadata)
+            for batch in db.iter_documents() for d in batch if d.metadata.get("source") != source]
+    db.reset()
+    for i in range(0, len(keep), 5000):
+        create_or_load_store(keep[i:i + 5000], persist_dir=persist_dir)
+
+
+def run(sizes, chunks_per_doc: int, deletes: int, rebuild_limit: int):
+    rows = []
+    for size in sizes:
+        persist_dir = tempfile.mkdtemp(prefix="intellidoc-bench-delete-")
+        registry.register_embedding_model(FakeEmbeddings(size=384))
+        try:
+            sources = build_corpus(persist_dir, size, chunks_per_doc)
+            with timer() as t:
+                for source in sources[:deletes]:
+                    delete_document(source, persist_dir=persist_dir)
+            row = {"corpus_chunks": size, "delete_ms": round(t["seconds"] * 1000 / deletes, 1)}
+
+            if size <= rebuild_limit:
+                with timer() as t:
+                    rebuild_delete(persist_dir, sources[deletes])
+                row["rebuild_ms"] = round(t["seconds"] * 1000, 1)
+            else:
+                row["rebuild_ms"] = "skipped"
+            rows.append(row)
+        finally:
+            registry.close()
+            shutil.rmtree(persist_dir, ignore_errors=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,5000,20000")
+    parser.add_argument("--chunks-per-doc", type=int, default=50)
+    parser.add_argument("--deletes", type=int, default=5)
+    parser.add_argument("--rebuild-limit", type=int, default=20000,
+                        help="largest corpus on which to time the old rebuild approach")
+    args = parser.parse_args()
+
+    rows = run([int(s) for s in args.sizes.split(",")], args.chunks_per_doc, args.deletes, args.rebuild_limit)
+    print(f"chunks_per_doc={args.chunks_per_doc} (mean over {args.deletes} deletes)")
+    print_table(rows, ["corpus_chunks", "delete_ms", "rebuild_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# backend/benchmarks/bench_embeddings.py
+# Throughput of the micro-batching embedder: texts/sec against max batch size,
+# with many concurrent single-text callers (the query/upload mix) versus
+# unbatched per-call encoding.
+#
+#   python -m benchmarks.bench_embeddings [--model PATH] [--texts 2000] [--callers 16]
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import build_tiny_model, print_table, synthetic_texts, timer
+
+
+def run(model_path: str, n_texts: int, callers: int, batch_sizes):
+    from app.core.embeddings import BatchedEmbeddings
+
+    texts = synthetic_texts(n_texts)
+    rows = []
+
+    # Baseline: every caller runs its own forward pass
+    engine = BatchedEmbeddings(model_path, max_batch=1, max_wait_ms=0)
+    with ThreadPoolExecutor(callers) as pool, timer() as t:
+        list(pool.map(lambda s: engine._encode([s]), texts))
+    engine.close()
+    rows.append({"mode": "unbatched", "max_batch": 1, "texts/sec": round(n_texts / t["seconds"], 1),
+                 "avg_batch": 1.0})
+
+    for bs in batch_sizes:
+        engine = BatchedEmbeddings(model_path, max_batch=bs, max_wait_ms=5)
+        with ThreadPoolExecutor(callers) as pool, timer() as t:
+            list(pool.map(lambda s: engine.embed_query(s), texts))
+        stats = engine.stats()
+        engine.close()
+        rows.append({"mode": "micro-batched", "max_batch": bs, "texts/sec": round(n_texts / t["seconds"], 1),
+                     "avg_batch": stats["avg_batch_size"]})
+
+    # Bulk ingest path: one caller, one large list
+    engine = BatchedEmbeddings(model_path, max_batch=64, max_wait_ms=5)
+    with timer() as t:
+        engine.embed_array(texts)
+    engine.close()
+    rows.append({"mode": "bulk (embed_array)", "max_batch": 64, "texts/sec": round(n_texts / t["seconds"], 1),
+                 "avg_batch": 64})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", help="local sentence-transformers path (default: tiny random model)")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--callers", type=int, default=16)
+    parser.add_argument("--batch-sizes", default="8,16,32,64,128")
+    args = parser.parse_args()
+
+    model_path = args.model or build_tiny_model()
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    rows = run(model_path, args.texts, args.callers, batch_sizes)
+    print(f"model={model_path} texts={args.texts} concurrent_callers={args.callers}")
+    print_table(rows, ["mode", "max_batch", "texts/sec", "avg_batch"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# backend/benchmarks/bench_hybrid.py
+# Retrieval recall and latency on a synthetic contract corpus for exact-term questions
+# (amounts, clause numbers within a document): dense-only Chroma search versus BM25
+# versus the two fused with reciprocal rank fusion (what /query/ask now uses).
+#
+# Runs offline with a small random sentence-transformers model by default, so dense
+# recall here is a floor; pass --model sentence-transformers/all-MiniLM-L6-v2 to
+# measure the production embedder.
+#
+#   python -m benchmarks.bench_hybrid [--docs 200] [--queries 200] [--ks 3,10] [--model PATH]
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from langchain_core.documents import Document
+
+from app.core.embeddings import BatchedEmbeddings
+from app.core.registry import registry
+from app.core.retrieval import dense_search, hybrid_search
+from app.core.vectorstore import index_document
+from benchmarks.common import build_tiny_model, print_table, synthetic_clause, timer
+
+
+def build_corpus(persist_dir: str, docs: int, sections: int, rng: random.Random):
+    """
+    Each document has `sections` numbered sections ("7.", "7.1" ...) of 3 clauses each,
+    one chunk per section. Returns [(source, chunk_text)] for building queries.
+    """
+    chunks_out = []
+    for d in range(docs):
+        source = f"contract_{d:04d}.pdf"
+        chunks = []
+        for s in range(1, sections + 1):
+            number = f"{s}.{rng.randint(1, 9)}"
+            text = f"Clause {number}. " + " ".join(synthetic_clause(rng) for _ in range(3))
+            chunks.append(Document(page_content=text, metadata={"start_index": s * 1000, "clause": number}))
+            chunks_out.append((source, number, text))
+        index_document(source, f"{d:064x}", chunks, persist_dir=persist_dir)
+    return chunks_out
+
+
+def make_queries(chunks, n: int, rng: random.Random):
+    queries = []
+    for _ in range(n):
+        source, number, text = rng.choice(chunks)
+        if rng.random() < 0.5:
+            amount = text.split("INR ")[1].split()[0] if "INR " in text else None
+            if amount:
+                relevant = {(s, t) for s, _, t in chunks if f"INR {amount}" in t}
+                queries.append((f"Which clause mentions INR {amount}?", None, relevant))
+                continue
+        relevant = {(s, t) for s, num, t in chunks if s == source and num == number}
+        queries.append((f"What does clause {number} say?", source, relevant))
+    return queries
+
+
+def evaluate(name, search, queries, ks):
+    """
+    Recall at each k in ks (from one search of max(ks) candidates) and search latency.
+    """
+    hits, latencies = dict.fromkeys(ks, 0), []
+    for question, source, relevant in queries:
+        start = time.perf_counter()
+        docs = search(question, max(ks), source)
+        latencies.append((time.perf_counter() - start) * 1000)
+        for k in ks:
+            if any((d.metadata.get("source"), d.page_content) in relevant for d in docs[:k]):
+                hits[k] += 1
+    row = {"retriever": name}
+    row.update({f"recall@{k}": round(hits[k] / len(queries), 3) for k in ks})
+    row.update({"p50_ms": round(statistics.median(latencies), 2),
+                "p95_ms": round(sorted(latencies)[int(0.95 * (len(latencies) - 1))], 2)})
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--sections", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--ks", default="3,10", help="recall cut-offs (candidates handed to the reranker)")
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    ks = [int(k) for k in args.ks.split(",")]
+    rng = random.Random(0)
+    persist_dir = tempfile.mkdtemp(prefix="intellidoc-bench-hybrid-")
+    registry.register_embedding_model(BatchedEmbeddings(args.model or build_tiny_model()))
+    try:
+        with timer() as t:
+            chunks = build_corpus(persist_dir, args.docs, args.sections, rng)
+        queries = make_queries(chunks, args.queries, rng)
+        lexical = registry.get_lexical(persist_dir)
+
+        def bm25_search(question, k, source):
+            ids = [chunk_id for chunk_id, _ in lexical.search(question, k=k, source=source)]
+            return registry.get_store(persist_dir).get(ids)
+
+        rows = [
+            evaluate("dense", lambda q, k, s: dense_search(q, k, s, persist_dir), queries, ks),
+            evaluate("bm25", bm25_search, queries, ks),
+            evaluate("hybrid (rrf)", lambda q, k, s: hybrid_search(q, k, s, persist_dir), queries, ks),
+        ]
+        print(f"chunks={len(chunks)} queries={len(queries)} index_seconds={t['seconds']:.1f} "
+              f"lexical={lexical.stats()}")
+        print_table(rows, ["retriever"] + [f"recall@{k}" for k in ks] + ["p50_ms", "p95_ms"])
+    finally:
+        registry.close()
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
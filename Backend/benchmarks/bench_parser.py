@@ -0,0 +1,99 @@
+# backend/benchmarks/bench_parser.py
+# Extraction + chunking of a long synthetic agreement (generated locally with
+# reportlab): the old whole-string extractor versus the streaming, page-aware
+# parser.iter_pdf_pages -> chunker.iter_chunks pipeline. Each mode runs in a fresh
+# process so peak RSS is comparable.
+#
+#   python -m benchmarks.bench_parser [--pages 500]
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import peak_rss_mb, print_table, synthetic_clause
+
+
+def make_pdf(path: str, pages: int, lines_per_page: int = 45):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    rng = random.Random(0)
+    c = canvas.Canvas(path, pagesize=A4)
+    clause = 1
+    for _ in range(pages):
+        y = 800
+        for _ in range(lines_per_page):
+            c.drawString(40, y, f"{clause}. {synthetic_clause(rng)}"[:110])
+            clause += 1
+            y -= 17
+        c.showPage()
+    c.save()
+
+
+def old_extract_and_chunk(content: bytes):
+    """
+    The previous load_pdf_bytes (text += page.get_text()) followed by whole-text chunking.
+    """
+    import fitz
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    doc = fitz.open(stream=content, filetype="pdf")
+    text = ""
+    for page in doc:
+        text += page.get_text("text") or ""
+    doc.close()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    return sum(1 for _ in splitter.split_documents([Document(page_content=text)]))
+
+
+def new_extract_and_chunk(content: bytes):
+    from app.core.chunker import iter_chunks
+    from app.core.parser import iter_pdf_pages
+
+    return sum(1 for _ in iter_chunks(iter_pdf_pages(content, ocr_if_needed=False)))
+
+
+def _measure(mode: str, path: str, out):
+    with open(path, "rb") as f:
+        content = f.read()
+    fn = old_extract_and_chunk if mode == "old (text +=)" else new_extract_and_chunk
+    fn(content)  # warm-up: imports and first-call costs
+    start = time.perf_counter()
+    chunks = fn(content)
+    seconds = time.perf_counter() - start
+    # Separate traced run: tracemalloc slows allocation-heavy code several-fold
+    tracemalloc.start()
+    fn(content)
+    _, peak = tracemalloc.get_traced_memory()
+    out.put({"mode": mode, "seconds": round(seconds, 3), "chunks": chunks,
+             "py_peak_mb": round(peak / (1024 * 1024), 1), "peak_rss_mb": peak_rss_mb()})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"intellidoc-bench-{args.pages}p.pdf")
+    if not os.path.exists(path):
+        make_pdf(path, args.pages)
+
+    rows = []
+    ctx = multiprocessing.get_context("spawn")
+    for mode in ["old (text +=)", "streaming pages"]:
+        out = ctx.Queue()
+        proc = ctx.Process(target=_measure, args=(mode, path, out))
+        proc.start()
+        rows.append(out.get())
+        proc.join()
+
+    print(f"pdf={path} pages={args.pages} size={os.path.getsize(path) / (1024 * 1024):.1f} MB")
+    print_table(rows, ["mode", "seconds", "chunks", "py_peak_mb", "peak_rss_mb"])
+
+
+if __name__ == "__main__":
+    main()
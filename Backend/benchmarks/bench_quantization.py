@@ -0,0 +1,133 @@
+# backend/benchmarks/bench_quantization.py
+# Quantized vector codes in the local index: float32 rows versus int8 and binary codes
+# with float32 rescoring, next to plain Chroma, on the synthetic clustered 384-d corpus
+# of bench_vector_index. Per corpus size it reports recall@10 against brute force,
+# queries per second, bytes per chunk scanned per query and stored on disk, and the
+# resident memory of a fresh process that opened the index and ran the queries, split
+# into private memory (Chroma's HNSW graph lives here) and mapped file pages (the
+# local index's matrices; clean pages the kernel can reclaim). Each index is built in
+# its own process, then queried in another; Chroma is skipped above --chroma-max.
+# A variant is "<codes> [exact|ivf]".
+#
+#   python -m benchmarks.bench_quantization [--sizes 100000,1000000] [--queries 200] [--rescore N]
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from app.core import config
+from benchmarks.bench_vector_index import BLOCK, CHUNKS_PER_SOURCE, DIM, ground_truth, vector_block
+from benchmarks.common import print_table
+
+# Bytes per chunk the local index scans per query, by codes
+SCAN_BYTES = {"float32": DIM * 4, "int8": DIM, "binary": DIM // 8}
+
+
+def _rss_mb() -> dict:
+    """
+    Private (anonymous) and file-backed resident memory of this process (Linux).
+    """
+    with open("/proc/self/status", encoding="utf-8") as f:
+        status = dict(line.split(":", 1) for line in f)
+    return {"query_rss_anon_mb": round(int(status["RssAnon"].split()[0]) / 1024, 1),
+            "query_rss_file_mb": round(int(status["RssFile"].split()[0]) / 1024, 1)}
+
+
+def _open(variant: str, size: int, persist_dir: str, rescore: int):
+    if variant == "chroma":
+        import chromadb
+        from langchain_chroma import Chroma
+
+        from app.core.vector_index import ChromaIndex
+
+        return ChromaIndex(Chroma(client=chromadb.PersistentClient(path=persist_dir), embedding_function=None))
+    from app.core.vector_index import LocalIndex
+
+    codes, _, search = variant.partition(" ")
+    return LocalIndex(persist_dir, search=search or "exact", ivf_min_rows=min(size, 50_000),
+                      codes=codes, rescore=rescore)
+
+
+def _build(variant: str, size: int, persist_dir: str, rescore: int, out):
+    from langchain_core.documents import Document
+
+    try:
+        store = _open(variant, size, persist_dir, rescore)
+        start = time.perf_counter()
+        for block in range(0, size, BLOCK):
+            n = min(BLOCK, size - block)
+            docs = [Document(page_content=f"chunk {i}", metadata={"source": f"doc{i // CHUNKS_PER_SOURCE}"})
+                    for i in range(block, block + n)]
+            store.add_vectors([str(i) for i in range(block, block + n)], vector_block(block, n), docs)
+        store.close()
+        out.put({"ingest_s": round(time.perf_counter() - start, 1)})
+    except Exception as e:
+        out.put({"error": repr(e)})
+        raise
+
+
+def _query(variant: str, size: int, persist_dir: str, rescore: int, queries, truth, out):
+    try:
+        store = _open(variant, size, persist_dir, rescore)
+        store.similarity_search_by_vector(queries[0].tolist(), k=10)  # warm-up (Chroma loads its index)
+        hits, start = 0, time.perf_counter()
+        for q, expected in zip(queries, truth):
+            found = store.similarity_search_by_vector(q.tolist(), k=10)
+            hits += len({int(d.id) for d in found} & set(expected.tolist()))
+        seconds = time.perf_counter() - start
+        memory = _rss_mb()
+        store.close()
+        out.put({"recall@10": round(hits / truth.size, 3), "qps": round(len(queries) / seconds, 1), **memory})
+    except Exception as e:
+        out.put({"error": repr(e)})
+        raise
+
+
+def _run(ctx, target, *args) -> dict:
+    out = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--variants", default="chroma,float32,int8,binary,float32 ivf,int8 ivf,binary ivf")
+    parser.add_argument("--rescore", type=int, default=None, help="default: INTELLIDOC_LOCAL_RESCORE_FACTOR")
+    parser.add_argument("--chroma-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = []
+    ctx = multiprocessing.get_context("spawn")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        queries, truth = ground_truth(size, args.queries)
+        for variant in args.variants.split(","):
+            if variant == "chroma" and size > args.chroma_max:
+                continue
+            persist_dir = tempfile.mkdtemp(prefix="intellidoc-bench-quant-")
+            try:
+                row = {"index": variant if variant == "chroma" else f"local {variant}", "chunks": size}
+                row.update(_run(ctx, _build, variant, size, persist_dir, args.rescore))
+                if "error" not in row:
+                    row.update(_run(ctx, _query, variant, size, persist_dir, args.rescore, queries, truth))
+                disk = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(persist_dir) for f in files)
+                row["scan_bytes_per_chunk"] = SCAN_BYTES.get(variant.split(" ")[0], "-")
+                row["disk_bytes_per_chunk"] = round(disk / size)
+            finally:
+                shutil.rmtree(persist_dir, ignore_errors=True)
+            rows.append(row)
+            print(row, flush=True)
+    columns = ["index", "chunks", "ingest_s", "recall@10", "qps", "scan_bytes_per_chunk",
+               "disk_bytes_per_chunk", "query_rss_anon_mb", "query_rss_file_mb"]
+    print(f"queries={args.queries} rescore={args.rescore or config.LOCAL_RESCORE_FACTOR}")
+    print_table(rows, columns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_rerank.py
+# Cross-encoder reranking under concurrent /query/ask-style load: the old per-request
+# CrossEncoder.predict versus RerankerService (micro-batched across requests, LRU score
+# cache, candidate pre-pruning). Also reports how long the old import-time model load
+# blocked startup. Uses a small random cross-encoder so it runs offline.
+#
+#   python -m benchmarks.bench_rerank [--requests 96] [--threads 8] [--candidates 20] [--model PATH]
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+
+from app.core.reranker import RerankerService
+from benchmarks.common import build_tiny_cross_encoder, print_table, synthetic_clause, timer
+
+
+def make_requests(n: int, candidates: int, repeat: float, rng: random.Random):
+    """
+    (question, docs) pairs; a `repeat` fraction re-asks an earlier question over the same
+    candidates, as users and the UI do.
+    """
+    requests = []
+    for i in range(n):
+        if requests and rng.random() < repeat:
+            requests.append(rng.choice(requests))
+            continue
+        docs = [Document(id=f"doc{i}:{j}", page_content=" ".join(synthetic_clause(rng) for _ in range(4)))
+                for j in range(candidates)]
+        requests.append((f"question {i}: {synthetic_clause(rng)}", docs))
+    return requests
+
+
+def run(name, fn, requests, threads):
+    with timer() as t:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(lambda r: fn(*r), requests))
+    return {"mode": name, "seconds": round(t["seconds"], 2), "req_per_s": round(len(requests) / t["seconds"], 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=96)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--rerank-k", type=int, default=10)
+    parser.add_argument("--repeat", type=float, default=0.3)
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    from sentence_transformers import CrossEncoder
+
+    model_path = args.model or build_tiny_cross_encoder()
+    start = time.perf_counter()
+    old_model = CrossEncoder(model_path)
+    old_load = time.perf_counter() - start
+
+    def old_rerank(question, docs, top_k=3):
+        scores = old_model.predict([(question, d.page_content) for d in docs])
+        return [d for d, _ in sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)[:top_k]]
+
+    requests = make_requests(args.requests, args.candidates, args.repeat, random.Random(0))
+    rows = [run("old: per-request predict", old_rerank, requests, args.threads)]
+
+    service = RerankerService(model_path, cache_size=0)
+    start = time.perf_counter()
+    service.start_background()
+    startup_block = time.perf_counter() - start
+    service.load()
+    rows.append(run("batched", lambda q, d: service.rerank(d, q), requests, args.threads))
+    service.close()
+
+    service = RerankerService(model_path)
+    service.load()
+    rows.append(run("batched + cache", lambda q, d: service.rerank(d, q), requests, args.threads))
+    service.close()
+
+    service = RerankerService(model_path)
+    service.load()
+    rows.append(run(f"batched + cache + prune to {args.rerank_k}",
+                    lambda q, d: service.rerank(d, q, prune_to=args.rerank_k), requests, args.threads))
+    stats = service.stats()
+    service.close()
+
+    print(f"requests={args.requests} threads={args.threads} candidates={args.candidates} repeat={args.repeat}")
+    print(f"startup blocked on model load: old {old_load:.2f}s (at import), new {startup_block * 1000:.1f}ms")
+    print_table(rows, ["mode", "seconds", "req_per_s"])
+    print(f"last run: avg batch {stats['batching']['avg_batch_size']} pairs, cache hit rate {stats['cache']['hit_rate']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# backend/benchmarks/bench_tenants.py
+# Single-document (source-filtered) query latency against total corpus size, on the
+# synthetic clustered 384-d corpus of bench_vector_index (CHUNKS_PER_SOURCE chunks per
+# document). Per corpus size it reports the median latency of a top-10 query restricted
+# to one document through: Chroma's metadata filter over the whole collection, the
+# per-document sub-index (cold: built from the manifest's chunk ids for that query;
+# warm: already in memory), the local index's per-source rows, and the BM25 index with
+# a common term. A tenant's collection is just a smaller corpus, so the rows also show
+# what partitioning by tenant buys for unfiltered queries. Each size runs in a fresh
+# process.
+#
+#   python -m benchmarks.bench_tenants [--sizes 10000,50000,100000] [--queries 200]
+import argparse
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from functools import partial
+
+from benchmarks.bench_vector_index import BLOCK, CHUNKS_PER_SOURCE, ground_truth, vector_block
+from benchmarks.common import print_table
+
+
+def _median_ms(fn, calls) -> float:
+    latencies = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(latencies), 2)
+
+
+def _measure(size: int, queries, truth, out):
+    import chromadb
+    from langchain_chroma import Chroma
+    from langchain_core.documents import Document
+
+    from app.core.doc_index import DocumentIndexes
+    from app.core.lexical import LexicalIndex
+    from app.core.manifest import DocumentManifest
+    from app.core.vector_index import ChromaIndex, LocalIndex
+
+    persist_dir = tempfile.mkdtemp(prefix="intellidoc-bench-tenants-")
+    try:
+        chroma = ChromaIndex(Chroma(client=chromadb.PersistentClient(path=persist_dir), embedding_function=None))
+        local = LocalIndex(os.path.join(persist_dir, "local"), search="exact")
+        lexical = LexicalIndex(persist_dir)
+        manifest = DocumentManifest(persist_dir)
+        chunk_ids = {}
+        for block in range(0, size, BLOCK):
+            n = min(BLOCK, size - block)
+            ids = [str(i) for i in range(block, block + n)]
+            sources = [f"doc{i // CHUNKS_PER_SOURCE}" for i in range(block, block + n)]
+            docs = [Document(page_content=f"chunk {i}", metadata={"source": s}) for i, s in zip(ids, sources)]
+            vectors = vector_block(block, n)
+            chroma.add_vectors(ids, vectors, docs)
+            local.add_vectors(ids, vectors, docs)
+            lexical.add(ids, [d.page_content for d in docs], sources)
+            for cid, source in zip(ids, sources):
+                chunk_ids.setdefault(source, []).append(cid)
+        for source, cids in chunk_ids.items():
+            manifest.record(source, "", cids)
+        indexes = DocumentIndexes()
+        search = partial(indexes.search, persist_dir, chroma, manifest)
+
+        calls = [(q.tolist(), f"doc{int(expected[0]) // CHUNKS_PER_SOURCE}", int(expected[0]))
+                 for q, expected in zip(queries, truth)]
+        chroma.similarity_search_by_vector(calls[0][0], k=10)  # Chroma loads its index
+
+        def cold(q, source, _):
+            indexes.clear()
+            search(source, q, 10)
+
+        result = {
+            "chunks": size,
+            "chroma_filter_ms": _median_ms(lambda q, s, _: chroma.similarity_search_by_vector(q, k=10, source=s),
+                                           calls),
+            "doc_index_cold_ms": _median_ms(cold, calls),
+        }
+        # Builds every queried document's sub-index, checked against the exact filtered scan
+        agree = 0
+        for q, source, _ in calls:
+            exact = {d.id for d in local.similarity_search_by_vector(q, k=10, source=source)}
+            agree += len({d.id for d in search(source, q, 10)} & exact)
+        out.put({
+            **result,
+            "doc_index_warm_ms": _median_ms(lambda q, s, _: search(s, q, 10), calls),
+            "local_filter_ms": _median_ms(lambda q, s, _: local.similarity_search_by_vector(q, k=10, source=s),
+                                          calls),
+            "bm25_filter_ms": _median_ms(lambda q, s, row: lexical.search(f"chunk {row}", k=10, source=s), calls),
+            "chroma_unfiltered_ms": _median_ms(lambda q, s, _: chroma.similarity_search_by_vector(q, k=10),
+                                               calls),
+            "doc_index_agree@10": round(agree / (10 * len(calls)), 3),
+        })
+        chroma.close()
+        local.close()
+        lexical.close()
+        manifest.close()
+    except Exception as e:
+        out.put({"chunks": size, "error": repr(e)})
+        raise
+    finally:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,50000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = []
+    ctx = multiprocessing.get_context("spawn")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        queries, truth = ground_truth(size, args.queries)
+        out = ctx.Queue()
+        proc = ctx.Process(target=_measure, args=(size, queries, truth, out))
+        proc.start()
+        rows.append(out.get())
+        proc.join()
+        print(rows[-1], flush=True)
+    print(f"queries={args.queries} chunks_per_document={CHUNKS_PER_SOURCE} k=10")
+    print_table(rows, list(rows[0]))
+
+
+if __name__ == "__main__":
+    main()
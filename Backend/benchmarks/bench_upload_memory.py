@@ -0,0 +1,71 @@
+# backend/benchmarks/bench_upload_memory.py
+# Peak RSS of parsing an upload held fully in memory (the old `await file.read()`
+# path) versus parsing the spooled file from disk, for scan-heavy PDFs of growing
+# size (pages carry incompressible images plus a short text layer). Each run is a
+# fresh process.
+#
+#   python -m benchmarks.bench_upload_memory [--sizes-mb 20,80]
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+
+from benchmarks.common import peak_rss_mb, print_table, synthetic_clause
+
+
+def make_scan_pdf(path: str, target_mb: int):
+    from PIL import Image
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    rng = random.Random(0)
+    c = canvas.Canvas(path, pagesize=A4)
+    pages = max(1, target_mb // 2)
+    for _ in range(pages):
+        noise = Image.frombytes("RGB", (820, 820), os.urandom(820 * 820 * 3))
+        c.drawImage(ImageReader(noise), 40, 100, width=500, height=500)
+        c.drawString(40, 800, synthetic_clause(rng))
+        c.showPage()
+    c.save()
+
+
+def _run(mode: str, path: str, out):
+    from app.core.parser import iter_pdf_pages
+
+    baseline = peak_rss_mb()
+    if mode == "in-memory bytes":
+        with open(path, "rb") as f:
+            content = f.read()
+        pages = sum(1 for _ in iter_pdf_pages(content, ocr_if_needed=False))
+    else:
+        pages = sum(1 for _ in iter_pdf_pages(path, ocr_if_needed=False))
+    out.put({"mode": mode, "pages": pages, "peak_rss_mb": peak_rss_mb(),
+             "over_baseline_mb": round(peak_rss_mb() - baseline, 1)})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", default="20,80")
+    args = parser.parse_args()
+
+    rows = []
+    ctx = multiprocessing.get_context("spawn")
+    for size in [int(s) for s in args.sizes_mb.split(",")]:
+        path = os.path.join(tempfile.gettempdir(), f"intellidoc-bench-scan-{size}mb.pdf")
+        if not os.path.exists(path):
+            make_scan_pdf(path, size)
+        for mode in ["in-memory bytes", "spooled path"]:
+            out = ctx.Queue()
+            proc = ctx.Process(target=_run, args=(mode, path, out))
+            proc.start()
+            row = out.get()
+            proc.join()
+            rows.append({"file_mb": round(os.path.getsize(path) / (1024 * 1024), 1), **row})
+
+    print_table(rows, ["file_mb", "mode", "pages", "peak_rss_mb", "over_baseline_mb"])
+
+
+if __name__ == "__main__":
+    main()
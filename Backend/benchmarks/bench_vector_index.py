@@ -0,0 +1,141 @@
+# backend/benchmarks/bench_vector_index.py
+# Vector index backends on synthetic clustered 384-d embeddings: Chroma (SQLite + HNSW)
+# versus the local memory-mapped index with exact and IVF search. Per corpus size it
+# reports ingest time, recall@10 against brute force, query latency (unfiltered and
+# filtered to one source), peak RSS and on-disk size. Each run is a fresh process so
+# peak RSS is comparable; Chroma is skipped above --chroma-max (its HNSW build alone
+# takes many minutes at 1M).
+#
+#   python -m benchmarks.bench_vector_index [--sizes 10000,100000,1000000] [--queries 200]
+import argparse
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from benchmarks.common import peak_rss_mb, print_table
+
+DIM = 384
+CLUSTERS = 2000
+BLOCK = 10_000
+CHUNKS_PER_SOURCE = 50
+
+
+@lru_cache(maxsize=1)
+def _centres() -> np.ndarray:
+    return np.random.default_rng(0).normal(size=(CLUSTERS, DIM)).astype(np.float32)
+
+
+def vector_block(start: int, size: int) -> np.ndarray:
+    """
+    Rows start..start+size of the synthetic corpus: noisy copies of cluster centres,
+    L2-normalized. Deterministic per block, so every process sees the same vectors.
+    """
+    rng = np.random.default_rng(start + 1)
+    x = _centres()[rng.integers(0, CLUSTERS, size)] + 0.6 * rng.normal(size=(size, DIM)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def ground_truth(size: int, n_queries: int, k: int = 10):
+    """
+    Queries near random corpus rows and their exact top-k ids (block-wise brute force).
+    """
+    rng = np.random.default_rng(12345)
+    picks = np.sort(rng.choice(size, n_queries, replace=False))
+    queries = np.vstack([vector_block(b, min(BLOCK, size - b))[picks[(picks >= b) & (picks < b + BLOCK)] - b]
+                         for b in range(0, size, BLOCK)])
+    queries += 0.3 * rng.normal(size=queries.shape).astype(np.float32) / np.sqrt(DIM)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    best = np.full((n_queries, k), -np.inf), np.zeros((n_queries, k), dtype=np.int64)
+    for start in range(0, size, BLOCK):
+        scores = queries @ vector_block(start, min(BLOCK, size - start)).T
+        merged = np.hstack([best[0], scores])
+        ids = np.hstack([best[1], start + np.arange(scores.shape[1])[None, :].repeat(n_queries, 0)])
+        top = np.argsort(-merged, axis=1)[:, :k]
+        best = np.take_along_axis(merged, top, 1), np.take_along_axis(ids, top, 1)
+    return queries, best[1]
+
+
+def _measure(backend: str, size: int, queries, truth, out):
+    from langchain_core.documents import Document
+
+    from app.core.vector_index import ChromaIndex, LocalIndex
+
+    persist_dir = tempfile.mkdtemp(prefix=f"intellidoc-bench-vi-{backend}-")
+    try:
+        if backend == "chroma":
+            import chromadb
+            from langchain_chroma import Chroma
+
+            store = ChromaIndex(Chroma(client=chromadb.PersistentClient(path=persist_dir), embedding_function=None))
+        else:
+            store = LocalIndex(persist_dir, search=backend.split()[-1], ivf_min_rows=min(size, 50_000))
+
+        start = time.perf_counter()
+        for block in range(0, size, BLOCK):
+            n = min(BLOCK, size - block)
+            ids = [str(i) for i in range(block, block + n)]
+            docs = [Document(page_content=f"chunk {i}", metadata={"source": f"doc{i // CHUNKS_PER_SOURCE}"})
+                    for i in range(block, block + n)]
+            store.add_vectors(ids, vector_block(block, n), docs)
+        ingest = time.perf_counter() - start
+
+        latencies, filtered, hits = [], [], 0
+        for q, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = store.similarity_search_by_vector(q.tolist(), k=10)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len({int(d.id) for d in found} & set(expected.tolist()))
+            source = f"doc{int(expected[0]) // CHUNKS_PER_SOURCE}"
+            start = time.perf_counter()
+            store.similarity_search_by_vector(q.tolist(), k=10, source=source)
+            filtered.append((time.perf_counter() - start) * 1000)
+
+        disk = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(persist_dir) for f in files)
+        store.close()
+        out.put({
+            "backend": backend, "chunks": size,
+            "ingest_s": round(ingest, 1), "recall@10": round(hits / truth.size, 3),
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(sorted(latencies)[int(0.95 * (len(latencies) - 1))], 2),
+            "filtered_p50_ms": round(statistics.median(filtered), 2),
+            "peak_rss_mb": peak_rss_mb(), "disk_mb": round(disk / (1024 * 1024), 1),
+        })
+    except Exception as e:
+        out.put({"backend": backend, "chunks": size, "error": repr(e)})
+        raise
+    finally:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backends", default="chroma,local exact,local ivf")
+    parser.add_argument("--chroma-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = []
+    ctx = multiprocessing.get_context("spawn")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        queries, truth = ground_truth(size, args.queries)
+        for backend in args.backends.split(","):
+            if backend == "chroma" and size > args.chroma_max:
+                continue
+            out = ctx.Queue()
+            proc = ctx.Process(target=_measure, args=(backend, size, queries, truth, out))
+            proc.start()
+            rows.append(out.get())
+            proc.join()
+            print(rows[-1], flush=True)
+    print_table(rows, list(rows[0]))
+
+
+if __name__ == "__main__":
+    main()
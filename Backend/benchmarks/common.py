@@ -0,0 +1,135 @@
+# backend/benchmarks/common.py
+# Shared helpers for the benchmark scripts. Run them from Backend/, e.g.
+#   python -m benchmarks.bench_embeddings
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+
+from app.core.memory import peak_rss_mb  # noqa: F401 (used by the benchmark scripts)
+
+PARTIES = ["ABC Bank Ltd", "John Doe", "Acme Consulting LLP", "Orion Finance", "Priya Sharma", "Zenith Corp"]
+
+CLAUSE_TEMPLATES = [
+    "The Borrower shall pay interest at the rate of {rate}% per annum on the outstanding principal.",
+    "The loan amount of INR {amount} shall be repaid in {months} monthly installments.",
+    "This Agreement shall be governed by the laws of India and the courts at {city} shall have jurisdiction.",
+    "Either party may terminate this Agreement by giving {days} days written notice to the other party.",
+    "The Receiving Party shall keep all Confidential Information strictly confidential for {years} years.",
+    "The Consultant shall indemnify the Company against any loss, damages or liability arising from breach.",
+    "All intellectual property created under this Agreement shall vest in {party}.",
+    "An event of default occurs if any installment remains unpaid for {days} days after the due date.",
+    "The Borrower shall create a mortgage over the property as security for the loan.",
+    "Fees shall be invoiced monthly and paid within {days} days of receipt of the invoice.",
+]
+
+CITIES = ["Mumbai", "Bengaluru", "Delhi", "Chennai", "Pune"]
+
+
+def synthetic_clause(rng: random.Random) -> str:
+    return rng.choice(CLAUSE_TEMPLATES).format(
+        rate=rng.choice([8.5, 9.5, 10.25, 12, 14]),
+        amount=f"{rng.randint(1, 99)},{rng.randint(10, 99)},000",
+        months=rng.choice([12, 24, 36, 60]),
+        city=rng.choice(CITIES),
+        days=rng.choice([7, 15, 30, 60, 90]),
+        years=rng.choice([2, 3, 5]),
+        party=rng.choice(PARTIES),
+    )
+
+
+def synthetic_contract(rng: random.Random, n_clauses: int = 40) -> str:
+    """
+    A numbered contract body built from clause templates.
+    """
+    lines = [f"LOAN AGREEMENT between {rng.choice(PARTIES)} and {rng.choice(PARTIES)}", ""]
+    for i in range(1, n_clauses + 1):
+        lines.append(f"{i}. {synthetic_clause(rng)}")
+    return "\n".join(lines)
+
+
+def synthetic_texts(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [synthetic_clause(rng) for _ in range(n)]
+
+
+def _tiny_tokenizer_dir(hf_dir: str):
+    """
+    Save a BERT word-piece tokenizer whose vocabulary covers the synthetic contract text;
+    returns (hf_dir, vocab size).
+    """
+    from transformers import BertTokenizerFast
+
+    words = set()
+    for template in CLAUSE_TEMPLATES + PARTIES + CITIES:
+        words.update(template.lower().replace(",", " ").replace(".", " ").split())
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + sorted(words) + [str(d) for d in range(10)]
+
+    os.makedirs(hf_dir, exist_ok=True)
+    vocab_file = os.path.join(hf_dir, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab))
+    BertTokenizerFast(vocab_file=vocab_file).save_pretrained(hf_dir)
+    return hf_dir, len(vocab)
+
+
+def build_tiny_model(path: str = None, hidden: int = 128, layers: int = 2) -> str:
+    """
+    Create a small randomly initialised sentence-transformers model on disk, so the
+    benchmarks run offline. Throughput is representative of batching behaviour,
+    not of MiniLM's absolute speed.
+    """
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel
+
+    path = path or os.path.join(tempfile.gettempdir(), f"intellidoc-tiny-st-{hidden}x{layers}")
+    if os.path.exists(os.path.join(path, "modules.json")):
+        return path
+
+    hf_dir, vocab_size = _tiny_tokenizer_dir(path + "-hf")
+    config = BertConfig(vocab_size=vocab_size, hidden_size=hidden, num_hidden_layers=layers,
+                        num_attention_heads=2, intermediate_size=hidden * 2, max_position_embeddings=256)
+    BertModel(config).save_pretrained(hf_dir)
+
+    transformer = models.Transformer(hf_dir, max_seq_length=128)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), "mean")
+    SentenceTransformer(modules=[transformer, pooling, models.Normalize()]).save(path)
+    return path
+
+
+def build_tiny_cross_encoder(path: str = None, hidden: int = 128, layers: int = 2) -> str:
+    """
+    Same idea as build_tiny_model for a cross-encoder (BERT with a single-logit head),
+    loadable with sentence_transformers.CrossEncoder.
+    """
+    from transformers import BertConfig, BertForSequenceClassification
+
+    path = path or os.path.join(tempfile.gettempdir(), f"intellidoc-tiny-ce-{hidden}x{layers}")
+    if os.path.exists(os.path.join(path, "config.json")):
+        return path
+    _, vocab_size = _tiny_tokenizer_dir(path)
+    config = BertConfig(vocab_size=vocab_size, hidden_size=hidden, num_hidden_layers=layers, num_labels=1,
+                        num_attention_heads=2, intermediate_size=hidden * 2, max_position_embeddings=256)
+    BertForSequenceClassification(config).save_pretrained(path)
+    return path
+
+
+@contextmanager
+def timer():
+    """
+    Yields a dict whose "seconds" key is filled in when the block exits.
+    """
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+
+def print_table(rows, columns):
+    widths = [max(len(str(c)), *(len(str(r.get(c, ""))) for r in rows)) for c in columns]
+    print("  ".join(str(c).ljust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
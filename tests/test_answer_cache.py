@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app.core.answer_cache import AnswerCache, answer_cache
+from app.core.context import build_context
+from app.core.registry import registry
+from app.routes import query
+
+
+def test_semantic_hit_ttl_and_lru():
+    cache = AnswerCache(max_entries=2, ttl_seconds=60, similarity=0.9)
+    cache.put("What is the interest rate?", "scope", "9.5%", [], 1200.0, embedding=[1.0, 0.0])
+
+    assert cache.get("what is the  INTEREST rate", "scope")[1] == "exact"
+    entry, kind, _ = cache.get("Interest rate charged?", "scope", embed=lambda: [0.99, 0.1])
+    assert (entry.answer, kind) == ("9.5%", "semantic")
+    assert cache.get("Who are the parties?", "scope", embed=lambda: [0.0, 1.0])[0] is None
+    assert cache.get("What is the interest rate", "other scope")[0] is None
+
+    cache.put("b", "scope", "B", [], 1.0)
+    cache.put("c", "scope", "C", [], 1.0)
+    assert cache.get("What is the interest rate?", "scope")[0] is None  # least recently used
+    cache.ttl_seconds = 1e-9
+    assert cache.get("c", "scope")[0] is None
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["evictions"], stats["expirations"]) == (1, 1, 1, 1)
+    assert stats["misses"] == 4
+
+
+def test_ask_reuses_answer_until_document_changes(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(answer_cache, "similarity", 0.0)
+    answer_cache.clear()
+    docs = [Document(page_content="Interest is 9.5% per annum.", metadata={"source": "loan.pdf"})]
+    calls = []
+    monkeypatch.setattr(query, "_retrieve", lambda req, timings, embedding=None, persist_dir=None: build_context(docs))
+
+    async def fake_llm(prompt):
+        calls.append(prompt)
+        return "9.5%"
+
+    monkeypatch.setattr(query, "aask_llm", fake_llm)
+
+    app = FastAPI()
+    app.include_router(query.router, prefix="/query")
+    body = {"question": "What is the interest rate?", "source_filter": "loan.pdf"}
+    with TestClient(app) as client:
+        first = client.post("/query/ask", json=body).json()
+        second = client.post("/query/ask", json={**body, "question": "what is the interest rate"}).json()
+        registry.get_manifest("chroma_db").record("other.pdf", "x", [])
+        third = client.post("/query/ask", json=body).json()
+        registry.get_manifest("chroma_db").record("loan.pdf", "new", [])
+        fourth = client.post("/query/ask", json=body).json()
+
+    assert first["answer"] == second["answer"] == "9.5%"
+    assert second["usage"] == first["usage"] and first["usage"]["prompt_tokens"] > 0
+    assert second["timings"]["cache"] == "exact" and third["timings"]["cache"] == "exact"
+    assert "cache" not in fourth["timings"]
+    assert len(calls) == 2
+    registry.close()
@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import zipfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.batch import batch_checker
+from app.core.spool import SpooledUpload, UploadTooLarge, unpack_zip
+from app.routes import legal_check
+
+
+def _pdf(lines):
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf)
+    for i, line in enumerate(lines):
+        c.drawString(30, 800 - 14 * i, line)
+    c.save()
+    return buf.getvalue()
+
+
+LOAN = _pdf([
+    "LOAN AGREEMENT",
+    "1. Interest shall accrue at 9.5% per annum.",
+    "2. Repayment in 24 monthly installments of INR 10,000 on the due date.",
+    "3. Non-payment for 30 days is an event of default.",
+])
+
+
+def test_batch_streams_ndjson_and_summary(monkeypatch):
+    monkeypatch.setattr(batch_checker, "processes", 0)  # thread pool keeps the test fast
+    bundle = io.BytesIO()
+    with zipfile.ZipFile(bundle, "w") as z:
+        z.writestr("a/loan.pdf", LOAN)
+        z.writestr("readme.txt", "ignored")
+
+    app = FastAPI()
+    app.include_router(legal_check.router, prefix="/legal")
+    files = [
+        ("files", ("loan.pdf", LOAN, "application/pdf")),
+        ("files", ("bundle.zip", bundle.getvalue(), "application/zip")),
+        ("files", ("broken.pdf", b"not a pdf", "application/pdf")),
+    ]
+    with TestClient(app) as client:
+        r = client.post("/legal/batch", files=files, data={"document_type": "loan_agreement"})
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.text.splitlines()]
+
+    docs, summary = lines[:-1], lines[-1]
+    assert sorted(d["source"] for d in docs) == ["broken.pdf", "bundle.zip/a/loan.pdf", "loan.pdf"]
+    loan = next(d for d in docs if d["source"] == "loan.pdf")
+    assert loan["risk"]["missing"] == ["collateral", "jurisdiction"]
+    assert summary["type"] == "summary"
+    assert (summary["documents"], summary["ok"], summary["failed"]) == (3, 2, 1)
+    assert summary["most_missing"][0]["documents"] == 2
+
+
+@pytest.mark.parametrize("limits", [{"max_files": 2}, {"max_total_bytes": 2500}])
+def test_unpack_zip_enforces_count_and_total_size_while_streaming(tmp_path, monkeypatch, limits):
+    monkeypatch.setattr("app.core.config.SPOOL_DIR", str(tmp_path / "spool"))
+    os.makedirs(tmp_path / "spool")
+    path = tmp_path / "bomb.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for i in range(3):
+            z.writestr(f"{i}/x.pdf", b"0" * 1000)
+    upload = SpooledUpload(filename="bomb.zip", path=str(path), size=path.stat().st_size, sha256="")
+
+    with pytest.raises(UploadTooLarge):
+        unpack_zip(upload, **limits)
+    assert os.listdir(tmp_path / "spool") == []  # members spooled so far are removed
+    members = unpack_zip(upload, max_files=3, max_total_bytes=3000)
+    assert len({m.id for m in members}) == 3
+    for m in members:
+        m.cleanup()
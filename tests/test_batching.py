@@ -0,0 +1,43 @@
+import threading
+
+from app.core.batching import MicroBatcher
+
+
+def test_concurrent_requests_share_batches():
+    calls = []
+
+    def double(items):
+        calls.append(len(items))
+        return [x * 2 for x in items]
+
+    batcher = MicroBatcher(double, max_batch=32, max_wait_ms=50).start()
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.submit([i, i + 100]).result(timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert results == {i: [i * 2, (i + 100) * 2] for i in range(8)}
+    assert sum(calls) == 16
+    assert len(calls) < 8
+
+
+def test_errors_reach_every_caller():
+    def boom(items):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(boom, max_wait_ms=1).start()
+    fut = batcher.submit(["a"])
+    try:
+        fut.result(timeout=5)
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert "model failed" in str(e)
+    finally:
+        batcher.close()
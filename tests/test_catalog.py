@@ -0,0 +1,58 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.manifest import DocumentManifest
+from app.core.registry import registry
+from app.routes import admin
+
+
+def test_catalog_counts_pages_and_filters(tmp_path):
+    manifest = DocumentManifest(str(tmp_path))
+    for i in range(5):
+        manifest.record(f"doc{i}.pdf", f"h{i}", [f"{i}:{n}" for n in range(i + 1)], page_count=i + 2,
+                        doc_type="loan_agreement" if i % 2 else "nda", parser="pymupdf")
+    manifest.record("doc1.pdf", "h1b", ["1:0"], page_count=1, doc_type="loan_agreement", parser="ocr")
+    manifest.remove("doc4.pdf")
+    assert manifest.counts() == {"documents": 4, "chunks": 1 + 1 + 3 + 4}
+
+    page = manifest.catalog(offset=1, limit=2)
+    assert page["total"] == 4 and [d["source"] for d in page["documents"]] == ["doc1.pdf", "doc2.pdf"]
+    assert page["documents"][0]["parser"] == "ocr" and "chunk_ids" not in page["documents"][0]
+    assert [d["source"] for d in manifest.catalog(doc_type="nda")["documents"]] == ["doc0.pdf", "doc2.pdf"]
+
+    # Counts are rebuilt when the manifest is reloaded
+    reloaded = DocumentManifest(str(tmp_path))
+    assert reloaded.counts() == manifest.counts()
+    assert reloaded.describe("doc3.pdf")["page_count"] == 5
+
+
+def test_manifest_json_is_imported_once(tmp_path):
+    with open(tmp_path / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump({"a.pdf": {"sha256": "h", "chunk_ids": ["a:0", "a:1"], "num_chunks": 2, "indexed_at": 1.0,
+                             "doc_type": "nda"}}, f)
+    manifest = DocumentManifest(str(tmp_path))
+    assert not (tmp_path / "manifest.json").exists()
+    assert manifest.get("a.pdf")["chunk_ids"] == ["a:0", "a:1"]
+    assert manifest.describe("a.pdf")["doc_type"] == "nda" and manifest.counts()["chunks"] == 2
+    manifest.close()
+    assert DocumentManifest(str(tmp_path)).is_unchanged("a.pdf", "h")
+
+
+def test_admin_endpoints_read_the_catalog(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    manifest = registry.get_manifest("chroma_db")
+    manifest.record("a.pdf", "h", ["a:0", "a:1"], page_count=3, doc_type="nda", parser="pypdf2")
+    manifest.record("b.pdf", "h", ["b:0"])
+
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/admin")
+    with TestClient(app) as client:
+        assert client.get("/admin/status").json()["indexed_docs"] == 2
+        listing = client.get("/admin/docs", params={"limit": 1, "offset": 1}).json()
+        assert listing["total"] == 2 and listing["documents"][0]["source"] == "b.pdf"
+        assert listing["documents"][0]["doc_type"] is None
+        assert client.get("/admin/documents/a.pdf").json()["page_count"] == 3
+        assert client.get("/admin/documents/missing.pdf").status_code == 404
+    registry.close()
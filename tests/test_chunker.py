@@ -0,0 +1,65 @@
+import re
+
+from langchain_core.documents import Document
+
+from app.core.chunker import iter_chunks
+from app.core.context import token_counter
+from app.core.parser import PAGE_SEPARATOR
+
+CLAUSE = "The Borrower shall pay interest at the rate of {}% per annum on the outstanding principal amount."
+
+
+def _contract(sections=6, clauses=4):
+    lines = ["LOAN AGREEMENT", "", "DEFINITIONS", '"Borrower" means the person named in the Schedule.']
+    for s in range(1, sections + 1):
+        lines += ["", f"{s}. PAYMENT TERMS"]
+        lines += [f"{s}.{c} " + " ".join([CLAUSE.format(s * 10 + c)] * 2) for c in range(1, clauses + 1)]
+    return "\n".join(lines)
+
+
+def _pages(text, size=700):
+    pages, pos = [], 0
+    for n, start in enumerate(range(0, len(text), size), start=1):
+        page = text[start:start + size]
+        pages.append(Document(page_content=page, metadata={"page": n, "page_offset": pos}))
+        pos += len(page) + len(PAGE_SEPARATOR)
+    return pages
+
+
+def test_chunks_follow_clauses_within_the_token_target():
+    text = _contract()
+    chunks = list(iter_chunks([text], strategy="structure", chunk_tokens=120))
+    assert all(token_counter.count(c.page_content) <= 120 for c in chunks)
+    for c in chunks:
+        assert text[c.metadata["start_index"]:].startswith(c.page_content)
+        # Every chunk starts at a clause, title or definition, never mid-sentence
+        assert re.match(r'\d|LOAN|DEFINITIONS|"', c.page_content)
+    # Section titles stay with their first clause
+    assert not any(c.page_content.endswith("PAYMENT TERMS") for c in chunks)
+    assert chunks[1].metadata["heading"].endswith("PAYMENT TERMS")
+
+
+def test_page_breaks_mid_sentence_are_carried_and_offsets_stay_global():
+    text = _contract()
+    pages = _pages(text)
+    chunks = list(iter_chunks(pages, strategy="structure", chunk_tokens=120))
+    joined = PAGE_SEPARATOR.join(p.page_content for p in pages)
+    for c in chunks:
+        assert joined[c.metadata["start_index"]:].startswith(c.page_content)
+        page = [p for p in pages if p.metadata["page_offset"] <= c.metadata["start_index"]][-1]
+        assert c.metadata["page"] == page.metadata["page"]
+    # Whole clauses survive the page cuts
+    clause = "3.2 " + " ".join([CLAUSE.format(32)] * 2)
+    assert any(clause in c.page_content.replace(PAGE_SEPARATOR, "") for c in chunks)
+    # Same input, same chunks (ids are derived from source + start_index)
+    assert [c.metadata["start_index"] for c in iter_chunks(pages, strategy="structure", chunk_tokens=120)] == \
+        [c.metadata["start_index"] for c in chunks]
+
+
+def test_long_clause_is_split_at_sentences_with_overlap():
+    text = "1. " + " ".join(CLAUSE.format(i) for i in range(40))
+    chunks = list(iter_chunks([text], strategy="structure", chunk_tokens=100, overlap_tokens=25))
+    assert len(chunks) > 1
+    for a, b in zip(chunks, chunks[1:]):
+        assert b.page_content.startswith("The Borrower")
+        assert a.metadata["start_index"] < b.metadata["start_index"] < a.metadata["start_index"] + len(a.page_content)
@@ -0,0 +1,52 @@
+import asyncio
+import re
+
+import numpy as np
+
+from app.core.compare import explain_changes, plan_comparison
+
+DOC1 = """LOAN AGREEMENT
+1. Interest. The Borrower shall pay interest at the rate of 9.5% per annum on the outstanding principal.
+2. Repayment. The loan amount of INR 5,00,000 shall be repaid in 24 monthly installments.
+3. Governing Law. This Agreement shall be governed by the laws of India and the courts at Mumbai shall have jurisdiction.
+4. Security. The Borrower shall create a mortgage over the property as security for the loan.
+"""
+
+DOC2 = """LOAN AGREEMENT
+1. Repayment. The loan amount of INR 5,00,000 shall be repaid in 24 monthly installments.
+2. Interest. The Borrower shall pay interest at the rate of 11% per annum on the outstanding principal.
+3. Governing Law. This Agreement shall be governed by the laws of India and the courts at Mumbai shall have jurisdiction.
+4. Default. An event of default occurs if any installment remains unpaid for 30 days after the due date.
+"""
+
+
+def bag_of_words(texts):
+    vectors = np.zeros((len(texts), 256), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in re.findall(r"[a-z]+", text.lower()):
+            vectors[i, hash(word) % 256] += 1
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_only_changed_clauses_reach_the_llm():
+    prompts = []
+
+    async def llm(prompt):
+        prompts.append(prompt)
+        return "- Interest rate: 9.5% in doc1, 11% in doc2"
+
+    comparison = plan_comparison(DOC1, DOC2, embed=bag_of_words)
+    asyncio.run(explain_changes(comparison, llm))
+    result = comparison.to_dict()
+
+    statuses = {(c["doc1"] or c["doc2"])["title"][:12]: c["status"] for c in result["clauses"]}
+    assert statuses == {"LOAN AGREEME": "identical", "1. Interest.": "changed", "2. Repayment": "identical",
+                        "3. Governing": "identical", "4. Security.": "removed", "4. Default. ": "added"}
+    assert result["summary"]["identical"] == 3  # title line, repayment (moved), governing law
+    assert result["summary"]["llm_calls"] == len(prompts) == 1
+    assert "9.5%" in prompts[0] and "11%" in prompts[0] and "Governing" not in prompts[0]
+
+    interest = next(c for c in result["clauses"] if c["status"] == "changed")
+    assert {"op": "replace", "doc1": "9.5%", "doc2": "11%"} in interest["changes"]
+    assert "interest_rate" in interest["doc1"]["labels"]
+    assert "Only in doc1: 4. Security" in result["comparison"]
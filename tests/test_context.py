@@ -0,0 +1,36 @@
+from langchain_core.documents import Document
+
+from app.core.context import TokenCounter, build_context
+
+TEXT = " ".join(f"Clause {i}: the borrower shall repay the principal amount on schedule." for i in range(60))
+
+
+def _chunk(start, end, source="loan.pdf", id=None):
+    return Document(id=id, page_content=TEXT[start:end], metadata={"source": source, "start_index": start})
+
+
+def test_overlapping_chunks_are_trimmed_and_duplicates_dropped():
+    docs = [
+        _chunk(0, 1000, id="a"),
+        _chunk(800, 1800, id="b"),  # 200 chars overlap with "a"
+        _chunk(850, 1750, id="c"),  # entirely covered by a + b
+        _chunk(800, 1800, source="copy.pdf", id="d"),  # same text as "b" under another name
+    ]
+    pack = build_context(docs, max_tokens=10_000)
+    assert [d.id for d in pack.docs] == ["a", "b"]
+    assert pack.duplicates == 2
+    assert pack.texts[1].startswith("[loan.pdf, chunk 2]\n" + TEXT[1000:1010].strip())
+    assert [s["chunk_id"] for s in pack.sources()] == ["a", "b"]
+
+
+def test_budget_skips_chunks_that_do_not_fit_and_truncates_the_first():
+    counter = TokenCounter("")
+    long, short = _chunk(0, 3000, id="long"), _chunk(5000, 5200, id="short")
+    pack = build_context([long, short], max_tokens=200, counter=counter)
+    assert [d.id for d in pack.docs] == ["long"] and pack.truncated
+    assert pack.tokens <= 200
+
+    pack = build_context([_chunk(3000, 3200, id="first"), long, short], max_tokens=200, counter=counter)
+    assert [d.id for d in pack.docs] == ["first", "short"]
+    assert pack.over_budget == 1 and not pack.truncated
+    assert pack.tokens == sum(counter.count(t) for t in pack.texts) <= 200
@@ -0,0 +1,34 @@
+import numpy as np
+
+from app.core.embedding_cache import EmbeddingCache
+
+
+def test_cache_hits_evicts_and_persists(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "test-model", dim=4, max_entries=2)
+    cache.put_many(["clause one", "clause  two"], np.eye(2, 4, dtype=np.float32))
+
+    vectors, missing = cache.get_many(["clause one", "clause two\n", "clause three"])
+    assert missing == [2]
+    assert vectors[1].tolist() == [0.0, 1.0, 0.0, 0.0]
+
+    # "clause one" was used least recently and is evicted first
+    cache.put_many(["clause three"], np.ones((1, 4), dtype=np.float32))
+    assert cache.get_many(["clause one"])[1] == [0]
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+    reopened = EmbeddingCache(str(tmp_path), "test-model", dim=4, max_entries=2)
+    vectors, missing = reopened.get_many(["clause three"])
+    assert missing == []
+    assert vectors[0].tolist() == [1.0, 1.0, 1.0, 1.0]
+
+
+def test_cache_files_grow_on_demand(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "test-model", dim=4, max_entries=3000)
+    cache.put_many([f"clause {i}" for i in range(1500)], np.ones((1500, 4), dtype=np.float32))
+    assert cache.stats()["slots"] == 2048
+    cache.close()
+
+    reopened = EmbeddingCache(str(tmp_path), "test-model", dim=4, max_entries=3000)
+    assert reopened.stats()["entries"] == 1500 and reopened.get_many(["clause 1499"])[1] == []
+    assert (tmp_path / "vectors.f32").stat().st_size == 2048 * 4 * 4
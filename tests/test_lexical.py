@@ -0,0 +1,24 @@
+from app.core.lexical import LexicalIndex
+from app.core.retrieval import reciprocal_rank_fusion
+
+
+def test_bm25_index_is_incremental_and_persisted(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.add(["a:0", "a:1"], ["Clause 14.2 sets the loan at INR 5,00,000.", "Interest is 9.5% per annum."], ["a.pdf"] * 2)
+    index.add(["b:0"], ["Clause 3 governing law: courts of Mumbai."], ["b.pdf"])
+
+    assert index.search("clause 14.2")[0][0] == "a:0"
+    assert index.search("INR 5,00,000")[0][0] == "a:0"
+    assert [c for c, _ in index.search("clause", source="b.pdf")] == ["b:0"]
+
+    assert index.remove_source("a.pdf") == 2
+    index.close()
+    reopened = LexicalIndex(str(tmp_path))
+    assert len(reopened) == 1
+    assert reopened.search("14.2") == []
+    assert reopened.stats()["terms"] == len(set("clause 3 governing law courts mumbai".split()))
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["x", "y", "z"], ["y", "w"]], k=60)
+    assert [i for i, _ in fused][:2] == ["y", "x"]
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app.core.ollama_client import LLMBusy, LLMTimeout, OllamaClient
+
+
+def test_identical_prompts_share_one_generation(ollama_stub):
+    ollama_stub.delay = 0.2
+    client = OllamaClient(base_url=ollama_stub.url, model="stub", max_concurrency=1, max_queued=8)
+
+    async def burst():
+        same = [client.agenerate("what is the interest rate") for _ in range(5)]
+        other = [client.agenerate(f"question {i}") for i in range(2)]
+        return await asyncio.gather(*same, *other)
+
+    answers = asyncio.run(burst())
+    assert answers[:5] == ["echo: what is the interest rate"] * 5
+    assert answers[5:] == ["echo: question 0", "echo: question 1"]
+    assert len(ollama_stub.requests) == 3
+    assert ollama_stub.max_active == 1
+    assert ollama_stub.requests[0]["model"] == "stub" and ollama_stub.requests[0]["stream"] is False
+    stats = client.stats()
+    assert (stats["requests"], stats["coalesced"], stats["generations"]) == (7, 4, 3)
+    client.close()
+
+
+def test_timeout_and_queue_limit(ollama_stub):
+    ollama_stub.delay = 1.0
+    client = OllamaClient(base_url=ollama_stub.url, max_concurrency=1, max_queued=1, timeout_s=0.2)
+
+    async def overload():
+        return await asyncio.gather(*(client.agenerate(f"q{i}") for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(overload())
+    assert [type(r) for r in results] == [LLMTimeout, LLMTimeout, LLMBusy]
+    with pytest.raises(LLMTimeout):
+        client.generate("sync caller")
+    client.close()
+
+
+def test_stream_yields_chunks(ollama_stub):
+    ollama_stub.reply = "nine point five percent"
+    client = OllamaClient(base_url=ollama_stub.url)
+
+    async def collect():
+        return [chunk async for chunk in client.astream("rate?")]
+
+    assert asyncio.run(collect()) == ["nine ", "point ", "five ", "percent "]
+    client.close()
@@ -5,3 +5,24 @@ def test_parse_pdf():
     assert isinstance(docs, list)
     assert len(docs) > 0
     assert hasattr(docs[0], "page_content")
+
+
+def test_iter_pdf_pages_keeps_page_boundaries():
+    import fitz
+    from app.core.chunker import iter_chunks
+    from app.core.parser import iter_pdf_pages, join_pages
+
+    pdf = fitz.open()
+    for i in range(3):
+        pdf.new_page().insert_text((72, 72), f"Clause {i + 1}: the borrower shall repay the loan.")
+    pages = list(iter_pdf_pages(pdf.tobytes(), ocr_if_needed=False))
+
+    assert [p.metadata["page"] for p in pages] == [1, 2, 3]
+    text = join_pages(pages)
+    for p in pages:
+        offset = p.metadata["page_offset"]
+        assert text[offset:offset + len(p.page_content)] == p.page_content
+
+    chunks = list(iter_chunks(pages))
+    assert [c.metadata["page"] for c in chunks] == [1, 2, 3]
+    assert chunks[2].metadata["start_index"] == pages[2].metadata["page_offset"]
@@ -0,0 +1,27 @@
+from langchain_core.documents import Document
+
+from app.core.reranker import RerankerService
+
+
+class CountingModel:
+    def __init__(self):
+        self.pairs = 0
+
+    def predict(self, pairs, **kwargs):
+        self.pairs += len(pairs)
+        return [float(len(text)) for _, text in pairs]
+
+
+def test_rerank_prunes_and_caches_scores():
+    service = RerankerService("unused", max_wait_ms=0)
+    service._model = model = CountingModel()
+    docs = [Document(id=f"c{i}", page_content="x" * i) for i in range(1, 11)]
+
+    top = service.rerank(docs, "q", top_k=2, prune_to=5)
+    assert [d.id for d in top] == ["c5", "c4"]
+    assert model.pairs == 5
+
+    service.rerank(docs, "q", top_k=2, prune_to=5)
+    assert model.pairs == 5  # served from the score cache
+    assert service.stats()["cache"]["hits"] == 5
+    service.close()
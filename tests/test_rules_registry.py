@@ -0,0 +1,28 @@
+import json
+import os
+
+from app.core.legal_check import RULES_PATH, run_rule_check, run_rule_check_all
+from app.core.rules_registry import RulesRegistry
+
+
+def test_rules_reload_when_file_changes(tmp_path):
+    rule_file = tmp_path / "nda.json"
+    rules = json.loads((RULES_PATH / "nda.json").read_text())
+    rule_file.write_text(json.dumps(rules))
+    registry = RulesRegistry(tmp_path)
+    assert "extra" not in registry.get("nda")[0]["clauses"]
+
+    rules["clauses"]["extra"] = {"keywords": ["zebra"], "description": "test"}
+    rule_file.write_text(json.dumps(rules))
+    st = os.stat(rule_file)
+    os.utime(rule_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert "extra" in registry.get("nda")[0]["clauses"]
+    assert registry.stats()["reloads"] == 1
+
+
+def test_auto_detects_type_and_matches_single_type_check():
+    text = ("This Non-Disclosure Agreement protects confidential information and trade secrets. "
+            "The receiving party has a duty of non-disclosure for a term of two years.")
+    result = run_rule_check_all(text)
+    assert result["document_type"] == "nda"
+    assert result["checks"]["nda"] == run_rule_check(text, "nda")
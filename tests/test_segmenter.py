@@ -0,0 +1,22 @@
+from app.core.legal_check import run_rule_check
+from app.core.segmenter import segment_text
+
+TEXT = """LOAN AGREEMENT
+1. Definitions. A late fee of 2% applies.
+2. Interest Rate. Interest shall accrue at 9.5% per annum.
+SECTION 3: GOVERNING LAW
+This agreement is subject to the jurisdiction of courts of Mumbai.
+"""
+
+
+def test_segment_text_splits_headings_and_maps_pages():
+    index = segment_text(TEXT, pages=[(0, 1), (TEXT.index("2."), 2)])
+    assert [s.title.split()[0] for s in index.sections] == ["LOAN", "1.", "2.", "SECTION"]
+    assert index.section_at(TEXT.index("9.5%")).index == 2
+    assert index.page_at(TEXT.index("Mumbai")) == 2
+
+
+def test_values_come_from_the_matching_section():
+    result = run_rule_check(TEXT, "loan_agreement")["results"]["interest_rate"]
+    assert result["value"] == "9.5% per annum"
+    assert TEXT[result["span"]["start"]:result["span"]["end"]].lower() == "9.5% per annum"
@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app.core import llm_client
+from app.core.context import build_context
+from app.core.ollama_client import OllamaClient
+from app.routes import query
+
+
+def _events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_ask_stream_sends_sources_tokens_then_timings(monkeypatch, ollama_stub):
+    docs = [Document(page_content="Interest is 9.5% per annum.", metadata={"source": "loan.pdf", "page": 2})]
+    monkeypatch.setattr(query, "_retrieve", lambda req, timings, embedding=None, persist_dir=None: build_context(docs))
+    ollama_stub.reply, ollama_stub.delay = "9.5% [loan.pdf]", 0.01
+    monkeypatch.setattr(llm_client, "client", OllamaClient(base_url=ollama_stub.url))
+
+    app = FastAPI()
+    app.include_router(query.router, prefix="/query")
+    with TestClient(app) as client:
+        r = client.post("/query/ask/stream", json={"question": "What is the interest rate?", "use_cache": False})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+
+    events = _events(r.text)
+    name, sources = events[0]
+    assert name == "sources"
+    assert sources["sources"] == [{"source": "loan.pdf", "page": 2, "chunk_id": None, "chunk": 1}]
+    assert sources["usage"]["prompt_tokens"] > sources["usage"]["context_tokens"] > 0
+    tokens = [data["text"] for name, data in events if name == "token"]
+    assert "".join(tokens) == "9.5% [loan.pdf] "
+    name, done = events[-1]
+    assert name == "done"
+    assert done["timings"]["tokens"] == len(tokens)
+    assert done["timings"]["first_token_ms"] <= done["timings"]["total_ms"]
+    llm_client.client.close()
+
+
+def test_ask_stream_maps_a_busy_llm_to_429(monkeypatch, ollama_stub):
+    docs = [Document(page_content="Interest is 9.5% per annum.", metadata={"source": "loan.pdf"})]
+    monkeypatch.setattr(query, "_retrieve", lambda req, timings, embedding=None, persist_dir=None: build_context(docs))
+    ollama_stub.delay = 0.5
+    monkeypatch.setattr(llm_client, "client", OllamaClient(base_url=ollama_stub.url, max_concurrency=1, max_queued=0))
+    holder = threading.Thread(target=llm_client.client.generate, args=("holds the only slot",))
+    holder.start()
+    while llm_client.client.stats()["active"] == 0:
+        time.sleep(0.01)
+
+    app = FastAPI()
+    app.include_router(query.router, prefix="/query")
+    with TestClient(app) as client:
+        r = client.post("/query/ask/stream", json={"question": "What is the interest rate?", "use_cache": False})
+    assert r.status_code == 429
+    assert r.headers["retry-after"] == "5"
+    holder.join()
+    llm_client.client.close()
+
+
+def test_client_disconnect_cancels_generation(monkeypatch, ollama_stub):
+    docs = [Document(page_content="Interest is 9.5% per annum.", metadata={"source": "loan.pdf"})]
+    monkeypatch.setattr(query, "_retrieve", lambda req, timings, embedding=None, persist_dir=None: build_context(docs))
+    ollama_stub.reply, ollama_stub.delay = " ".join(["word"] * 50), 0.1  # 5s to generate in full
+    monkeypatch.setattr(llm_client, "client", OllamaClient(base_url=ollama_stub.url))
+
+    app = FastAPI()
+    app.include_router(query.router, prefix="/query")
+    # A real server: the disconnect has to reach the app as it would from a browser
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    start = time.perf_counter()
+    body = {"question": "What is the interest rate?", "use_cache": False}
+    with httpx.stream("POST", f"http://127.0.0.1:{port}/query/ask/stream", json=body, timeout=10) as r:
+        for line in r.iter_lines():
+            if line == "event: token":
+                break
+    assert ollama_stub.active == 1
+    while ollama_stub.active and time.perf_counter() - start < 3:
+        time.sleep(0.05)
+    assert ollama_stub.active == 0
+    assert time.perf_counter() - start < 3
+
+    server.should_exit = True
+    thread.join(5)
+    llm_client.client.close()
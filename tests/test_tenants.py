@@ -0,0 +1,115 @@
+import chromadb
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from app.core.doc_index import DocumentIndexes
+from app.core.manifest import DocumentManifest
+from app.core.registry import registry
+from app.core.tenants import tenant_dir
+from app.core.vector_index import ChromaIndex, LocalIndex
+from app.routes import admin, upload
+from conftest import ConstantEmbeddings
+
+
+def _add(store, manifest, source, ids, vectors):
+    store.add_vectors(ids, np.asarray(vectors, dtype=np.float32),
+                      [Document(page_content=f"{i} of {source}", metadata={"source": source}) for i in ids])
+    manifest.record(source, "h", ids)
+
+
+@pytest.mark.parametrize("backend", ["local", "chroma"])
+def test_document_index_scans_only_that_document(backend, tmp_path):
+    if backend == "local":
+        store = LocalIndex(str(tmp_path), search="exact")
+    else:
+        store = ChromaIndex(Chroma(client=chromadb.PersistentClient(path=str(tmp_path)),
+                                   collection_name=tmp_path.name, embedding_function=None))
+    manifest = DocumentManifest(str(tmp_path))
+    _add(store, manifest, "a.pdf", ["a:0", "a:1", "a:2"], [[0.6, 0.8], [0.8, 0.6], [0.0, 1.0]])
+    _add(store, manifest, "b.pdf", ["b:0"], [[1.0, 0.0]])  # nearest overall, but another document
+    indexes = DocumentIndexes(max_mb=1)
+
+    def search(source, embedding, k):
+        return indexes.search(str(tmp_path), store, manifest, source, embedding, k)
+
+    assert [d.id for d in search("a.pdf", [1.0, 0.0], k=2)] == ["a:1", "a:0"]
+    assert [d.id for d in search("a.pdf", [0.0, 1.0], k=1)] == ["a:2"]
+    assert search("unknown.pdf", [1.0, 0.0], k=2) is None
+    assert (indexes.stats()["builds"], indexes.stats()["hits"]) == (1, 1)
+
+    # Re-indexing the document invalidates its sub-index
+    store.delete_source("a.pdf")
+    _add(store, manifest, "a.pdf", ["a2:0"], [[0.0, 1.0]])
+    assert [d.id for d in search("a.pdf", [1.0, 0.0], k=2)] == ["a2:0"]
+    assert indexes.stats()["builds"] == 2
+
+    # A document larger than the whole budget is built once, then left to the filtered search
+    indexes.max_bytes = 100
+    _add(store, manifest, "big.pdf", [f"big:{i}" for i in range(10)], [[1.0, 0.0]] * 10)
+    assert len(search("big.pdf", [1.0, 0.0], k=2)) == 2
+    assert search("big.pdf", [1.0, 0.0], k=2) is None
+    assert (indexes.stats()["builds"], indexes.stats()["oversized"]) == (3, 1)
+    store.close()
+
+
+def test_one_budget_covers_every_collection(tmp_path):
+    indexes = DocumentIndexes(max_mb=1)
+    indexes.max_bytes = 30  # one sub-index of one chunk (8 bytes of vector, 13 of text)
+    stores = []
+    for tenant in ("t1", "t2"):
+        store = LocalIndex(str(tmp_path / tenant), search="exact")
+        manifest = DocumentManifest(str(tmp_path / tenant))
+        _add(store, manifest, "a.pdf", [f"{tenant}:0"], [[1.0, 0.0]])
+        assert [d.id for d in indexes.search(tenant, store, manifest, "a.pdf", [1.0, 0.0], k=1)] == [f"{tenant}:0"]
+        stores.append(store)
+    # The second tenant's sub-index evicted the first one's
+    assert (indexes.stats()["documents"], indexes.stats()["evictions"]) == (1, 1)
+    indexes.clear("t1")
+    assert indexes.stats()["documents"] == 1
+    indexes.clear("t2")
+    assert indexes.stats()["documents"] == 0
+    for store in stores:
+        store.close()
+
+
+@pytest.fixture
+def tenants_registry(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    registry.register_embedding_model(ConstantEmbeddings())
+    try:
+        yield registry
+    finally:
+        registry.close()
+
+
+def test_tenants_are_isolated(tenants_registry, tmp_path):
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/admin")
+    app.include_router(upload.router, prefix="/upload")
+    acme = {"X-Tenant": "acme"}
+    with TestClient(app) as client:
+        # Ingest routes accept only provisioned tenants: an arbitrary X-Tenant creates nothing
+        pdf = {"file": ("a.pdf", b"%PDF-1.4", "application/pdf")}
+        assert client.post("/upload/", headers=acme, files=pdf).status_code == 404
+        assert client.post("/admin/tenants/a.b").status_code == 400
+        assert not (tmp_path / "tenants").exists()
+        assert client.post("/admin/tenants/acme").status_code == 201
+
+        registry.get_manifest(tenant_dir()).record("shared.pdf", "h", ["s:0"])
+        registry.get_manifest(tenant_dir("acme")).record("acme.pdf", "h", ["a:0", "a:1"])
+        assert client.get("/admin/status").json()["indexed_docs"] == 1
+        assert client.get("/admin/status", headers=acme).json()["indexed_chunks"] == 2
+        assert client.get("/admin/documents/shared.pdf", headers=acme).status_code == 404
+        assert client.get("/admin/status", headers={"X-Tenant": "../chroma_db"}).status_code == 400
+        # Reads never open (or create) a collection for a tenant that has none
+        assert client.get("/admin/docs", headers={"X-Tenant": "nobody"}).status_code == 404
+        assert not (tmp_path / "tenants" / "nobody").exists()
+        assert client.get("/admin/tenants").json()["tenants"] == ["default", "acme"]
+
+        assert client.delete("/admin/clear", headers=acme).status_code == 200
+        assert client.get("/admin/status", headers=acme).json()["indexed_docs"] == 0
+        assert client.get("/admin/status").json()["indexed_docs"] == 1
@@ -0,0 +1,48 @@
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import config
+from app.core.jobs import IngestionQueue
+from app.routes import upload
+
+
+def test_upload_runs_on_the_ingestion_queue(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    queue = IngestionQueue(workers=1, max_queued=1)
+    monkeypatch.setattr(upload, "ingestion_queue", queue)
+    workers = []
+
+    def fake_ingest(source, spooled, persist_dir, progress=None, parse=None):
+        workers.append(threading.current_thread().name)
+        spooled.cleanup()
+        return {"status": "indexed", "num_chunks": 3, "parser": "pymupdf", "pages": []}
+
+    monkeypatch.setattr(upload, "ingest_spooled", fake_ingest)
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/upload")
+    files = {"file": ("a.pdf", b"%PDF-1.4 test", "application/pdf")}
+    with TestClient(app) as client:
+        assert client.post("/upload/", files=files).json()["num_chunks"] == 3
+        assert workers == ["ingest-0"]
+
+        # One job running and one waiting: the queue is full
+        started, release = threading.Event(), threading.Event()
+        queue.submit("upload", "busy.pdf", lambda progress: started.set() or release.wait(5))
+        assert started.wait(5)
+        queue.submit("upload", "waiting.pdf", lambda progress: None)
+        r = client.post("/upload/", files=files)
+        release.set()
+    assert r.status_code == 429 and r.headers["retry-after"] == "5"
+    queue.close()
+
+
+def test_upload_over_the_size_limit_is_413(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "UPLOAD_MAX_MB", 0)
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/upload")
+    with TestClient(app) as client:
+        r = client.post("/upload/", files={"file": ("a.pdf", b"%PDF-1.4 test", "application/pdf")})
+    assert r.status_code == 413
@@ -0,0 +1,202 @@
+import threading
+
+import chromadb
+import numpy as np
+import pytest
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from app.core.vector_index import ChromaIndex, LocalIndex, VectorIndex
+
+
+class KeywordEmbeddings:
+    """
+    Deterministic unit vectors: one dimension per known word.
+    """
+
+    WORDS = ["interest", "termination", "arbitration", "mortgage", "notice", "fees", "confidential", "default"]
+
+    def _embed(self, text):
+        v = np.array([text.lower().count(w) for w in self.WORDS], dtype=np.float32) + 0.01
+        return (v / np.linalg.norm(v)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def _docs(source, words):
+    return [Document(page_content=f"{w} clause of {source}", metadata={"source": source, "start_index": i})
+            for i, w in enumerate(words)]
+
+
+@pytest.fixture(params=["local", "chroma"])
+def store(request, tmp_path):
+    if request.param == "local":
+        index = LocalIndex(str(tmp_path), KeywordEmbeddings(), search="exact")
+    else:
+        client = chromadb.PersistentClient(path=str(tmp_path))
+        index = ChromaIndex(Chroma(client=client, collection_name=tmp_path.name,
+                                   embedding_function=KeywordEmbeddings()))
+    yield index
+    index.close()
+
+
+def test_backends_share_the_interface(store):
+    store.add_documents(_docs("a.pdf", ["interest", "termination", "notice"]), ids=["a:0", "a:1", "a:2"])
+    store.add_documents(_docs("b.pdf", ["interest", "mortgage"]), ids=["b:0", "b:1"])
+    assert store.count() == 5 and store.sources() == ["a.pdf", "b.pdf"]
+
+    assert store.similarity_search("termination", k=1)[0].id == "a:1"
+    assert [d.id for d in store.similarity_search("interest", k=1, source="b.pdf")] == ["b:0"]
+    assert [d.metadata["start_index"] for d in store.get(["b:1", "missing", "a:0"])] == [1, 0]
+
+    # Same id again replaces instead of duplicating
+    store.add_documents(_docs("a.pdf", ["arbitration"]), ids=["a:1"])
+    assert store.count() == 5 and store.get(["a:1"])[0].page_content.startswith("arbitration")
+
+    assert store.delete_source("a.pdf") == 3
+    assert store.count() == 2 and store.sources() == ["b.pdf"]
+    assert {d.id for batch in store.iter_documents(batch_size=1) for d in batch} == {"b:0", "b:1"}
+    store.reset()
+    assert store.count() == 0 and store.similarity_search("interest", k=3) == []
+
+
+def test_a_backend_must_implement_the_whole_interface():
+    class Partial(VectorIndex):
+        def count(self):
+            return 0
+
+    with pytest.raises(TypeError, match="abstract"):
+        Partial(KeywordEmbeddings())
+
+
+def test_local_index_reopens_and_reuses_freed_rows(tmp_path):
+    index = LocalIndex(str(tmp_path), KeywordEmbeddings())
+    index.add_documents(_docs("a.pdf", ["interest", "fees"]), ids=["a:0", "a:1"])
+    index.add_documents(_docs("b.pdf", ["default"]), ids=["b:0"])
+    index.delete_source("a.pdf")
+    index.add_documents(_docs("c.pdf", ["notice"]), ids=["c:0"])
+    assert index.stats()["rows"] == 3  # c.pdf took a freed row
+    index.close()
+
+    index = LocalIndex(str(tmp_path), KeywordEmbeddings())
+    assert index.count() == 2 and index.sources() == ["b.pdf", "c.pdf"]
+    assert index.similarity_search("notice", k=1)[0].id == "c:0"
+    index.close()
+
+
+def test_rows_freed_during_a_search_are_not_reused_until_it_ends(tmp_path):
+    index = LocalIndex(str(tmp_path), KeywordEmbeddings(), search="exact")
+    index.add_documents(_docs("a.pdf", ["interest", "fees"]), ids=["a:0", "a:1"])
+    index.add_documents(_docs("b.pdf", ["default"]), ids=["b:0"])
+    scanning, release, found = threading.Event(), threading.Event(), []
+    search = index._search
+
+    def slow_search(*args):
+        scanning.set()
+        release.wait(5)
+        return search(*args)
+
+    index._search = slow_search
+    reader = threading.Thread(target=lambda: found.extend(index.similarity_search("interest", k=3)))
+    reader.start()
+    scanning.wait(5)
+    index.delete_source("a.pdf")
+    index.add_documents(_docs("c.pdf", ["interest"]), ids=["c:0"])
+    assert index.stats()["rows"] == 4  # a.pdf's rows may still be scored
+    release.set()
+    reader.join()
+
+    assert [d.id for d in found] == ["b:0"]  # deleted while scored: dropped, never swapped for c:0
+    index.add_documents(_docs("d.pdf", ["notice"]), ids=["d:0"])
+    assert index.stats()["rows"] == 4
+    index.close()
+
+
+def _clustered(rng, n=2000, dim=32, noise=0.1):
+    centers = rng.normal(size=(20, dim))
+    vectors = centers[rng.integers(0, 20, n)] + noise * rng.normal(size=(n, dim))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    docs = [Document(page_content=str(i), metadata={"source": f"d{i % 7}"}) for i in range(n)]
+    return vectors, docs
+
+
+def _recall(index, vectors, queries, k=5):
+    hits = 0
+    for q in queries:
+        exact = np.argsort(-(vectors @ q))[:k]
+        found = [int(d.id) for d in index.similarity_search_by_vector(q, k=k)]
+        hits += len(set(found) & set(exact.tolist()))
+    return hits / (k * len(queries))
+
+
+def test_ivf_search_finds_the_exact_neighbours(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors, docs = _clustered(rng)
+    index = LocalIndex(str(tmp_path), search="ivf", ivf_min_rows=1000, nprobe=8)
+    index.add_vectors([str(i) for i in range(2000)], vectors, docs)
+    assert index.stats()["ivf_lists"] > 1
+    assert _recall(index, vectors, vectors[:50] + 0.05 * rng.normal(size=(50, 32)).astype(np.float32)) >= 0.9
+    index.close()
+
+
+def test_ivf_training_runs_outside_the_lock(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors, docs = _clustered(rng, n=1200)
+    index = LocalIndex(str(tmp_path), search="ivf", ivf_min_rows=1000, nprobe=8)
+    training, release = threading.Event(), threading.Event()
+    fit = index._fit
+
+    def slow_fit(*args):
+        training.set()
+        release.wait(5)
+        return fit(*args)
+
+    index._fit = slow_fit
+    ids = [str(i) for i in range(1200)]
+    writer = threading.Thread(target=index.add_vectors, args=(ids[:1000], vectors[:1000], docs[:1000]))
+    writer.start()
+    assert training.wait(5)
+    # Writes, deletes and searches go on while the lists are trained
+    index.add_vectors(ids[1000:], vectors[1000:], docs[1000:])
+    index.delete(ids[:10])
+    assert index.similarity_search_by_vector(vectors[500], k=1)[0].id == "500"
+    release.set()
+    writer.join()
+
+    assert index.stats()["ivf_lists"] > 1
+    assert sum(len(rows) for rows in index._lists.values()) == index.count() == 1190
+    assert _recall(index, vectors, vectors[1000:1050]) >= 0.9
+    index.close()
+
+
+@pytest.mark.parametrize("codes, recall", [("int8", 0.95), ("binary", 0.85)])
+def test_coded_scan_is_rescored_with_the_float_vectors(tmp_path, codes, recall):
+    rng = np.random.default_rng(1)
+    # Noisier clusters: sign bits of near-identical vectors would all tie
+    vectors, docs = _clustered(rng, dim=384, noise=1.0)
+    queries = vectors[:50] + 0.05 * rng.normal(size=(50, 384)).astype(np.float32)
+    index = LocalIndex(str(tmp_path), search="exact")
+    index.add_vectors([str(i) for i in range(2000)], vectors, docs)
+    index.close()
+
+    # Opening a float32 index with codes encodes the existing rows
+    index = LocalIndex(str(tmp_path), search="exact", codes=codes, rescore=10)
+    assert index.stats()["codes"] == codes
+    assert _recall(index, vectors, queries) >= recall
+    # Rescored hits carry exact order: the nearest row to a stored vector is itself
+    assert index.similarity_search_by_vector(vectors[7], k=1)[0].id == "7"
+    index.close()
+
+
+def test_int8_codes_use_one_fixed_scale(tmp_path):
+    index = LocalIndex(str(tmp_path), search="exact", codes="int8")
+    first = np.full((1, 4), 0.5, dtype=np.float32)
+    later = np.array([[0.9, np.sqrt(1 - 0.81), 0.0, 0.0]], dtype=np.float32)  # a larger component
+    index.add_vectors(["first"], first, _docs("a.pdf", ["interest"]))
+    index.add_vectors(["later"], later, _docs("a.pdf", ["fees"]))
+    assert index._codes[:2].tolist() == np.rint(np.vstack([first, later]) * 127).tolist()
+    index.close()
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from app.core import config
+from app.core.registry import registry
+from app.core.vectorstore import index_document
+from conftest import ConstantEmbeddings
+
+
+@pytest.fixture
+def store_dir(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    registry.register_embedding_model(ConstantEmbeddings())
+    try:
+        yield "chroma_db"
+    finally:
+        registry.close()
+
+
+def _chunks(texts, delay=0.0):
+    for i, text in enumerate(texts):
+        time.sleep(delay)
+        yield Document(page_content=text, metadata={"start_index": i * 100})
+
+
+def test_concurrent_indexing_of_one_source_is_serialized(store_dir):
+    threads = [threading.Thread(target=index_document, args=("a.pdf", h, _chunks(texts, 0.02), store_dir))
+               for h, texts in (("h1", ["one", "two", "three"]), ("h2", ["four", "five"]))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    entry = registry.get_manifest(store_dir).get("a.pdf")
+    stored = {d.id for d in registry.get_store(store_dir).get_source("a.pdf")}
+    assert stored == set(entry["chunk_ids"])
+
+
+def test_failed_replacement_keeps_the_previous_version(store_dir, monkeypatch):
+    monkeypatch.setattr(config, "INDEX_BATCH_SIZE", 1)  # the failing version is partly written
+    index_document("a.pdf", "h1", _chunks(["interest is 9.5%", "termination on notice"]), store_dir)
+    before = registry.get_manifest(store_dir).get("a.pdf")["chunk_ids"]
+
+    def corrupt():
+        yield from _chunks(["half of the new version"])
+        raise ValueError("Could not parse PDF")
+
+    with pytest.raises(ValueError):
+        index_document("a.pdf", "h2", corrupt(), store_dir)
+    with pytest.raises(ValueError):
+        index_document("a.pdf", "h3", _chunks([]), store_dir)
+
+    entry = registry.get_manifest(store_dir).get("a.pdf")
+    assert (entry["sha256"], entry["chunk_ids"]) == ("h1", before)
+    assert {d.id for d in registry.get_store(store_dir).get_source("a.pdf")} == set(before)
+    assert [c for c, _ in registry.get_lexical(store_dir).search("termination", source="a.pdf")] == [before[1]]
+    assert registry.get_lexical(store_dir).search("half") == []
+
+    # A good replacement swaps the versions
+    index_document("a.pdf", "h4", _chunks(["arbitration in Mumbai"]), store_dir)
+    after = registry.get_manifest(store_dir).get("a.pdf")["chunk_ids"]
+    assert {d.id for d in registry.get_store(store_dir).get_source("a.pdf")} == set(after)
+    assert registry.get_lexical(store_dir).search("termination") == []